@@ -1,17 +1,17 @@
 from django.contrib import admin
-from .models import Carro, Critica, CarroImagem
+from .models import AvaliacaoMensalCarro, AvaliacaoMensalMarca, Carro, Critica, CarroImagem, MarcaSeguida
 
 
 @admin.register(Carro)
 class CarroAdmin(admin.ModelAdmin):
-    list_display = ("marca", "modelo", "ano")
+    list_display = ("marca", "modelo", "ano", "media_avaliacao", "total_criticas")
     search_fields = ("marca", "modelo")
 
 
 @admin.register(CarroImagem)
 class CarroImagemAdmin(admin.ModelAdmin):
-    list_display = ("carro", "tipo", "foto")
-    list_filter  = ("tipo", "carro__marca")
+    list_display = ("carro", "tipo", "foto", "status")
+    list_filter  = ("tipo", "status", "carro__marca")
 
 
 @admin.register(Critica)
@@ -19,3 +19,24 @@ class CriticaAdmin(admin.ModelAdmin):
     list_display = ("carro", "usuario", "avaliacao", "criado_em")
     list_filter  = ("avaliacao", "carro__marca")
     search_fields = ("carro__modelo", "usuario__username")
+
+
+@admin.register(MarcaSeguida)
+class MarcaSeguidaAdmin(admin.ModelAdmin):
+    list_display = ("usuario", "marca", "criado_em")
+    search_fields = ("marca", "usuario__username")
+
+
+@admin.register(AvaliacaoMensalCarro)
+class AvaliacaoMensalCarroAdmin(admin.ModelAdmin):
+    list_display = ("carro", "mes", "total", "soma")
+    list_filter = ("mes",)
+    readonly_fields = ("carro", "mes", "total", "soma")
+
+
+@admin.register(AvaliacaoMensalMarca)
+class AvaliacaoMensalMarcaAdmin(admin.ModelAdmin):
+    list_display = ("marca", "mes", "total", "soma")
+    list_filter = ("mes",)
+    search_fields = ("marca",)
+    readonly_fields = ("marca", "mes", "total", "soma")
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate, pre_migrate
+        from . import signals  # registra os receivers
+        from . import throttling
+
+        pre_migrate.connect(signals.suspender_indice_busca, sender=self)
+        post_migrate.connect(signals.reinstalar_indice_busca, sender=self)
+        if settings.THROTTLE_ATIVO:
+            throttling.armazenamento()      # THROTTLE_STORE inválido falha aqui, não em silêncio
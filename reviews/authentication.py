@@ -0,0 +1,218 @@
+# reviews/authentication.py
+"""
+Autenticação JWT sem SELECT em auth_user a cada requisição.
+
+A assinatura e a validade do token continuam sendo verificadas em toda
+requisição; só a busca do usuário passa a vir de um snapshot em dois
+níveis:
+
+  1. dicionário no processo, com TTL curto (JWT_CACHE_USUARIO_TTL_LOCAL);
+  2. só com cache compartilhado (Redis): cache do Django, com TTL maior
+     (JWT_CACHE_USUARIO_TTL). Com LocMem este nível não é usado – ele seria
+     por processo, e a invalidação feita num worker não chegaria aos outros.
+
+O snapshot guarda os campos do usuário, exceto a senha, que fica
+"deferida": se algum código a ler, o Django a busca no banco. save() de um
+usuário assim grava só os campos carregados. Com CHECK_REVOKE_TOKEN, guarda
+apenas o hash MD5 que o SimpleJWT compara.
+
+Invalidação (reviews/signals.py): save/delete do usuário e blacklist de
+token (se o app token_blacklist estiver instalado) apagam o snapshot do
+cache compartilhado e deste processo. Os outros processos enxergam a
+mudança em no máximo JWT_CACHE_USUARIO_TTL_LOCAL segundos, com ou sem
+Redis. Updates em massa de User (QuerySet.update) não disparam sinais:
+chame `invalidar_usuario`.
+
+EmailOuUsernameBackend (login por usuário/senha) resolve username OU e-mail
+numa única query indexada; ver a migração 0013 para o índice único em
+LOWER(email).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F, Lookup, Q, Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import PREFIXO, compartilhado
+
+MAX_LOCAL = 10_000
+_REVOGACAO = "_hash_revogacao"
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def _chave(user_id):
+    return f"{PREFIXO}:usuario:{user_id}"
+
+
+class _SnapshotsLocais:
+    """LRU com TTL, por processo."""
+
+    def __init__(self, maximo=MAX_LOCAL):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._dados = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            item = self._dados.get(user_id)
+            if item is None:
+                return None
+            expira_em, snapshot = item
+            if expira_em < time.monotonic():
+                del self._dados[user_id]
+                return None
+            self._dados.move_to_end(user_id)
+            return snapshot
+
+    def set(self, user_id, snapshot, ttl):
+        with self._lock:
+            self._dados[user_id] = (time.monotonic() + ttl, snapshot)
+            self._dados.move_to_end(user_id)
+            while len(self._dados) > self.maximo:
+                self._dados.popitem(last=False)
+
+    def remover(self, user_id):
+        with self._lock:
+            self._dados.pop(user_id, None)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+snapshots_locais = _SnapshotsLocais()
+
+
+def invalidar_usuario(user_id):
+    snapshots_locais.remover(user_id)
+    if compartilhado():
+        cache.delete(_chave(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication com o usuário vindo do snapshot (ver docstring do módulo)."""
+
+    def get_user(self, validated_token):
+        if not _config("JWT_CACHE_USUARIO", True):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        snapshot = self._snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user = self._montar(snapshot)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snapshot[_REVOGACAO]:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
+
+    def _snapshot(self, user_id):
+        snapshot = snapshots_locais.get(user_id)
+        if snapshot is None:
+            usar_cache = compartilhado()
+            snapshot = cache.get(_chave(user_id)) if usar_cache else None
+            if snapshot is None:
+                snapshot = self._do_banco(user_id)
+                if snapshot is None:
+                    return None
+                if usar_cache:
+                    cache.set(_chave(user_id), snapshot, _config("JWT_CACHE_USUARIO_TTL", 300))
+            snapshots_locais.set(user_id, snapshot, _config("JWT_CACHE_USUARIO_TTL_LOCAL", 5))
+        return snapshot
+
+    def _campos(self):
+        return [f.attname for f in self.user_model._meta.concrete_fields if f.attname != "password"]
+
+    def _do_banco(self, user_id):
+        campos = self._campos()
+        filtro = {api_settings.USER_ID_FIELD: user_id}
+        if api_settings.CHECK_REVOKE_TOKEN:
+            linha = self.user_model.objects.filter(**filtro).values_list(*campos, "password").first()
+            if linha is None:
+                return None
+            *valores, senha = linha
+            return {**dict(zip(campos, valores)), _REVOGACAO: get_md5_hash_password(senha)}
+        linha = self.user_model.objects.filter(**filtro).values_list(*campos).first()
+        return None if linha is None else dict(zip(campos, linha))
+
+    def _montar(self, snapshot):
+        campos = [campo for campo in self._campos() if campo in snapshot]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, campos, [snapshot[campo] for campo in campos]
+        )
+
+
+# --------------------------------------------------
+# Login por username ou e-mail
+# --------------------------------------------------
+class Diferente(Lookup):
+    """`a <> b` – forma que o índice parcial (WHERE email <> '') reconhece."""
+    lookup_name = "ne"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} <> {rhs}", [*lhs_params, *rhs_params]
+
+
+def filtro_por_email(email):
+    """LOWER(email) = LOWER(%s) AND email <> '' – usa o índice da migração 0013."""
+    return Q(Exact(Lower("email"), Lower(Value(email)))) & Q(Diferente(F("email"), Value("")))
+
+
+class EmailOuUsernameBackend(ModelBackend):
+    """
+    Aceita no campo `username` tanto o username quanto o e-mail (sem
+    diferenciar maiúsculas). Uma única query:
+
+        WHERE username = %s OR (LOWER(email) = LOWER(%s) AND email <> '')
+
+    O username tem precedência se os dois casarem com usuários diferentes.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        candidatos = list(
+            User._default_manager
+            .filter(Q(**{User.USERNAME_FIELD: username}) | filtro_por_email(username))[:2]
+        )
+        user = next(
+            (u for u in candidatos if u.get_username() == username),
+            candidatos[0] if candidatos else None,
+        )
+        if user is None:
+            # mesmo custo de hash de quando o usuário existe (timing)
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
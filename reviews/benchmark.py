@@ -0,0 +1,212 @@
+# reviews/benchmark.py
+"""
+Dados sintéticos e cenários de carga da API.
+
+GeradorDeDados cria usuários, carros, imagens, críticas e likes em lote
+(bulk_create, com os mesmos agregados/índices que a aplicação mantém).
+`executar_cenario` chama a API em processo (APIClient, sem rede) e mede
+latência, queries por requisição e requisições por segundo. Os comandos
+rodam dentro de uma transação desfeita no final, então os callbacks de
+transaction.on_commit (deltas do ranking, feed) são executados logo após
+cada requisição e entram na medida dela, como se ela tivesse feito commit.
+
+Usado pelos comandos `benchmark` e `bench_busca`.
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import likes
+from .instrumentation import Medicao, percentil
+from .models import Carro, CarroImagem, Critica
+
+PALAVRAS = (
+    "motor câmbio suspensão freio consumo desempenho estrada cidade conforto "
+    "acabamento ruído potência torque direção banco porta-malas econômico "
+    "esportivo clássico confiável barulhento macio firme rápido lento bonito "
+    "feio caro barato manutenção peça oficina viagem família pista"
+).split()
+
+
+class GeradorDeDados:
+    """
+    Gera dados de forma determinística (mesma seed → mesmos dados).
+    Os métodos podem ser chamados de novo para crescer a base aos poucos.
+    """
+
+    def __init__(self, seed=42, lote=10_000, prefixo="bench"):
+        self.rng = random.Random(seed)
+        self.lote = lote
+        self.prefixo = prefixo
+        self.usuarios = []
+        self.carros = []
+        self.criticas_ids = []
+        # vocabulário de cauda longa: palavras comuns + milhares de termos raros
+        self.raras = [f"{self.rng.choice(PALAVRAS)[:4]}x{i}" for i in range(20_000)]
+
+    def gerar_usuarios(self, n, senha=None):
+        """Sem `senha`, a senha é inutilizável; com ela, o hash é calculado uma vez só."""
+        User = get_user_model()
+        inicio = len(self.usuarios)
+        hash_senha = make_password(senha) if senha is not None else "!"
+        novos = [
+            User(
+                username=f"{self.prefixo}_{i}",
+                email=f"{self.prefixo}_{i}@example.com",
+                password=hash_senha,
+            )
+            for i in range(inicio, inicio + n)
+        ]
+        self.usuarios += User.objects.bulk_create(novos, batch_size=self.lote)
+        return self.usuarios[inicio:]
+
+    def gerar_carros(self, n, imagens_por_carro=0):
+        inicio = len(self.carros)
+        novos = Carro.objects.bulk_create([
+            Carro(marca=f"Marca{i % 40}", modelo=f"Modelo{i}", ano=1960 + i % 60)
+            for i in range(inicio, inicio + n)
+        ], batch_size=self.lote)
+        tipos = [tipo for tipo, _ in CarroImagem.TIPO_CHOICES][:imagens_por_carro]
+        imagens = [
+            CarroImagem(carro=carro, tipo=tipo, foto=f"carros/{self.prefixo}_{carro.pk}_{tipo}.jpg")
+            for carro in novos for tipo in tipos
+        ]
+        for imagem in imagens:       # bulk_create não chama save()
+            imagem.atualizar_urls()
+        CarroImagem.objects.bulk_create(imagens, batch_size=self.lote)
+        self.carros += novos
+        return novos
+
+    def gerar_criticas(self, n):
+        if not self.usuarios:
+            self.gerar_usuarios(1)
+        restantes = n
+        while restantes > 0:
+            tamanho = min(self.lote, restantes)
+            criadas = Critica.objects.bulk_create([
+                Critica(
+                    usuario=self.rng.choice(self.usuarios),
+                    carro=self.rng.choice(self.carros),
+                    avaliacao=self.rng.randint(1, 5),
+                    texto=self.texto(),
+                )
+                for _ in range(tamanho)
+            ])
+            self.criticas_ids += [c.pk for c in criadas]
+            restantes -= tamanho
+
+    def gerar_likes(self, criticas_ids, media_por_critica):
+        """~`media_por_critica` likes por crítica, de usuários aleatórios."""
+        Curtida = likes.Curtida
+        ids = list(criticas_ids)
+        for i in range(0, len(ids), self.lote):
+            fatia = ids[i:i + self.lote]
+            pares = {
+                (critica_id, self.rng.choice(self.usuarios).pk)
+                for critica_id in fatia
+                for _ in range(self._quantos(media_por_critica))
+            }
+            Curtida.objects.bulk_create(
+                [Curtida(critica_id=c, user_id=u) for c, u in pares],
+                ignore_conflicts=True,
+            )
+            likes.recontar(fatia)       # bulk_create na M2M não dispara m2m_changed
+
+    def _quantos(self, media):
+        inteiro = int(media)
+        return inteiro + (self.rng.random() < media - inteiro)
+
+    def texto(self):
+        palavras = self.rng.choices(PALAVRAS, k=self.rng.randint(8, 60))
+        palavras += self.rng.choices(self.raras, k=self.rng.randint(1, 4))
+        self.rng.shuffle(palavras)
+        return " ".join(palavras)
+
+
+# --------------------------------------------------
+# Cenários
+# --------------------------------------------------
+def cliente_autenticado(user):
+    cliente = APIClient()
+    cliente.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return cliente
+
+
+def cenarios(dados, rng):
+    """
+    {nome: função(i) -> (método, url)}. Cada chamada é uma requisição;
+    like_unlike alterna like e unlike na mesma crítica.
+    """
+    def like_unlike(i):
+        if i % 2 == 0:
+            like_unlike.alvo = rng.choice(dados.criticas_ids)
+            return "post", f"/api/reviews/{like_unlike.alvo}/like/"
+        return "post", f"/api/reviews/{like_unlike.alvo}/unlike/"
+
+    return {
+        "carros": lambda i: ("get", "/api/cars/"),
+        "carros_cursor": lambda i: ("get", "/api/cars/?cursor="),
+        "top": lambda i: ("get", "/api/cars/top/?n=10"),
+        "criticas": lambda i: ("get", "/api/reviews/"),
+        "minhas_criticas": lambda i: ("get", "/api/reviews/?my=true"),
+        "busca": lambda i: ("get", f"/api/reviews/?search={rng.choice(PALAVRAS)}"),
+        "like_unlike": like_unlike,
+    }
+
+
+def cenarios_de_login(dados, senha, rng):
+    """Login (POST /api/token/) de um usuário sorteado, pelo username ou pelo e-mail."""
+    def login(campo):
+        def requisicao(i):
+            usuario = rng.choice(dados.usuarios)
+            login = usuario.username if campo == "username" else usuario.email.upper()
+            return "post", "/api/token/", {"username": login, "password": senha}
+        return requisicao
+
+    return {
+        "login_username": login("username"),
+        "login_email": login("email"),
+    }
+
+
+def executar_cenario(cliente, requisicao, iteracoes, aquecimento=0):
+    """
+    Roda `aquecimento + iteracoes` requisições em sequência e resume as
+    `iteracoes` medidas. RPS = requisições / tempo somado (um cliente).
+    Os callbacks de on_commit da requisição rodam dentro da medida.
+    `requisicao(i)` devolve (método, url) ou (método, url, corpo JSON).
+    """
+    latencias, queries = [], []
+    for i in range(aquecimento + iteracoes):
+        metodo, url, *corpo = requisicao(i)    # (método, url) ou (método, url, dados)
+        medicao = Medicao()
+        with connection.execute_wrapper(medicao):
+            inicio = time.perf_counter()
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                if corpo:
+                    resposta = getattr(cliente, metodo)(url, corpo[0], format="json")
+                else:
+                    resposta = getattr(cliente, metodo)(url)
+            duracao = (time.perf_counter() - inicio) * 1000
+        if resposta.status_code >= 400:
+            raise RuntimeError(f"{metodo.upper()} {url} → {resposta.status_code}")
+        if i >= aquecimento:
+            latencias.append(duracao)
+            queries.append(medicao.queries)
+
+    latencias.sort()
+    return {
+        "requisicoes": iteracoes,
+        "p50_ms": round(percentil(latencias, 50), 2),
+        "p99_ms": round(percentil(latencias, 99), 2),
+        "media_ms": round(sum(latencias) / iteracoes, 2),
+        "rps": round(iteracoes / (sum(latencias) / 1000), 1),
+        "queries_media": round(sum(queries) / iteracoes, 2),
+        "queries_max": max(queries),
+    }
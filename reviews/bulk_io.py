@@ -0,0 +1,272 @@
+# reviews/bulk_io.py
+"""
+Importação e exportação em massa de carros e críticas.
+
+Formato (JSON Lines ou CSV), um registro por linha:
+
+    marca, modelo, ano, usuario, avaliacao, texto, criado_em
+
+`usuario` é o username (precisa existir). Registros sem `avaliacao`/`texto`
+só garantem o carro. `criado_em` (ISO 8601) é opcional; sem fuso, vale o
+do projeto (TIME_ZONE).
+
+Tudo é streaming: a leitura processa lotes de `lote` registros (carros com
+bulk_create num savepoint, repetido sem os que outro import criou no meio;
+críticas com bulk_create) e a exportação percorre o banco com iterator(),
+sem montar objetos de modelo. A memória fica limitada ao lote (+ o mapa de
+carros).
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Carro, Critica
+
+CAMPOS = ["marca", "modelo", "ano", "usuario", "avaliacao", "texto", "criado_em"]
+FORMATOS = ("jsonl", "csv")
+MAX_ERROS_LISTADOS = 50
+
+
+class ErroDeRegistro(ValueError):
+    pass
+
+
+def detectar_formato(nome, padrao="jsonl"):
+    nome = (nome or "").lower()
+    if nome.endswith(".csv"):
+        return "csv"
+    if nome.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return padrao
+
+
+# --------------------------------------------------
+# Leitura
+# --------------------------------------------------
+def ler_registros(arquivo, formato):
+    """Gera (nº da linha, dict) de um arquivo texto, sem carregá-lo inteiro."""
+    if formato == "csv":
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro
+        return
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            registro = None
+        if not isinstance(registro, dict):
+            yield numero, ErroDeRegistro("JSON inválido")
+            continue
+        yield numero, registro
+
+
+def _texto(registro, campo):
+    valor = registro.get(campo)
+    return "" if valor is None else str(valor).strip()
+
+
+def _validar(registro):
+    """Normaliza um registro: (chave do carro, dados da crítica ou None)."""
+    marca, modelo = _texto(registro, "marca"), _texto(registro, "modelo")
+    if not marca or not modelo:
+        raise ErroDeRegistro("marca e modelo são obrigatórios")
+    try:
+        ano = int(_texto(registro, "ano"))
+    except ValueError:
+        raise ErroDeRegistro("ano inválido")
+    carro = (marca[:40], modelo[:40], ano)
+
+    if not _texto(registro, "avaliacao") and not _texto(registro, "texto"):
+        return carro, None
+
+    try:
+        avaliacao = int(_texto(registro, "avaliacao"))
+    except ValueError:
+        raise ErroDeRegistro("avaliação inválida")
+    if not 1 <= avaliacao <= 5:
+        raise ErroDeRegistro("a avaliação deve ser entre 1 e 5")
+    texto = _texto(registro, "texto")
+    if not texto:
+        raise ErroDeRegistro("texto é obrigatório")
+    usuario = _texto(registro, "usuario")
+    if not usuario:
+        raise ErroDeRegistro("usuario é obrigatório")
+    criado_em = None
+    if _texto(registro, "criado_em"):
+        try:
+            criado_em = parse_datetime(_texto(registro, "criado_em"))
+        except ValueError:          # bem formatado, mas fora do calendário
+            criado_em = None
+        if criado_em is None:
+            raise ErroDeRegistro("criado_em inválido")
+        if timezone.is_naive(criado_em):
+            criado_em = timezone.make_aware(criado_em, timezone.get_current_timezone())
+    return carro, {
+        "usuario": usuario, "avaliacao": avaliacao,
+        "texto": texto[:2_000], "criado_em": criado_em,
+    }
+
+
+class Importacao:
+    """Acumula o resultado enquanto os lotes são gravados."""
+
+    def __init__(self, lote=1_000):
+        self.lote = lote
+        self.carros_criados = 0
+        self.criticas_criadas = 0
+        self.linhas = 0
+        self.total_erros = 0
+        self.erros = []
+        self._carros = {}          # (marca, modelo, ano) → id
+        self._usuarios = {}        # username → id
+
+    def resumo(self):
+        return {
+            "linhas": self.linhas,
+            "carros_criados": self.carros_criados,
+            "criticas_criadas": self.criticas_criadas,
+            "total_erros": self.total_erros,
+            "erros": self.erros,
+        }
+
+    def _erro(self, numero, mensagem):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_LISTADOS:
+            self.erros.append({"linha": numero, "erro": mensagem})
+
+    def executar(self, registros):
+        registros = iter(registros)
+        while True:
+            lote = list(islice(registros, self.lote))
+            if not lote:
+                return self.resumo()
+            self.linhas += len(lote)
+            with transaction.atomic():
+                self._gravar_lote(lote)
+
+    def _gravar_lote(self, lote):
+        validos = []
+        for numero, registro in lote:
+            try:
+                if isinstance(registro, ErroDeRegistro):
+                    raise registro
+                validos.append((numero, *_validar(registro)))
+            except ErroDeRegistro as erro:
+                self._erro(numero, str(erro))
+
+        self._resolver_carros({carro for _, carro, _ in validos})
+        self._resolver_usuarios({c["usuario"] for _, _, c in validos if c})
+
+        criticas = []
+        for numero, carro, dados in validos:
+            if dados is None:
+                continue
+            usuario_id = self._usuarios.get(dados["usuario"])
+            if usuario_id is None:
+                self._erro(numero, f"usuário {dados['usuario']!r} não existe")
+                continue
+            critica = Critica(
+                usuario_id=usuario_id, carro_id=self._carros[carro],
+                avaliacao=dados["avaliacao"], texto=dados["texto"],
+            )
+            if dados["criado_em"] is not None:
+                critica.criado_em = dados["criado_em"]
+            criticas.append(critica)
+        if not criticas:
+            return
+
+        # criado_em já vai no INSERT: um único recálculo de agregados,
+        # tendências e feed por lote (CriticaQuerySet.bulk_create)
+        Critica.objects.bulk_create(criticas)
+        self.criticas_criadas += len(criticas)
+
+    def _resolver_carros(self, chaves):
+        faltando = self._buscar_carros(chaves - self._carros.keys())
+        while faltando:
+            try:
+                with transaction.atomic():
+                    Carro.objects.bulk_create([Carro(marca=m, modelo=mo, ano=a) for m, mo, a in faltando])
+            except IntegrityError:
+                # unique_together: outro import criou algum no meio; relê e tenta
+                # só os que ainda faltam, para contar apenas os inseridos aqui
+                faltando = self._buscar_carros(faltando)
+                continue
+            self.carros_criados += len(faltando)
+            self._buscar_carros(faltando)
+            return
+
+    def _buscar_carros(self, chaves):
+        """Preenche o mapa com as chaves que já existem; devolve as que faltam."""
+        if not chaves:
+            return set()
+        existentes = Carro.objects.filter(
+            marca__in={m for m, _, _ in chaves},
+            modelo__in={mo for _, mo, _ in chaves},
+            ano__in={a for _, _, a in chaves},
+        ).values_list("marca", "modelo", "ano", "id")
+        for marca, modelo, ano, pk in existentes:
+            self._carros[(marca, modelo, ano)] = pk
+        return chaves - self._carros.keys()
+
+    def _resolver_usuarios(self, nomes):
+        novos = nomes - self._usuarios.keys()
+        if novos:
+            self._usuarios.update(
+                get_user_model().objects.filter(username__in=novos).values_list("username", "id")
+            )
+
+
+def importar(arquivo, formato, lote=1_000):
+    """Importa de um arquivo texto; devolve o resumo (contagens e erros)."""
+    return Importacao(lote=lote).executar(ler_registros(arquivo, formato))
+
+
+# --------------------------------------------------
+# Exportação
+# --------------------------------------------------
+def _linhas_do_banco(queryset, chunk_size):
+    colunas = (
+        "carro__marca", "carro__modelo", "carro__ano", "usuario__username",
+        "avaliacao", "texto", "criado_em",
+    )
+    linhas = queryset.order_by("pk").values_list(*colunas).iterator(chunk_size=chunk_size)
+    for marca, modelo, ano, usuario, avaliacao, texto, criado_em in linhas:
+        yield [marca, modelo, ano, usuario, avaliacao, texto, criado_em.isoformat()]
+
+
+def exportar(queryset=None, formato="jsonl", chunk_size=2_000):
+    """Gera o arquivo em pedaços de texto (para StreamingHttpResponse ou stdout)."""
+    if queryset is None:
+        queryset = Critica.objects.all()
+    linhas = _linhas_do_banco(queryset, chunk_size)
+
+    if formato == "csv":
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(CAMPOS)
+        for i, linha in enumerate(linhas, start=1):
+            escritor.writerow(linha)
+            if i % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    pedaco = []
+    for linha in linhas:
+        pedaco.append(json.dumps(dict(zip(CAMPOS, linha)), ensure_ascii=False) + "\n")
+        if len(pedaco) == 500:
+            yield "".join(pedaco)
+            pedaco = []
+    if pedaco:
+        yield "".join(pedaco)
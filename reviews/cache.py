@@ -0,0 +1,79 @@
+# reviews/cache.py
+"""
+Chaves versionadas no cache do Django.
+
+Cada namespace ("facetas", ...) tem um contador de versão; os dados são
+gravados sob `<namespace>:<versão>` e invalidar = trocar a versão. Não há
+varredura nem delete de chaves.
+
+A troca de versão só é vista por todos os workers com um cache
+compartilhado (Redis, via REDIS_URL). Com LocMem cada processo tem o seu
+contador: a invalidação feita num worker não chega aos outros, então os
+dados gravados sob essas chaves usam `ttl()`, que limita a validade a
+CACHE_TTL_LOCAL segundos.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+PREFIXO = "speedgarage"
+
+
+def compartilhado():
+    """O cache default é o mesmo para todos os workers?"""
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def ttl(timeout):
+    """`timeout` com cache compartilhado; com LocMem, no máximo CACHE_TTL_LOCAL."""
+    if compartilhado():
+        return timeout
+    return min(timeout, settings.CACHE_TTL_LOCAL)
+
+
+def _chave_versao(namespace):
+    return f"{PREFIXO}:{namespace}:versao"
+
+
+def versao(namespace):
+    chave = _chave_versao(namespace)
+    atual = cache.get(chave)
+    if atual is None:
+        # valor inicial baseado no relógio: não reaproveita versões antigas
+        # se o contador tiver sido despejado do cache
+        cache.add(chave, time.time_ns(), timeout=None)
+        atual = cache.get(chave)
+    return atual
+
+
+def invalidar(namespace):
+    try:
+        cache.incr(_chave_versao(namespace))
+    except ValueError:          # contador ainda não existe
+        versao(namespace)
+
+
+def chave(namespace, *partes):
+    return ":".join([PREFIXO, namespace, str(versao(namespace)), *map(str, partes)])
+
+
+def resposta_condicional(request, etag, modificado_em=None):
+    """
+    304 se o cliente já tem esta versão (If-None-Match / If-Modified-Since),
+    senão None. `request` pode ser o Request do DRF.
+    """
+    ultima = int(modificado_em.timestamp()) if modificado_em else None
+    return get_conditional_response(request, etag=etag, last_modified=ultima)
+
+
+def aplicar_validadores(response, etag, modificado_em=None):
+    response["ETag"] = etag
+    if modificado_em:
+        response["Last-Modified"] = http_date(modificado_em.timestamp())
+    # o cliente pode guardar, mas precisa revalidar a cada uso
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
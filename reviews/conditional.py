@@ -0,0 +1,133 @@
+# reviews/conditional.py
+"""
+GET condicional (ETag / If-None-Match) para list/retrieve dos ViewSets.
+
+O validador sai de dados baratos, sem serializar nada:
+  • lista   → COUNT(*) e MAX(atualizado_em) do queryset já filtrado, mais os
+              carimbos de `carimbos_relacionados()` – uma única query, que
+              ainda substitui o COUNT da paginação limit/offset;
+  • lista com ?cursor= (KeysetPagination) → nada de varrer o queryset: a
+              página é buscada primeiro e o validador sai das linhas dela
+              (ids, MAX(atualizado_em), cursor seguinte) e dos carimbos
+              relacionados, anotados na mesma query; só serializa sem 304;
+  • detalhe → atualizado_em do objeto (e dos relacionados), lido sem os
+              prefetches; estes só rodam se a resposta for mesmo montada.
+Entram também o usuário (liked_by_me) e os query params.
+
+`atualizado_em` é auto_now e os QuerySets de Carro/Critica também o
+avançam em update() (agregados, likes, imagens...). Exclusões mudam o
+COUNT. Não enviamos Last-Modified: com resolução de segundos e sem ver
+exclusões, um If-Modified-Since poderia responder 304 indevidamente.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Subquery
+from django.db.models.query import prefetch_related_objects
+from rest_framework.response import Response
+
+from .cache import resposta_condicional
+from .pagination import KeysetPagination
+
+
+class GetCondicionalMixin:
+    campo_atualizacao = "atualizado_em"
+
+    def carimbos_relacionados(self):
+        """{alias: Subquery} de carimbos globais de outras tabelas (lista)."""
+        return {}
+
+    def carimbos_do_objeto(self, obj):
+        """Carimbos que mudam a representação de um objeto (detalhe)."""
+        return [getattr(obj, self.campo_atualizacao)]
+
+    def gerar_etag(self, request, *partes):
+        params = sorted(
+            (nome, valor)
+            for nome in request.query_params
+            for valor in request.query_params.getlist(nome)
+        )
+        bruto = repr((self.basename, self.action, request.user.pk, params, partes))
+        return 'W/"%s"' % hashlib.md5(bruto.encode()).hexdigest()
+
+    # --------------------------------------------------
+    # list / retrieve
+    # --------------------------------------------------
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self._paginacao_keyset(request):
+            return self._list_keyset(request, queryset)
+        carimbos = queryset.order_by().aggregate(
+            total=Count("pk"),
+            ultimo=Max(self.campo_atualizacao),
+            **{alias: Max(sub) for alias, sub in self.carimbos_relacionados().items()},
+        )
+        etag = self.gerar_etag(request, *sorted(carimbos.items()))
+        nao_modificado = resposta_condicional(request, etag)
+        if nao_modificado is not None:
+            nao_modificado["ETag"] = etag
+            return nao_modificado
+
+        self.total_conhecido = carimbos["total"]    # lido pela paginação
+        response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+    def _paginacao_keyset(self, request):
+        paginador = self.paginator
+        if isinstance(paginador, KeysetPagination):
+            return True
+        keyset_class = getattr(paginador, "keyset_class", None)
+        return keyset_class is not None and keyset_class.cursor_query_param in request.query_params
+
+    def _list_keyset(self, request, queryset):
+        relacionados = self.carimbos_relacionados()
+        queryset = queryset.annotate(**{f"_carimbo_{alias}": sub for alias, sub in relacionados.items()})
+        pagina = self.paginate_queryset(queryset)
+        keyset = getattr(self.paginator, "keyset", None) or self.paginator
+
+        etag = self.gerar_etag(
+            request,
+            [obj.pk for obj in pagina],
+            max((getattr(obj, self.campo_atualizacao) for obj in pagina), default=None),
+            keyset.next_values,
+            sorted((alias, getattr(pagina[0], f"_carimbo_{alias}")) for alias in relacionados) if pagina else [],
+        )
+        nao_modificado = resposta_condicional(request, etag)
+        if nao_modificado is not None:
+            nao_modificado["ETag"] = etag
+            return nao_modificado
+
+        serializer = self.get_serializer(pagina, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        self._adiar_prefetch = True
+        try:
+            instancia = self.get_object()
+        finally:
+            self._adiar_prefetch = False
+
+        etag = self.gerar_etag(request, *self.carimbos_do_objeto(instancia))
+        nao_modificado = resposta_condicional(request, etag)
+        if nao_modificado is not None:
+            nao_modificado["ETag"] = etag
+            return nao_modificado
+
+        prefetch_related_objects([instancia], *self._prefetch_adiado)
+        response = Response(self.get_serializer(instancia).data)
+        response["ETag"] = etag
+        return response
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, "_adiar_prefetch", False):
+            self._prefetch_adiado = queryset._prefetch_related_lookups
+            queryset = queryset.prefetch_related(None)
+        return queryset
+
+
+def carimbo_mais_recente(queryset, campo="atualizado_em"):
+    """Subquery com o maior `campo` da tabela inteira (usa o índice do campo)."""
+    return Subquery(queryset.order_by(f"-{campo}").values(campo)[:1])
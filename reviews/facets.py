@@ -0,0 +1,54 @@
+# reviews/facets.py
+"""
+Árvore de facetas do catálogo (marca → modelo → anos).
+
+Montada com um único SELECT e guardada no cache do Django sob chave
+versionada; sinais de Carro (save/delete) e os caminhos em massa de
+CarroQuerySet trocam a versão. Com LocMem a troca só vale no worker que
+a fez; nos demais a árvore expira em CACHE_TTL_LOCAL segundos.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import cache as cache_versionado
+from .models import Carro
+
+NAMESPACE = "facetas"
+TIMEOUT = 60 * 60 * 24      # com Redis a invalidação é explícita; o TTL é só uma rede de segurança
+
+
+def arvore_de_facetas():
+    """{"arvore": {marca: {modelo: [anos desc]}}, "etag": str, "modificado_em": datetime}"""
+    chave = cache_versionado.chave(NAMESPACE)
+    dados = cache.get(chave)
+    if dados is None:
+        dados = _montar()
+        cache.set(chave, dados, cache_versionado.ttl(TIMEOUT))
+    return dados
+
+
+def invalidar_facetas():
+    cache_versionado.invalidar(NAMESPACE)
+
+
+def _montar():
+    arvore = {}
+    linhas = (
+        Carro.objects
+        .order_by("marca", "modelo", "-ano")
+        .values_list("marca", "modelo", "ano")
+    )
+    for marca, modelo, ano in linhas:
+        anos = arvore.setdefault(marca, {}).setdefault(modelo, [])
+        if not anos or anos[-1] != ano:
+            anos.append(ano)
+
+    conteudo = json.dumps(arvore, sort_keys=True).encode()
+    return {
+        "arvore": arvore,
+        "etag": '"%s"' % hashlib.md5(conteudo).hexdigest(),
+        "modificado_em": timezone.now(),
+    }
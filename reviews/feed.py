@@ -0,0 +1,191 @@
+# reviews/feed.py
+"""
+Feed por usuário (/api/feed/) com fan-out na escrita.
+
+O feed de um usuário traz as críticas (de outros autores) sobre os carros
+pelos quais ele se interessa:
+
+  * carros que ele criticou;
+  * carros de críticas que ele curtiu;
+  * carros das marcas que ele segue (MarcaSeguida).
+
+Em vez de montar isso na leitura (três subconsultas + joins a cada página),
+cada crítica nova é copiada para a timeline (ItemFeed) de cada interessado
+e a leitura vira um range scan em (usuario, -criado_em, -id).
+
+Quando o interesse muda, a timeline é corrigida na hora:
+
+  * interesse novo (crítica, like, marca seguida) → `incluir_carros` traz
+    as FEED_BACKFILL críticas mais recentes de cada carro;
+  * interesse perdido (crítica excluída, like desfeito, marca deixada)
+    → `revisar` apaga os itens dos carros que não têm mais motivo.
+
+`reconstruir` refaz tudo a partir das tabelas de origem (comando
+`reconstruir_feed`): use depois de trocar a marca de carros ou o carro de
+críticas em massa (QuerySet.update), caminhos que não passam por aqui.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import Carro, Critica, ItemFeed, MarcaSeguida
+
+Curtida = Critica.liked_users.through
+
+LOTE = 1_000
+
+
+def _backfill():
+    return getattr(settings, "FEED_BACKFILL", 200)
+
+
+def _gravar(itens):
+    ItemFeed.objects.bulk_create(itens, batch_size=LOTE, ignore_conflicts=True)
+
+
+def _item(usuario_id, critica):
+    return ItemFeed(
+        usuario_id=usuario_id, critica_id=critica.pk,
+        carro_id=critica.carro_id, criado_em=critica.criado_em,
+    )
+
+
+# --------------------------------------------------
+# Quem se interessa por quê
+# --------------------------------------------------
+def interessados(carros):
+    """{carro_id: ids dos usuários cujo feed recebe as críticas do carro}."""
+    por_carro = defaultdict(set)
+    ids = [carro.pk for carro in carros]
+    pares = (
+        Critica.objects.filter(carro_id__in=ids).order_by().values_list("carro_id", "usuario_id")
+        .union(Curtida.objects.filter(critica__carro_id__in=ids).values_list("critica__carro_id", "user_id"))
+    )
+    for carro_id, usuario_id in pares:
+        por_carro[carro_id].add(usuario_id)
+    seguidores = defaultdict(set)
+    for marca, usuario_id in MarcaSeguida.objects.filter(
+        marca__in={carro.marca for carro in carros}
+    ).values_list("marca", "usuario_id"):
+        seguidores[marca].add(usuario_id)
+    for carro in carros:
+        por_carro[carro.pk] |= seguidores[carro.marca]
+    return por_carro
+
+
+def carros_de_interesse(usuario_id, carro_ids=None):
+    """Carros (dentre `carro_ids`, ou todos) que interessam ao usuário."""
+    criticados = Critica.objects.filter(usuario_id=usuario_id)
+    curtidos = Curtida.objects.filter(user_id=usuario_id)
+    marcas = MarcaSeguida.objects.filter(usuario_id=usuario_id).values("marca")
+    seguidos = Carro.objects.filter(marca__in=marcas)
+    if carro_ids is not None:
+        criticados = criticados.filter(carro_id__in=carro_ids)
+        curtidos = curtidos.filter(critica__carro_id__in=carro_ids)
+        seguidos = seguidos.filter(pk__in=carro_ids)
+    return (
+        set(criticados.values_list("carro_id", flat=True))
+        | set(curtidos.values_list("critica__carro_id", flat=True))
+        | set(seguidos.values_list("pk", flat=True))
+    )
+
+
+# --------------------------------------------------
+# Escritas
+# --------------------------------------------------
+def distribuir(criticas):
+    """Fan-out: copia críticas novas para a timeline dos interessados."""
+    por_carro = defaultdict(list)
+    for critica in criticas:
+        por_carro[critica.carro_id].append(critica)
+    carros = Carro.objects.filter(pk__in=list(por_carro)).only("pk", "marca")
+    itens = []
+    for carro_id, usuarios in interessados(list(carros)).items():
+        for usuario_id in usuarios:
+            itens += [_item(usuario_id, c) for c in por_carro[carro_id] if c.usuario_id != usuario_id]
+    _gravar(itens)
+
+
+def incluir_carros(usuario_id, carro_ids):
+    """
+    Interesse novo: traz as críticas mais recentes de cada carro para o feed.
+    Carros que já têm itens no feed do usuário (interesse anterior) são pulados.
+    """
+    carro_ids = set(carro_ids)
+    if not carro_ids:
+        return
+    presentes = set(
+        ItemFeed.objects.filter(usuario_id=usuario_id, carro_id__in=carro_ids)
+        .values_list("carro_id", flat=True).distinct()
+    )
+    novos = carro_ids - presentes
+    if not novos:
+        return
+    # as FEED_BACKFILL mais recentes de cada carro, numa query só
+    recentes = (
+        Critica.objects.filter(carro_id__in=novos).exclude(usuario_id=usuario_id)
+        .annotate(posicao=Window(
+            RowNumber(), partition_by=F("carro_id"), order_by=[F("criado_em").desc(), F("id").desc()],
+        ))
+        .filter(posicao__lte=_backfill())
+        .only("pk", "carro_id", "criado_em")
+    )
+    _gravar([_item(usuario_id, critica) for critica in recentes])
+
+
+def incluir_marca(usuario_id, marca):
+    incluir_carros(usuario_id, Carro.objects.filter(marca=marca).values_list("pk", flat=True))
+
+
+def revisar(usuario_id, carro_ids):
+    """Interesse talvez perdido: remove os itens dos carros que não interessam mais."""
+    carro_ids = set(carro_ids)
+    if not carro_ids:
+        return
+    sem_motivo = carro_ids - carros_de_interesse(usuario_id, carro_ids)
+    if sem_motivo:
+        ItemFeed.objects.filter(usuario_id=usuario_id, carro_id__in=sem_motivo).delete()
+
+
+def mover(critica):
+    """A crítica trocou de carro: redistribui para os interessados no novo."""
+    ItemFeed.objects.filter(critica_id=critica.pk).delete()
+    distribuir([critica])
+
+
+def sincronizar_datas(critica_ids):
+    """criado_em das críticas mudou (importação com data): acompanha a cópia."""
+    ItemFeed.objects.filter(critica_id__in=critica_ids).update(
+        criado_em=Subquery(Critica.objects.filter(pk=OuterRef("critica_id")).values("criado_em")[:1]),
+    )
+
+
+def reconstruir(usuario_ids):
+    """Refaz do zero a timeline dos usuários."""
+    for usuario_id in usuario_ids:
+        ItemFeed.objects.filter(usuario_id=usuario_id).delete()
+        incluir_carros(usuario_id, carros_de_interesse(usuario_id))
+
+
+def usuarios_com_interesse():
+    """Ids de quem tem algum motivo para ter feed (para reconstruir todos)."""
+    return (
+        set(Critica.objects.values_list("usuario_id", flat=True).distinct())
+        | set(Curtida.objects.values_list("user_id", flat=True).distinct())
+        | set(MarcaSeguida.objects.values_list("usuario_id", flat=True).distinct())
+    )
+
+
+# --------------------------------------------------
+# Leitura
+# --------------------------------------------------
+def timeline(usuario):
+    """Itens do feed já na ordem do índice, com a crítica e o que ela exibe."""
+    return (
+        ItemFeed.objects.filter(usuario_id=usuario.pk)
+        .select_related("critica__carro", "critica__usuario")
+        .prefetch_related("critica__carro__imagens")
+        .order_by("-criado_em", "-id")
+    )
@@ -0,0 +1,142 @@
+# reviews/field_selection.py
+"""
+Seleção de campos nas leituras (list/retrieve):
+
+    ?fields=id,avaliacao      só estes campos
+    ?omit=texto,carro_imagem  todos (ou os do resumo/fields) menos estes
+    ?resumo=true              `campos_resumo` da view, com o texto truncado
+
+Não é só um filtro na saída: a view traduz os campos pedidos nas colunas
+(.only()), joins (select_related) e prefetches de que eles dependem, e o
+texto do resumo já vem cortado do banco (Substr). Sem nenhum desses
+parâmetros, queryset e resposta ficam exatamente como antes.
+
+Os parâmetros entram na ETag (todos os query params entram) e na chave do
+cache de respostas anônimas (response_cache.CacheAnonimoMixin).
+"""
+from django.db.models.functions import Substr
+from rest_framework.exceptions import ValidationError
+
+PARAMS = ("fields", "omit", "resumo")
+RETICENCIAS = "…"
+
+
+def nomes(valor):
+    return [nome.strip() for nome in valor.split(",") if nome.strip()]
+
+
+def truncar(texto, limite):
+    """`texto` com no máximo `limite` caracteres, marcando o corte."""
+    if len(texto) <= limite:
+        return texto
+    return texto[:limite - 1].rstrip() + RETICENCIAS
+
+
+class SelecaoDeCamposMixin:
+    """
+    Para ViewSets cujo serializer usa CamposDinamicosMixin.
+
+    colunas_por_campo:  campo do serializer → colunas de que depende
+                        (padrão: a coluna de mesmo nome);
+    prefetch_por_campo: campo → prefetches de que depende;
+    campos_resumo:      campos do ?resumo=true;
+    texto_resumo:       (campo, nº de caracteres) cortado no banco no resumo;
+    colunas_obrigatorias: lidas sempre (ex.: carimbos da ETag do detalhe).
+    """
+    campos_resumo = None
+    colunas_obrigatorias = ()
+    colunas_por_campo = {}
+    prefetch_por_campo = {}
+    texto_resumo = None
+
+    def campos_disponiveis(self):
+        campos = self.get_serializer_class()().fields
+        return [nome for nome, campo in campos.items() if not campo.write_only]
+
+    def campos_selecionados(self):
+        """Campos pedidos (lista, na ordem do serializer) ou None para todos."""
+        if hasattr(self, "_campos_selecionados"):
+            return self._campos_selecionados
+        self._campos_selecionados = campos = self._ler_campos()
+        return campos
+
+    def modo_resumo(self):
+        return (
+            self.request.method == "GET"
+            and self.request.query_params.get("resumo", "").lower() == "true"
+        )
+
+    def _ler_campos(self):
+        params = self.request.query_params
+        if self.request.method != "GET" or not any(nome in params for nome in PARAMS):
+            return None
+        disponiveis = self.campos_disponiveis()
+        pedidos = nomes(params["fields"]) if "fields" in params else None
+        omitidos = nomes(params.get("omit", ""))
+
+        desconhecidos = sorted((set(pedidos or []) | set(omitidos)) - set(disponiveis))
+        if desconhecidos:
+            raise ValidationError({
+                "fields": f"Campos desconhecidos: {', '.join(desconhecidos)}. "
+                          f"Disponíveis: {', '.join(disponiveis)}."
+            })
+        if pedidos is None:
+            pedidos = self.campos_resumo if self.modo_resumo() and self.campos_resumo else disponiveis
+        return [nome for nome in disponiveis if nome in pedidos and nome not in omitidos]
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        contexto["campos"] = self.campos_selecionados()
+        if self.modo_resumo() and self.texto_resumo:
+            contexto["texto_resumo"] = self.texto_resumo
+        return contexto
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.campos_selecionados()
+        if campos is None:
+            return queryset
+        return self._restringir(queryset, campos)
+
+    def _restringir(self, queryset, campos):
+        # as colunas de ordenação também: a paginação keyset lê os valores
+        colunas = {"pk", *self.colunas_obrigatorias, *(getattr(self, "ordering_fields", None) or ())}
+        for campo in campos:
+            colunas.update(self.colunas_por_campo.get(campo, [campo]))
+
+        if self.modo_resumo() and self.texto_resumo:
+            campo, limite = self.texto_resumo
+            if campo in colunas:
+                colunas.discard(campo)
+                # um caractere a mais: o serializer sabe se houve corte
+                queryset = queryset.annotate(**{f"{campo}_resumo": Substr(campo, 1, limite + 1)})
+
+        relacoes = sorted({coluna.split("__")[0] for coluna in colunas if "__" in coluna})
+        prefetches = sorted({p for campo in campos for p in self.prefetch_por_campo.get(campo, [])})
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if relacoes:
+            queryset = queryset.select_related(*relacoes)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset.only(*sorted({c for c in colunas if c != "pk"} | set(relacoes)) or ["pk"])
+
+
+class CamposDinamicosMixin:
+    """Para serializers: mantém só context["campos"] e aplica o texto do resumo."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = self.context.get("campos")
+        if campos is not None:
+            for nome in list(self.fields):
+                if nome not in campos and not self.fields[nome].write_only:
+                    self.fields.pop(nome)
+
+    def to_representation(self, instance):
+        texto_resumo = self.context.get("texto_resumo")
+        if texto_resumo:
+            campo, limite = texto_resumo
+            inicio = getattr(instance, f"{campo}_resumo", None)
+            if inicio is not None:
+                setattr(instance, campo, truncar(inicio, limite))
+        return super().to_representation(instance)
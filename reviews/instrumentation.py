@@ -0,0 +1,198 @@
+# reviews/instrumentation.py
+"""
+Instrumentação por requisição: nº de queries, tempo de banco, tempo de
+serialização e latência total.
+
+  • InstrumentacaoMiddleware mede cada requisição e devolve o resultado no
+    header `Server-Timing` (visível no DevTools), numa linha de log
+    ("reviews.instrumentacao") e no agregado por view em memória, servido
+    em /api/instrumentacao/ (só admin).
+  • SerializacaoMedidaMixin cronometra `serializer.data` (inclusive o
+    ListSerializer das listagens).
+
+Desligada (INSTRUMENTACAO = False, padrão) o middleware sai da pilha via
+MiddlewareNotUsed e as medições viram um `ContextVar.get()` sem efeito.
+O agregado é por processo: cada worker do gunicorn tem o seu.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger("reviews.instrumentacao")
+
+_medicao_atual = ContextVar("medicao_atual", default=None)
+
+
+class Medicao:
+    __slots__ = ("queries", "tempo_db", "tempo_serializer", "inicio")
+
+    def __init__(self):
+        self.queries = 0
+        self.tempo_db = 0.0
+        self.tempo_serializer = 0.0
+        self.inicio = time.perf_counter()
+
+    # assinatura de connection.execute_wrapper()
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo_db += time.perf_counter() - inicio
+            self.queries += 1
+
+
+@contextmanager
+def medir_serializacao():
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao.tempo_serializer += time.perf_counter() - inicio
+
+
+# --------------------------------------------------
+# Agregado por view
+# --------------------------------------------------
+class Estatisticas:
+    """Totais por "MÉTODO view_name" + últimas N latências para p50/p95."""
+
+    def __init__(self, amostras=500):
+        self.amostras = amostras
+        self._lock = threading.Lock()
+        self._dados = {}
+
+    def registrar(self, chave, total_ms, db_ms, serializer_ms, queries):
+        with self._lock:
+            dados = self._dados.get(chave)
+            if dados is None:
+                dados = self._dados[chave] = {
+                    "requisicoes": 0, "total_ms": 0.0, "db_ms": 0.0,
+                    "serializer_ms": 0.0, "queries": 0, "max_queries": 0,
+                    "latencias": deque(maxlen=self.amostras),
+                }
+            dados["requisicoes"] += 1
+            dados["total_ms"] += total_ms
+            dados["db_ms"] += db_ms
+            dados["serializer_ms"] += serializer_ms
+            dados["queries"] += queries
+            dados["max_queries"] = max(dados["max_queries"], queries)
+            dados["latencias"].append(total_ms)
+
+    def resumo(self):
+        with self._lock:
+            copia = {chave: {**d, "latencias": sorted(d["latencias"])}
+                     for chave, d in self._dados.items()}
+        resumo = {}
+        for chave, d in sorted(copia.items()):
+            n = d["requisicoes"]
+            resumo[chave] = {
+                "requisicoes": n,
+                "media_ms": round(d["total_ms"] / n, 2),
+                "p50_ms": round(percentil(d["latencias"], 50), 2),
+                "p95_ms": round(percentil(d["latencias"], 95), 2),
+                "db_media_ms": round(d["db_ms"] / n, 2),
+                "serializer_media_ms": round(d["serializer_ms"] / n, 2),
+                "queries_media": round(d["queries"] / n, 2),
+                "queries_max": d["max_queries"],
+            }
+        return resumo
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))
+    return ordenados[indice]
+
+
+estatisticas = Estatisticas()
+
+
+# --------------------------------------------------
+# Middleware
+# --------------------------------------------------
+class InstrumentacaoMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTACAO", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicao = Medicao()
+        token = _medicao_atual.set(medicao)
+        try:
+            with _wrappers(medicao):
+                response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+
+        total_ms = (time.perf_counter() - medicao.inicio) * 1000
+        db_ms = medicao.tempo_db * 1000
+        serializer_ms = medicao.tempo_serializer * 1000
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={db_ms:.1f};desc="{medicao.queries} queries"',
+            f"serializer;dur={serializer_ms:.1f}",
+            f"total;dur={total_ms:.1f}",
+        ])
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "<sem rota>"
+        chave = f"{request.method} {view}"
+        estatisticas.registrar(chave, total_ms, db_ms, serializer_ms, medicao.queries)
+        logger.info(
+            "%s %s total=%.1fms db=%.1fms queries=%d serializer=%.1fms",
+            chave, response.status_code, total_ms, db_ms, medicao.queries, serializer_ms,
+            extra={
+                "view": view, "metodo": request.method, "status": response.status_code,
+                "total_ms": total_ms, "db_ms": db_ms, "queries": medicao.queries,
+                "serializer_ms": serializer_ms,
+            },
+        )
+        return response
+
+
+@contextmanager
+def _wrappers(medicao):
+    with ExitStack() as pilha:
+        for conn in connections.all():
+            pilha.enter_context(conn.execute_wrapper(medicao))
+        yield
+
+
+# --------------------------------------------------
+# Serializers
+# --------------------------------------------------
+class ListSerializerMedido(serializers.ListSerializer):
+    @property
+    def data(self):
+        with medir_serializacao():
+            return super().data
+
+
+class SerializacaoMedidaMixin:
+    """
+    Mede `serializer.data`. Para listagens, declare também
+    `Meta.list_serializer_class = ListSerializerMedido`.
+    """
+
+    @property
+    def data(self):
+        with medir_serializacao():
+            return super().data
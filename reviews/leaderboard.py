@@ -0,0 +1,118 @@
+# reviews/leaderboard.py
+"""
+Ranking de carros para /api/cars/top/.
+
+Guarda no cache, por carro avaliado, (total_criticas, soma_avaliacoes) –
+montado a partir das colunas desnormalizadas de Carro, nunca de Critica.
+Cada crítica criada/alterada/removida aplica o seu delta na estrutura em
+cache depois do commit (um rollback não deixa delta para trás); os
+caminhos em massa (recalcular_avaliacoes) trocam a versão e ela é
+remontada na próxima leitura. O TTL curto limita a deriva caso dois
+processos apliquem deltas ao mesmo tempo; com LocMem, em que cada worker
+só vê os próprios deltas, ele cai para CACHE_TTL_LOCAL (cache.ttl()).
+
+A ordenação usa média bayesiana: (C·m + soma) / (m + total), em que C é a
+média global e m o peso (RANKING_PESO_BAYESIANO), para que um carro com
+uma única nota 5 não passe na frente de um com dezenas de notas altas.
+A pontuação não depende de `min_criticas`: guardamos uma única lista
+ordenada e o mínimo só filtra na leitura, então o parâmetro não cria
+variantes no cache.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import cache as cache_versionado
+from .models import Carro
+
+NAMESPACE = "ranking"
+TIMEOUT = 60 * 5
+MAX_MIN_CRITICAS = 10_000
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def _chave():
+    return cache_versionado.chave(NAMESPACE)
+
+
+def _montar():
+    carros = {
+        carro_id: [total, soma]
+        for carro_id, total, soma in Carro.objects
+        .filter(total_criticas__gt=0)
+        .order_by()
+        .values_list("id", "total_criticas", "soma_avaliacoes")
+    }
+    return {"carros": carros, "ordenados": None}     # (peso, [(carro_id, pontuação), ...])
+
+
+def _dados():
+    chave = _chave()
+    dados = cache.get(chave)
+    if dados is None:
+        dados = _montar()
+        cache.set(chave, dados, cache_versionado.ttl(TIMEOUT))
+    return dados
+
+
+def registrar_delta(carro_id, delta_total, delta_soma):
+    """Atualiza só a entrada do carro, no commit da transação atual."""
+    transaction.on_commit(lambda: _aplicar_delta(carro_id, delta_total, delta_soma))
+
+
+def _aplicar_delta(carro_id, delta_total, delta_soma):
+    # se o ranking não está em cache, nada a fazer
+    chave = _chave()
+    dados = cache.get(chave)
+    if dados is None:
+        return
+    total, soma = dados["carros"].get(carro_id, (0, 0))
+    total, soma = total + delta_total, soma + delta_soma
+    if total > 0:
+        dados["carros"][carro_id] = [total, soma]
+    else:
+        dados["carros"].pop(carro_id, None)
+    dados["ordenados"] = None
+    cache.set(chave, dados, cache_versionado.ttl(TIMEOUT))
+
+
+def invalidar_ranking():
+    cache_versionado.invalidar(NAMESPACE)
+
+
+def top(n, min_criticas=None):
+    """[(carro_id, pontuação bayesiana), ...] dos `n` melhores (n já limitado)."""
+    n = max(0, min(n, _config("RANKING_MAX_N", 50)))
+    if min_criticas is None:
+        min_criticas = _config("RANKING_MIN_CRITICAS", 1)
+    min_criticas = max(1, min(min_criticas, MAX_MIN_CRITICAS))
+    peso = _config("RANKING_PESO_BAYESIANO", 3)
+
+    dados = _dados()
+    if dados["ordenados"] is None or dados["ordenados"][0] != peso:
+        dados["ordenados"] = (peso, _ordenar(dados["carros"], peso))
+        cache.set(_chave(), dados, cache_versionado.ttl(TIMEOUT))
+    ordenados = dados["ordenados"][1]
+    if min_criticas == 1:
+        return ordenados[:n]
+    carros = dados["carros"]
+    return list(islice((item for item in ordenados if carros[item[0]][0] >= min_criticas), n))
+
+
+def _ordenar(carros, peso):
+    total_global = sum(total for total, _ in carros.values())
+    if not total_global:
+        return []
+    media_global = sum(soma for _, soma in carros.values()) / total_global
+    pontuados = [
+        (carro_id, (media_global * peso + soma) / (peso + total))
+        for carro_id, (total, soma) in carros.items()
+    ]
+    # desempate estável: mais críticas primeiro, depois id
+    pontuados.sort(key=lambda item: (-item[1], -carros[item[0]][0], item[0]))
+    return pontuados
@@ -0,0 +1,263 @@
+# reviews/likes.py
+"""
+Likes de críticas.
+
+A tabela M2M (Critica.liked_users) continua sendo a fonte da verdade;
+Critica.total_likes é o contador desnormalizado, atualizado com F() na
+mesma transação do insert/delete, com a linha da crítica travada – nada
+de COUNT na leitura. Curtir/descurtir são idempotentes e ajustam o feed
+de quem curtiu (reviews/feed.py).
+
+Com LIKES_WRITE_BEHIND=True, curtir/descurtir só gravam a intenção em
+EventoCurtida (um SELECT e um INSERT, sem travar a crítica) e respondem
+com a contagem otimista: total_likes + saldo dos eventos pendentes. Um
+flusher por processo (LIKES_FLUSH_INTERVALO) aplica os eventos em lote:
+por (usuário, crítica) vale só o último, a M2M recebe os inserts/deletes
+que mudam algo e total_likes recebe um UPDATE por lote. A fila é a própria
+tabela: eventos de um processo que morreu são aplicados pelo próximo
+flusher ou por `python manage.py aplicar_curtidas`. "Curti?"
+(ids_curtidos) já enxerga os eventos pendentes do próprio usuário.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from . import feed
+from .models import Critica, EventoCurtida
+
+logger = logging.getLogger(__name__)
+
+Curtida = Critica.liked_users.through
+
+
+def _travar(critica_id):
+    """(total_likes, carro_id) da crítica, com a linha travada."""
+    linha = (
+        Critica.objects
+        .select_for_update()
+        .filter(pk=critica_id)
+        .values_list("total_likes", "carro_id")
+        .first()
+    )
+    if linha is None:
+        raise Critica.DoesNotExist
+    return linha
+
+
+def _ajustar_feed(operacao, usuario_id, carro_id):
+    # depois do commit: o feed é derivado e não precisa segurar a trava da crítica
+    transaction.on_commit(lambda: operacao(usuario_id, [carro_id]))
+
+
+def curtir(critica_id, user):
+    """Registra o like (se ainda não existe). Devolve o total atualizado."""
+    if settings.LIKES_WRITE_BEHIND:
+        return _registrar_intencao(critica_id, user, curtir=True)
+    with transaction.atomic():
+        total, carro_id = _travar(critica_id)
+        try:
+            with transaction.atomic():
+                Curtida.objects.create(critica_id=critica_id, user_id=user.pk)
+        except IntegrityError:
+            return total                    # já curtida: nada muda
+        Critica.objects.filter(pk=critica_id).update(total_likes=F("total_likes") + 1)
+        _ajustar_feed(feed.incluir_carros, user.pk, carro_id)
+        return total + 1
+
+
+def descurtir(critica_id, user):
+    """Remove o like (se existe). Devolve o total atualizado."""
+    if settings.LIKES_WRITE_BEHIND:
+        return _registrar_intencao(critica_id, user, curtir=False)
+    with transaction.atomic():
+        total, carro_id = _travar(critica_id)
+        removidas, _ = Curtida.objects.filter(critica_id=critica_id, user_id=user.pk).delete()
+        if not removidas:
+            return total
+        Critica.objects.filter(pk=critica_id).update(total_likes=F("total_likes") - 1)
+        _ajustar_feed(feed.revisar, user.pk, carro_id)
+        return total - 1
+
+
+def _sobrepor_pendentes(curtidas, eventos):
+    """Aplica em `curtidas` os eventos (critica_id, curtir), em ordem de id."""
+    for critica_id, curtir in eventos:
+        if curtir:
+            curtidas.add(critica_id)
+        else:
+            curtidas.discard(critica_id)
+    return curtidas
+
+
+def _pendentes_do_usuario(user, critica_ids):
+    return (
+        EventoCurtida.objects
+        .filter(usuario_id=user.pk, critica_id__in=critica_ids)
+        .order_by("id").values_list("critica_id", "curtir")
+    )
+
+
+def ids_curtidos(user, critica_ids):
+    """Quais destas críticas o usuário curtiu? Uma query para a página inteira."""
+    if not user.is_authenticated or not critica_ids:
+        return set()
+    curtidas = set(
+        Curtida.objects
+        .filter(user_id=user.pk, critica_id__in=critica_ids)
+        .values_list("critica_id", flat=True)
+    )
+    if settings.LIKES_WRITE_BEHIND:
+        _sobrepor_pendentes(curtidas, _pendentes_do_usuario(user, critica_ids))
+    return curtidas
+
+
+def recontar(critica_ids):
+    """Recalcula total_likes a partir da M2M (caminhos fora deste módulo)."""
+    contagem = (
+        Curtida.objects.filter(critica_id=OuterRef("pk"))
+        .order_by().values("critica_id").annotate(n=Count("id")).values("n")
+    )
+    return Critica.objects.filter(pk__in=critica_ids).update(
+        total_likes=Coalesce(Subquery(contagem), Value(0))
+    )
+
+
+# --------------------------------------------------
+# Write-behind (LIKES_WRITE_BEHIND)
+# --------------------------------------------------
+def _registrar_intencao(critica_id, user, curtir):
+    """
+    Grava o evento se ele muda o estado do usuário (M2M + pendentes) e
+    devolve a contagem otimista. Uma leitura sem trava e um INSERT.
+    """
+    eventos = EventoCurtida.objects.filter(critica_id=OuterRef("pk")).order_by()
+    saldo = (
+        eventos.values("critica_id")
+        .annotate(saldo=Sum(Case(When(curtir=True, then=Value(1)), default=Value(-1))))
+        .values("saldo")
+    )
+    linha = (
+        Critica.objects.filter(pk=critica_id)
+        .annotate(
+            pendente=Coalesce(Subquery(saldo), Value(0)),
+            ultimo=Subquery(eventos.filter(usuario_id=user.pk).order_by("-id").values("curtir")[:1]),
+            curtida=Exists(Curtida.objects.filter(critica_id=OuterRef("pk"), user_id=user.pk)),
+        )
+        .values_list("total_likes", "pendente", "ultimo", "curtida")
+        .first()
+    )
+    if linha is None:
+        raise Critica.DoesNotExist
+    total, pendente, ultimo, curtida = linha
+    total += pendente
+    if (curtida if ultimo is None else ultimo) == curtir:
+        return total                        # idempotente: nada muda
+    EventoCurtida.objects.create(critica_id=critica_id, usuario_id=user.pk, curtir=curtir)
+    _iniciar_flusher()
+    return total + (1 if curtir else -1)
+
+
+def aplicar_pendentes(lote=None):
+    """
+    Aplica até `lote` eventos (os mais antigos) numa transação e os apaga.
+    Devolve quantos eventos foram consumidos.
+    """
+    lote = lote or settings.LIKES_FLUSH_LOTE
+    with transaction.atomic():
+        # FOR UPDATE: um segundo flusher espera este terminar e pega os seguintes
+        eventos = list(
+            EventoCurtida.objects.select_for_update().order_by("id")
+            .values_list("pk", "usuario_id", "critica_id", "curtir")[:lote]
+        )
+        if not eventos:
+            return 0
+        finais = {(usuario_id, critica_id): curtir for _, usuario_id, critica_id, curtir in eventos}
+        criticas = {critica_id for _, critica_id in finais}
+        # mesma trava do modo síncrono (_travar): a M2M lida abaixo não muda
+        # até o commit, e os saldos de total_likes batem com o que foi inserido
+        list(Critica.objects.select_for_update().filter(pk__in=criticas).order_by("pk").values_list("pk"))
+        existentes = {
+            (usuario_id, critica_id): pk
+            for pk, usuario_id, critica_id in Curtida.objects.filter(
+                critica_id__in=criticas, user_id__in={usuario_id for usuario_id, _ in finais},
+            ).values_list("pk", "user_id", "critica_id")
+        }
+        novas = [par for par, curtir in finais.items() if curtir and par not in existentes]
+        removidas = [par for par, curtir in finais.items() if not curtir and par in existentes]
+
+        Curtida.objects.bulk_create(
+            [Curtida(user_id=usuario_id, critica_id=critica_id) for usuario_id, critica_id in novas],
+            batch_size=1000,
+            ignore_conflicts=True,      # como feed._gravar: par já gravado não derruba o lote
+        )
+        if removidas:
+            Curtida.objects.filter(pk__in=[existentes[par] for par in removidas]).delete()
+
+        saldos = Counter(critica_id for _, critica_id in novas)
+        saldos.subtract(critica_id for _, critica_id in removidas)
+        saldos = {critica_id: saldo for critica_id, saldo in saldos.items() if saldo}
+        if saldos:
+            Critica.objects.filter(pk__in=saldos).update(total_likes=F("total_likes") + Case(
+                *(When(pk=critica_id, then=Value(saldo)) for critica_id, saldo in saldos.items()),
+                default=Value(0),
+            ))
+        EventoCurtida.objects.filter(pk__in=[evento[0] for evento in eventos]).delete()
+        if novas or removidas:
+            transaction.on_commit(lambda: _ajustar_feed_em_lote(novas, removidas))
+    return len(eventos)
+
+
+def _ajustar_feed_em_lote(novas, removidas):
+    carros = dict(
+        Critica.objects.filter(pk__in={c for _, c in novas + removidas}).values_list("pk", "carro_id")
+    )
+    for pares, operacao in ((novas, feed.incluir_carros), (removidas, feed.revisar)):
+        por_usuario = defaultdict(set)
+        for usuario_id, critica_id in pares:
+            if critica_id in carros:
+                por_usuario[usuario_id].add(carros[critica_id])
+        for usuario_id, carro_ids in por_usuario.items():
+            operacao(usuario_id, carro_ids)
+
+
+def drenar(lote=None):
+    """Aplica lotes até esvaziar a fila. Devolve o total de eventos."""
+    lote = lote or settings.LIKES_FLUSH_LOTE
+    total = 0
+    while True:
+        aplicados = aplicar_pendentes(lote)
+        total += aplicados
+        if aplicados < lote:
+            return total
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _iniciar_flusher():
+    """Sobe a thread do flusher deste processo no primeiro evento."""
+    global _flusher
+    if _flusher is not None or not settings.LIKES_FLUSH_THREAD:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_loop_do_flusher, name="likes-flusher", daemon=True)
+            _flusher.start()
+
+
+def _loop_do_flusher():
+    while True:
+        time.sleep(settings.LIKES_FLUSH_INTERVALO)
+        try:
+            drenar()
+        except Exception:
+            logger.exception("Falha ao aplicar eventos de curtida; nova tentativa no próximo ciclo.")
+        finally:
+            close_old_connections()
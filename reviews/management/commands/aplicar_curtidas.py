@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews import likes
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica na M2M e em total_likes os eventos de curtida pendentes "
+        "(LIKES_WRITE_BEHIND). Use no deploy, antes de desligar o modo, ou com "
+        "--continuo como flusher dedicado (LIKES_FLUSH_THREAD=False nos workers)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--continuo", action="store_true",
+            help="Não sai: drena a fila a cada LIKES_FLUSH_INTERVALO segundos.",
+        )
+
+    def handle(self, *args, **options):
+        aplicados = likes.drenar()
+        self.stdout.write(self.style.SUCCESS(f"{aplicados} evento(s) de curtida aplicado(s)."))
+        while options["continuo"]:
+            time.sleep(settings.LIKES_FLUSH_INTERVALO)
+            aplicados = likes.drenar()
+            if aplicados:
+                self.stdout.write(f"{aplicados} evento(s) de curtida aplicado(s).")
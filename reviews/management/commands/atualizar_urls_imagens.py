@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from django.utils import timezone
+
+from reviews.models import Carro, CarroImagem
+from reviews.response_cache import invalidar_respostas
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula as URLs guardadas em CarroImagem (original e variantes). "
+        "Rode depois de mudar o storage, MEDIA_URL ou a conta do Cloudinary."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500)
+
+    def handle(self, *args, **options):
+        lote, total = [], 0
+        for imagem in CarroImagem.objects.iterator(chunk_size=options["lote"]):
+            imagem.atualizar_urls()
+            lote.append(imagem)
+            if len(lote) == options["lote"]:
+                total += CarroImagem.objects.bulk_update(lote, ["url", "urls_variantes"])
+                lote = []
+        total += CarroImagem.objects.bulk_update(lote, ["url", "urls_variantes"])
+        # bulk_update não dispara sinais: ETags dos carros e cache de respostas
+        Carro.objects.filter(imagens__isnull=False).update(atualizado_em=timezone.now())
+        invalidar_respostas()
+        self.stdout.write(self.style.SUCCESS(f"URLs atualizadas em {total} imagem(ns)."))
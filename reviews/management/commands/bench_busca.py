@@ -0,0 +1,81 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from reviews.benchmark import GeradorDeDados
+from reviews.models import Critica
+from reviews.search import buscar_criticas, suporta_full_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a latência da busca icontains com a busca full-text sobre "
+        "críticas sintéticas. Roda dentro de uma transação desfeita no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--criticas", type=int, default=1_000_000)
+        parser.add_argument("--carros", type=int, default=500)
+        parser.add_argument("--repeticoes", type=int, default=5)
+        parser.add_argument("--lote", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        if not suporta_full_text():
+            self.stderr.write("Banco sem suporte a full-text; nada a comparar.")
+            return
+
+        with transaction.atomic():
+            self._gerar(opts)
+            consultas = [
+                ["desempenho"],             # termo comum
+                ["suspensao", "macio"],     # dois termos, com acento
+                ["motox123"],               # termo raro
+                ["Marca7", "oficina"],      # carro + texto
+            ]
+            for termos in consultas:
+                icontains = self._medir(lambda: self._icontains(termos), opts["repeticoes"])
+                fts = self._medir(
+                    lambda: buscar_criticas(Critica.objects.all(), termos), opts["repeticoes"]
+                )
+                self.stdout.write(
+                    f"{' '.join(termos):<20} icontains p50={icontains:8.1f} ms   "
+                    f"full-text p50={fts:8.1f} ms   ({icontains / max(fts, 1e-6):.1f}x)"
+                )
+            transaction.set_rollback(True)
+
+    def _gerar(self, opts):
+        dados = GeradorDeDados(seed=opts["seed"], lote=opts["lote"], prefixo="bench_busca")
+        dados.gerar_usuarios(1)
+        dados.gerar_carros(opts["carros"])
+        inicio = time.perf_counter()
+        dados.gerar_criticas(opts["criticas"])
+        self.stdout.write(
+            f"{opts['criticas']} críticas geradas em {time.perf_counter() - inicio:.1f}s"
+        )
+
+    @staticmethod
+    def _icontains(termos):
+        qs = Critica.objects.all()
+        for termo in termos:
+            qs = qs.filter(
+                Q(carro__marca__icontains=termo)
+                | Q(carro__modelo__icontains=termo)
+                | Q(texto__icontains=termo)
+            )
+        return qs
+
+    @staticmethod
+    def _medir(montar, repeticoes):
+        """Mediana (ms) de COUNT + primeira página de 50, como na API."""
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            qs = montar()
+            qs.count()
+            list(qs[:50])
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tempos)
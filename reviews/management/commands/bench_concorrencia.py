@@ -0,0 +1,146 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reviews.instrumentation import percentil
+
+CAMINHOS = ["cars/", "cars/top/?n=10", "cars/facetas/", "reviews/"]
+
+
+def _inteiros(valor):
+    try:
+        return [int(v) for v in valor.split(",") if v]
+    except ValueError:
+        raise CommandError(f"Lista de inteiros inválida: {valor!r}")
+
+
+class _Carga:
+    """`total` GETs em `url`, divididos entre `concorrencia` conexões keep-alive."""
+
+    def __init__(self, base, caminho, cabecalhos, total, concorrencia, timeout):
+        self.base = base
+        self.caminho = caminho
+        self.cabecalhos = cabecalhos
+        self.timeout = timeout
+        self.restantes = total
+        self.concorrencia = concorrencia
+        self.lock = threading.Lock()
+        self.latencias = []
+        self.erros = 0
+
+    def _proxima(self):
+        with self.lock:
+            if self.restantes <= 0:
+                return False
+            self.restantes -= 1
+            return True
+
+    def _cliente(self):
+        classe = http.client.HTTPSConnection if self.base.scheme == "https" else http.client.HTTPConnection
+        conexao = classe(self.base.netloc, timeout=self.timeout)
+        latencias, erros = [], 0
+        while self._proxima():
+            inicio = time.perf_counter()
+            try:
+                conexao.request("GET", self.caminho, headers=self.cabecalhos)
+                resposta = conexao.getresponse()
+                resposta.read()
+                ok = resposta.status < 400
+            except (OSError, http.client.HTTPException):
+                conexao.close()         # reconecta na próxima
+                ok = False
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            erros += not ok
+        conexao.close()
+        with self.lock:
+            self.latencias += latencias
+            self.erros += erros
+
+    def executar(self):
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as pool:
+            for _ in range(self.concorrencia):
+                pool.submit(self._cliente)
+        duracao = time.perf_counter() - inicio
+        latencias = sorted(self.latencias)
+        return {
+            "requisicoes": len(latencias),
+            "erros": self.erros,
+            "rps": round(len(latencias) / duracao, 1),
+            "p50_ms": round(percentil(latencias, 50), 2),
+            "p99_ms": round(percentil(latencias, 99), 2),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera carga HTTP concorrente nas rotas de /api/ de um servidor em execução, "
+        "em cada nível de concorrência: RPS, p50/p99 e erros. Rode contra o "
+        "gunicorn WSGI e contra o uvicorn (SERVIDOR=asgi) para comparar os dois modos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Servidor alvo.")
+        parser.add_argument(
+            "--usuario", help="Username para gerar o JWT (o servidor precisa do mesmo banco e SECRET_KEY).",
+        )
+        parser.add_argument("--token", help="JWT de acesso já emitido (alternativa a --usuario).")
+        parser.add_argument("--concorrencia", type=_inteiros, default=[1, 8, 32])
+        parser.add_argument("--requisicoes", type=int, default=200, help="Por caminho e nível.")
+        parser.add_argument(
+            "--caminho", action="append", dest="caminhos",
+            help=f"Caminho relativo a /api/ (pode repetir). Padrão: {', '.join(CAMINHOS)}.",
+        )
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--json", dest="saida", help="Grava o resultado neste arquivo.")
+
+    def handle(self, *args, **opts):
+        base = urlsplit(opts["url"])
+        if base.scheme not in ("http", "https") or not base.netloc:
+            raise CommandError(f"URL inválida: {opts['url']!r}")
+        if opts["requisicoes"] < 1 or not opts["concorrencia"] or min(opts["concorrencia"]) < 1:
+            raise CommandError("--requisicoes e --concorrencia devem ser ≥ 1.")
+
+        cabecalhos = {"Connection": "keep-alive"}
+        token = opts["token"] or self._token(opts["usuario"])
+        if token:
+            cabecalhos["Authorization"] = f"Bearer {token}"
+        caminhos = opts["caminhos"] or CAMINHOS
+
+        resultado = {"url": opts["url"], "requisicoes": opts["requisicoes"], "medidas": {}}
+        self.stdout.write(
+            f"{'caminho':<20}{'conc.':>6}{'RPS':>9}{'p50 ms':>9}{'p99 ms':>9}{'erros':>7}"
+        )
+        for caminho in caminhos:
+            for concorrencia in opts["concorrencia"]:
+                m = _Carga(
+                    base, f"{base.path.rstrip('/')}/api/{caminho.lstrip('/')}",
+                    cabecalhos, opts["requisicoes"], concorrencia, opts["timeout"],
+                ).executar()
+                resultado["medidas"].setdefault(caminho, {})[concorrencia] = m
+                self.stdout.write(
+                    f"{caminho:<20}{concorrencia:>6}{m['rps']:>9.0f}"
+                    f"{m['p50_ms']:>9.1f}{m['p99_ms']:>9.1f}{m['erros']:>7}"
+                )
+
+        if opts["saida"]:
+            with open(opts["saida"], "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"\nResultado gravado em {opts['saida']}")
+
+    @staticmethod
+    def _token(username):
+        if not username:
+            return None
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Usuário {username!r} não existe.")
+        return str(RefreshToken.for_user(user).access_token)
@@ -0,0 +1,210 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+from django.test.utils import override_settings
+
+from reviews import likes
+from reviews.benchmark import GeradorDeDados
+from reviews.instrumentation import percentil
+from reviews.models import Carro, Critica, EventoCurtida
+
+PREFIXO = "bench_curtidas"
+MODOS = {"sincrono": False, "write-behind": True}
+
+
+def _inteiros(valor):
+    try:
+        return [int(v) for v in valor.split(",") if v]
+    except ValueError:
+        raise CommandError(f"Lista de inteiros inválida: {valor!r}")
+
+
+class _Curtidores:
+    """
+    `total` likes/unlikes divididos entre `concorrencia` threads, cada uma com
+    o seu usuário, alternando o estado em críticas sorteadas do conjunto
+    quente. Guarda a última intenção aceita de cada (usuário, crítica).
+    """
+
+    def __init__(self, usuarios, criticas_ids, total, concorrencia, seed):
+        self.usuarios = usuarios[:concorrencia]
+        self.criticas_ids = criticas_ids
+        self.restantes = total
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.latencias = []
+        self.erros = 0
+        self.esperado = {}
+
+    def _proxima(self):
+        with self.lock:
+            if self.restantes <= 0:
+                return False
+            self.restantes -= 1
+            return True
+
+    def _curtidor(self, indice):
+        rng = random.Random(self.seed + indice)
+        user = self.usuarios[indice]
+        estado, latencias, erros = {}, [], 0
+        try:
+            while self._proxima():
+                critica_id = rng.choice(self.criticas_ids)
+                curtir = not estado.get(critica_id, False)
+                inicio = time.perf_counter()
+                try:
+                    (likes.curtir if curtir else likes.descurtir)(critica_id, user)
+                    estado[critica_id] = curtir
+                except DatabaseError:       # ex.: "database is locked" no SQLite
+                    erros += 1
+                latencias.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            close_old_connections()
+        with self.lock:
+            self.latencias += latencias
+            self.erros += erros
+            self.esperado.update({(user.pk, c): curtir for c, curtir in estado.items()})
+
+    def executar(self):
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(self.usuarios)) as pool:
+            for futuro in [pool.submit(self._curtidor, i) for i in range(len(self.usuarios))]:
+                futuro.result()
+        return time.perf_counter() - inicio
+
+
+class _Flusher:
+    """O flusher de reviews/likes.py numa thread que dá para parar."""
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.falhas = 0
+
+    def _loop(self):
+        try:
+            while not self.parar.wait(self.intervalo):
+                try:
+                    likes.drenar()
+                except DatabaseError:     # como o flusher de verdade: tenta no próximo ciclo
+                    self.falhas += 1
+        finally:
+            close_old_connections()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.parar.set()
+        self.thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede like/unlike com vários curtidores concorrentes nas mesmas críticas, "
+        "no modo síncrono e em write-behind (LIKES_WRITE_BEHIND): ops/s, p50/p99, "
+        "erros, tempo para drenar a fila e se M2M e total_likes terminam "
+        "consistentes com a última intenção de cada usuário. Grava dados de "
+        "verdade (threads não compartilham transação) e os apaga no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concorrencia", type=_inteiros, default=[1, 8, 32])
+        parser.add_argument("--operacoes", type=int, default=2_000, help="Por modo e nível.")
+        parser.add_argument("--criticas", type=int, default=5, help="Críticas disputadas.")
+        parser.add_argument("--intervalo", type=float, default=0.2, help="Flusher, em segundos.")
+        parser.add_argument(
+            "--modo", action="append", dest="modos", choices=list(MODOS),
+            help="sincrono e/ou write-behind (pode repetir). Padrão: os dois.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="saida", help="Grava o resultado neste arquivo.")
+
+    def handle(self, *args, **opts):
+        niveis = opts["concorrencia"]
+        if opts["operacoes"] < 1 or opts["criticas"] < 1 or not niveis or min(niveis) < 1:
+            raise CommandError("--operacoes, --criticas e --concorrencia devem ser ≥ 1.")
+        if EventoCurtida.objects.exists():
+            raise CommandError("Há eventos de curtida pendentes: rode aplicar_curtidas antes.")
+
+        resultado = {
+            "banco": connection.vendor,
+            "parametros": {k: opts[k] for k in ("operacoes", "criticas", "intervalo", "seed")},
+            "medidas": {},
+        }
+        self.stdout.write(
+            f"{'modo':<14}{'conc.':>6}{'ops/s':>9}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'erros':>7}{'drenar ms':>11}  consistente"
+        )
+        dados = GeradorDeDados(seed=opts["seed"], prefixo=PREFIXO)
+        try:
+            dados.gerar_usuarios(max(niveis))
+            dados.gerar_carros(1)
+            dados.gerar_criticas(opts["criticas"])
+            for modo in opts["modos"] or list(MODOS):
+                for concorrencia in niveis:
+                    m = self._medir(dados, modo, concorrencia, opts)
+                    resultado["medidas"].setdefault(modo, {})[concorrencia] = m
+                    self.stdout.write(
+                        f"{modo:<14}{concorrencia:>6}{m['ops_s']:>9.0f}{m['p50_ms']:>9.1f}"
+                        f"{m['p99_ms']:>9.1f}{m['erros']:>7}{m['drenar_ms']:>11.1f}"
+                        f"  {'sim' if m['consistente'] else 'NÃO'}"
+                    )
+        finally:
+            Critica.objects.filter(pk__in=dados.criticas_ids).delete()
+            Carro.objects.filter(pk__in=[c.pk for c in dados.carros]).delete()
+            get_user_model().objects.filter(username__startswith=f"{PREFIXO}_").delete()
+
+        if opts["saida"]:
+            with open(opts["saida"], "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"\nResultado gravado em {opts['saida']}")
+
+    def _medir(self, dados, modo, concorrencia, opts):
+        likes.Curtida.objects.filter(critica_id__in=dados.criticas_ids).delete()
+        likes.recontar(dados.criticas_ids)
+        carga = _Curtidores(
+            dados.usuarios, dados.criticas_ids, opts["operacoes"], concorrencia, opts["seed"]
+        )
+        flusher = _Flusher(opts["intervalo"])
+        write_behind = MODOS[modo]
+        with override_settings(LIKES_WRITE_BEHIND=write_behind, LIKES_FLUSH_THREAD=False):
+            if write_behind:
+                with flusher:
+                    duracao = carga.executar()
+            else:
+                duracao = carga.executar()
+            inicio = time.perf_counter()
+            likes.drenar()
+            drenar_ms = (time.perf_counter() - inicio) * 1000
+
+        latencias = sorted(carga.latencias)
+        return {
+            "operacoes": len(latencias),
+            "erros": carga.erros,
+            "ops_s": round(len(latencias) / duracao, 1),
+            "p50_ms": round(percentil(latencias, 50), 2),
+            "p99_ms": round(percentil(latencias, 99), 2),
+            "drenar_ms": round(drenar_ms, 1),
+            "falhas_do_flusher": flusher.falhas,
+            "consistente": self._consistente(dados.criticas_ids, carga.esperado),
+        }
+
+    @staticmethod
+    def _consistente(criticas_ids, esperado):
+        """M2M = última intenção de cada par e total_likes = linhas da M2M."""
+        pares = set(
+            likes.Curtida.objects.filter(critica_id__in=criticas_ids).values_list("user_id", "critica_id")
+        )
+        if pares != {par for par, curtir in esperado.items() if curtir}:
+            return False
+        totais = dict(Critica.objects.filter(pk__in=criticas_ids).values_list("pk", "total_likes"))
+        return all(totais[c] == sum(1 for _, critica in pares if critica == c) for c in criticas_ids)
@@ -0,0 +1,91 @@
+import json
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from reviews.benchmark import GeradorDeDados, cenarios_de_login, executar_cenario
+
+SENHA = "senha-de-benchmark"
+HASHERS = {
+    "padrao": None,     # o configurado em settings.PASSWORD_HASHERS
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "md5": "django.contrib.auth.hashers.MD5PasswordHasher",   # só testes
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o login (POST /api/token/) por username e por e-mail: p50/p99, "
+        "logins/s e queries por login, incluindo o custo do hash da senha. "
+        "Roda numa transação desfeita no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuarios", type=int, default=1_000)
+        parser.add_argument("--iteracoes", type=int, default=30)
+        parser.add_argument("--aquecimento", type=int, default=3)
+        parser.add_argument(
+            "--hasher", choices=list(HASHERS), default="padrao",
+            help="Hasher das senhas geradas (md5 mostra o custo sem o hash).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="saida", help="Grava o resultado neste arquivo.")
+
+    def handle(self, *args, **opts):
+        if opts["iteracoes"] < 1 or opts["usuarios"] < 1:
+            raise CommandError("--iteracoes e --usuarios devem ser ≥ 1.")
+
+        hashers = settings.PASSWORD_HASHERS
+        if HASHERS[opts["hasher"]]:
+            hashers = [HASHERS[opts["hasher"]], *hashers]
+        ambiente = override_settings(
+            PASSWORD_HASHERS=hashers,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],   # host do APIClient
+            THROTTLE_ATIVO=False,       # todos os logins saem do mesmo IP
+        )
+        with ambiente:
+            try:
+                algoritmo = get_hasher().algorithm
+            except ValueError as erro:     # argon2/bcrypt sem a biblioteca instalada
+                raise CommandError(str(erro))
+            resultado = {
+                "banco": connection.vendor,
+                "hasher": algoritmo,
+                "parametros": {k: opts[k] for k in ("usuarios", "iteracoes", "aquecimento", "seed")},
+                "cenarios": {},
+            }
+            self.stdout.write(f"{opts['usuarios']} usuários, hasher {algoritmo} ({connection.vendor})")
+            self.stdout.write(f"{'cenário':<18}{'p50 ms':>9}{'p99 ms':>9}{'login/s':>9}{'queries':>9}")
+
+            with transaction.atomic():
+                dados = GeradorDeDados(seed=opts["seed"], prefixo="bench_login")
+                dados.gerar_usuarios(opts["usuarios"], senha=SENHA)
+                cliente = APIClient()
+                for nome, requisicao in cenarios_de_login(
+                    dados, SENHA, random.Random(opts["seed"])
+                ).items():
+                    try:
+                        m = executar_cenario(
+                            cliente, requisicao, opts["iteracoes"], opts["aquecimento"]
+                        )
+                    except RuntimeError as erro:
+                        raise CommandError(f"{nome}: {erro}")
+                    resultado["cenarios"][nome] = m
+                    self.stdout.write(
+                        f"{nome:<18}{m['p50_ms']:>9.1f}{m['p99_ms']:>9.1f}"
+                        f"{m['rps']:>9.0f}{m['queries_media']:>9.1f}"
+                    )
+                transaction.set_rollback(True)
+
+        if opts["saida"]:
+            with open(opts["saida"], "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"\nResultado gravado em {opts['saida']}")
@@ -0,0 +1,164 @@
+import json
+import random
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from reviews.benchmark import GeradorDeDados, cenarios, cliente_autenticado, executar_cenario
+from reviews.facets import invalidar_facetas
+from reviews.leaderboard import invalidar_ranking
+from reviews.response_cache import invalidar_respostas
+
+METRICAS_COMPARADAS = ("p50_ms", "p99_ms", "queries_media")
+
+
+def _inteiros(valor):
+    try:
+        return [int(v) for v in valor.split(",") if v]
+    except ValueError:
+        raise CommandError(f"Lista de inteiros inválida: {valor!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera dados sintéticos e mede a API (p50/p99, queries por requisição, "
+        "RPS) em cada escala de críticas. Roda numa transação desfeita no final; "
+        "os callbacks de on_commit de cada requisição (ranking, feed) rodam logo "
+        "após ela e entram na medida. --json grava o resultado e --comparar "
+        "mostra a diferença para outro."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--carros", type=int, default=200)
+        parser.add_argument("--imagens-por-carro", type=int, default=2, choices=range(4))
+        parser.add_argument("--usuarios", type=int, default=100)
+        parser.add_argument(
+            "--escalas", type=_inteiros, default=[1_000, 10_000],
+            help="Totais de críticas a medir, crescendo a base (ex.: 1000,10000,100000).",
+        )
+        parser.add_argument("--likes-por-critica", type=float, default=2.0)
+        parser.add_argument("--iteracoes", type=int, default=50)
+        parser.add_argument("--aquecimento", type=int, default=5)
+        parser.add_argument(
+            "--cenario", action="append", dest="cenarios",
+            help="Cenário a rodar (pode repetir). Padrão: todos.",
+        )
+        parser.add_argument(
+            "--sem-cache-de-usuario", action="store_true",
+            help="Busca o usuário do JWT no banco a cada requisição (JWT_CACHE_USUARIO=False).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--json", dest="saida", help="Grava o resultado neste arquivo.")
+        parser.add_argument("--comparar", help="Resultado anterior (--json) para comparar.")
+
+    def handle(self, *args, **opts):
+        if opts["iteracoes"] < 1:
+            raise CommandError("--iteracoes deve ser ≥ 1.")
+        escalas = sorted(opts["escalas"])
+        if not escalas:
+            raise CommandError("Informe ao menos uma escala.")
+
+        rng = random.Random(opts["seed"])
+        resultado = {
+            "commit": self._commit(),
+            "banco": connection.vendor,
+            "parametros": {k: opts[k] for k in (
+                "carros", "imagens_por_carro", "usuarios", "likes_por_critica",
+                "iteracoes", "aquecimento", "seed", "sem_cache_de_usuario",
+            )},
+            "escalas": {},
+        }
+
+        ambiente = override_settings(
+            # só monta URLs de imagem: não precisa de credenciais do Cloudinary
+            STORAGES={
+                **settings.STORAGES,
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            },
+            MEDIA_URL="/media/",
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],   # host do APIClient
+            JWT_CACHE_USUARIO=not opts["sem_cache_de_usuario"],
+            THROTTLE_ATIVO=False,       # mede a API, não os limites de taxa
+        )
+        with ambiente, transaction.atomic():
+            dados = GeradorDeDados(seed=opts["seed"])
+            dados.gerar_usuarios(opts["usuarios"])
+            dados.gerar_carros(opts["carros"], opts["imagens_por_carro"])
+            cliente = cliente_autenticado(dados.usuarios[0])
+            disponiveis = cenarios(dados, rng)
+            nomes = opts["cenarios"] or list(disponiveis)
+            desconhecidos = set(nomes) - set(disponiveis)
+            if desconhecidos:
+                raise CommandError(
+                    f"Cenário(s) desconhecido(s): {', '.join(sorted(desconhecidos))}. "
+                    f"Disponíveis: {', '.join(disponiveis)}."
+                )
+
+            for escala in escalas:
+                ja_existentes = len(dados.criticas_ids)
+                dados.gerar_criticas(escala - ja_existentes)
+                dados.gerar_likes(dados.criticas_ids[ja_existentes:], opts["likes_por_critica"])
+
+                self.stdout.write(f"\n{escala} críticas ({connection.vendor})")
+                self.stdout.write(
+                    f"{'cenário':<18}{'p50 ms':>9}{'p99 ms':>9}{'RPS':>9}{'queries':>9}"
+                )
+                medidos = resultado["escalas"][str(escala)] = {}
+                for nome in nomes:
+                    try:
+                        m = executar_cenario(
+                            cliente, disponiveis[nome], opts["iteracoes"], opts["aquecimento"]
+                        )
+                    except RuntimeError as erro:
+                        raise CommandError(f"{nome}: {erro}")
+                    medidos[nome] = m
+                    self.stdout.write(
+                        f"{nome:<18}{m['p50_ms']:>9.1f}{m['p99_ms']:>9.1f}"
+                        f"{m['rps']:>9.0f}{m['queries_media']:>9.1f}"
+                    )
+            transaction.set_rollback(True)
+
+        # o cache sobrevive ao rollback: descarta o que foi calculado com os dados sintéticos
+        invalidar_facetas()
+        invalidar_ranking()
+        invalidar_respostas()
+
+        if opts["saida"]:
+            with open(opts["saida"], "w", encoding="utf-8") as arquivo:
+                json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"\nResultado gravado em {opts['saida']}")
+        if opts["comparar"]:
+            self._comparar(resultado, opts["comparar"])
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _comparar(self, atual, caminho):
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                anterior = json.load(arquivo)
+        except (OSError, ValueError) as erro:
+            raise CommandError(f"Não foi possível ler {caminho}: {erro}")
+
+        self.stdout.write(f"\nComparação com {caminho} (commit {anterior.get('commit') or '?'})")
+        for escala, medidos in atual["escalas"].items():
+            antes = anterior.get("escalas", {}).get(escala, {})
+            for nome, m in medidos.items():
+                if nome not in antes:
+                    continue
+                variacoes = []
+                for metrica in METRICAS_COMPARADAS:
+                    base = antes[nome][metrica]
+                    pct = (m[metrica] - base) / base * 100 if base else 0.0
+                    variacoes.append(f"{metrica} {base:g}→{m[metrica]:g} ({pct:+.0f}%)")
+                self.stdout.write(f"{escala:>8} {nome:<18}" + "   ".join(variacoes))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from reviews.bulk_io import FORMATOS, detectar_formato, exportar
+from reviews.models import Critica
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta as críticas (com marca/modelo/ano e usuário) em JSON Lines ou "
+        "CSV, em streaming: memória constante mesmo com milhões de linhas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--saida", default="-", help="Arquivo de saída ('-' = stdout).")
+        parser.add_argument("--formato", choices=FORMATOS, help="Padrão: pela extensão (jsonl).")
+        parser.add_argument("--marca", help="Exporta só as críticas desta marca.")
+
+    def handle(self, *args, **opts):
+        formato = opts["formato"] or detectar_formato(opts["saida"])
+        criticas = Critica.objects.all()
+        if opts["marca"]:
+            criticas = criticas.filter(carro__marca=opts["marca"])
+
+        if opts["saida"] == "-":
+            for pedaco in exportar(criticas, formato):
+                self.stdout.write(pedaco, ending="")
+            return
+        with open(opts["saida"], "w", encoding="utf-8", newline="") as arquivo:
+            for pedaco in exportar(criticas, formato):
+                arquivo.write(pedaco)
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.bulk_io import FORMATOS, detectar_formato, importar
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa carros e críticas de JSON Lines ou CSV em lotes (bulk_create), "
+        "lendo o arquivo em streaming. Use '-' para ler da entrada padrão."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo")
+        parser.add_argument("--formato", choices=FORMATOS, help="Padrão: pela extensão (jsonl).")
+        parser.add_argument("--lote", type=int, default=1_000)
+
+    def handle(self, *args, **opts):
+        formato = opts["formato"] or detectar_formato(opts["arquivo"])
+        try:
+            if opts["arquivo"] == "-":
+                resumo = importar(sys.stdin, formato, lote=opts["lote"])
+            else:
+                with open(opts["arquivo"], encoding="utf-8-sig", newline="") as arquivo:
+                    resumo = importar(arquivo, formato, lote=opts["lote"])
+        except (OSError, UnicodeDecodeError) as erro:
+            raise CommandError(str(erro))
+
+        for erro in resumo["erros"]:
+            self.stderr.write(f"linha {erro['linha']}: {erro['erro']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumo['linhas']} linha(s): {resumo['carros_criados']} carro(s) e "
+            f"{resumo['criticas_criadas']} crítica(s) criados, {resumo['total_erros']} erro(s)."
+        ))
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from reviews import uploads
+from reviews.models import CarroImagem
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa os uploads de imagem pendentes (envio ao storage e variantes). "
+        "Retoma os que ficaram presos num worker que morreu; --erros tenta de "
+        "novo os que falharam."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reprocessar-apos", type=int, default=10, metavar="MINUTOS",
+            help="Considera abandonado um processamento iniciado há mais que isso.",
+        )
+        parser.add_argument("--erros", action="store_true", help="Inclui as imagens com erro.")
+
+    def handle(self, *args, **options):
+        ids = uploads.retomar(
+            reprocessar_apos=timedelta(minutes=options["reprocessar_apos"]),
+            erros=options["erros"],
+        )
+        processadas = sum(uploads.processar(pk) for pk in ids)
+        com_erro = CarroImagem.objects.filter(pk__in=ids, status=CarroImagem.ERRO).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{processadas} imagem(ns) processada(s), {com_erro} com erro."
+        ))
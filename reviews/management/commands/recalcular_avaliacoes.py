@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.models import Carro
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula total, soma, média e histograma de avaliações de cada carro a "
+        "partir das críticas. Com --verificar só compara e lista as divergências."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--carro", type=int, action="append", dest="carros",
+            help="ID de carro a recalcular (pode repetir). Padrão: todos.",
+        )
+        parser.add_argument(
+            "--verificar", action="store_true",
+            help="Não grava: lista os carros com contadores divergentes e sai com erro se houver.",
+        )
+
+    def handle(self, *args, **options):
+        carros = Carro.objects.all()
+        if options["carros"]:
+            carros = carros.filter(pk__in=options["carros"])
+
+        if options["verificar"]:
+            divergentes = carros.divergencias()
+            for carro, campos in divergentes:
+                detalhes = ", ".join(
+                    f"{campo}: {gravado} ≠ {calculado}"
+                    for campo, (gravado, calculado) in campos.items()
+                )
+                self.stdout.write(f"#{carro.pk} {carro}: {detalhes}")
+            if divergentes:
+                raise CommandError(
+                    f"{len(divergentes)} carro(s) com agregados divergentes; "
+                    "rode sem --verificar para corrigir."
+                )
+            self.stdout.write(self.style.SUCCESS("Agregados conferem com as críticas."))
+            return
+
+        atualizados = carros.recalcular_avaliacoes()
+        self.stdout.write(self.style.SUCCESS(
+            f"Agregados recalculados para {atualizados} carro(s)."
+        ))
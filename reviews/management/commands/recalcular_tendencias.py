@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reviews import rating_trends
+
+
+class Command(BaseCommand):
+    help = (
+        "Refaz os agregados mensais de avaliação (carro × mês e marca × mês) a "
+        "partir das críticas. Use para o preenchimento inicial ou depois de "
+        "alterações que não passam pelos sinais nem por CriticaQuerySet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--carro", type=int, action="append", dest="carros",
+            help="ID de carro a recalcular (pode repetir). Padrão: todos.",
+        )
+
+    def handle(self, *args, **options):
+        gravadas = rating_trends.recalcular(options["carros"] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Tendências recalculadas: {gravadas} linha(s) de carro × mês."
+        ))
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews import feed
+
+
+class Command(BaseCommand):
+    help = (
+        "Refaz a timeline do feed (/api/feed/) a partir de críticas, likes e "
+        "marcas seguidas. Use depois de alterações em massa que não passam "
+        "pelos sinais (ex.: troca de marca de carros via update())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--usuario", action="append", dest="usuarios",
+            help="Username a reconstruir (pode repetir). Padrão: todos com interesse.",
+        )
+
+    def handle(self, *args, **options):
+        if options["usuarios"]:
+            encontrados = dict(
+                get_user_model().objects.filter(username__in=options["usuarios"])
+                .values_list("username", "pk")
+            )
+            faltando = set(options["usuarios"]) - set(encontrados)
+            if faltando:
+                raise CommandError(f"Usuário(s) inexistente(s): {', '.join(sorted(faltando))}")
+            ids = encontrados.values()
+        else:
+            ids = feed.usuarios_com_interesse()
+
+        for usuario_id in sorted(ids):
+            with transaction.atomic():      # o usuário nunca vê o feed pela metade
+                feed.reconstruir([usuario_id])
+        self.stdout.write(self.style.SUCCESS(f"Feed reconstruído para {len(ids)} usuário(s)."))
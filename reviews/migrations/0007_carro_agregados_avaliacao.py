@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def preencher_agregados(apps, schema_editor):
+    Carro   = apps.get_model("reviews", "Carro")
+    Critica = apps.get_model("reviews", "Critica")
+
+    agregados = (
+        Critica.objects
+        .order_by()
+        .values("carro_id")
+        .annotate(total=Count("id"), soma=Sum("avaliacao"), media=Avg("avaliacao"))
+    )
+    for linha in agregados:
+        Carro.objects.filter(pk=linha["carro_id"]).update(
+            total_criticas=linha["total"],
+            soma_avaliacoes=linha["soma"],
+            media_avaliacao=linha["media"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_add_liked_users_m2m'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carro',
+            name='total_criticas',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Total de críticas'),
+        ),
+        migrations.AddField(
+            model_name='carro',
+            name='soma_avaliacoes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Soma das avaliações'),
+        ),
+        migrations.AddField(
+            model_name='carro',
+            name='media_avaliacao',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Média das avaliações'),
+        ),
+        migrations.RunPython(preencher_agregados, reverse_code=migrations.RunPython.noop),
+    ]
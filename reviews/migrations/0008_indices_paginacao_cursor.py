@@ -0,0 +1,31 @@
+# Generated by Django 5.2.2 on 2026-10-18 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_carro_agregados_avaliacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carro',
+            index=models.Index(fields=['-ano', '-id'], name='carro_ano_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carro',
+            index=models.Index(fields=['-media_avaliacao', '-id'], name='carro_media_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='critica',
+            index=models.Index(fields=['-criado_em', '-id'], name='critica_criado_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='critica',
+            index=models.Index(fields=['-avaliacao', '-id'], name='critica_avaliacao_id_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.2 on 2026-10-18 14:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_indices_paginacao_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # cria os compostos antes de remover os índices simples das FKs
+    operations = [
+        migrations.AddIndex(
+            model_name='critica',
+            index=models.Index(fields=['usuario', '-criado_em'], name='critica_usuario_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='critica',
+            index=models.Index(fields=['carro', 'avaliacao'], name='critica_carro_avaliacao_idx'),
+        ),
+        migrations.AlterField(
+            model_name='critica',
+            name='carro',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='criticas', to='reviews.carro', verbose_name='Carro'),
+        ),
+        migrations.AlterField(
+            model_name='critica',
+            name='usuario',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='criticas', to=settings.AUTH_USER_MODEL, verbose_name='Usuário'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+import django.db.models.deletion
+import reviews.models
+from django.db import migrations, models
+
+# SQL copiado de reviews/search.py na época desta migração: mudanças
+# posteriores no módulo não podem alterar o que ela faz. No SQLite só a
+# tabela FTS5 é criada aqui; as triggers que a mantêm existem só fora das
+# migrações (o "remake" de tabelas das migrações seguintes quebraria com
+# elas): o pre_migrate as tira e o post_migrate as recoloca e reconstrói
+# o índice (reviews/signals.py).
+TRIGGERS = [
+    "reviews_critica_fts_ai",
+    "reviews_critica_fts_ad",
+    "reviews_critica_fts_au",
+    "reviews_critica_fts_carro_au",
+]
+
+
+def instalar(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_critica_fts USING fts5("
+                "documento, tokenize='unicode61 remove_diacritics 2')"
+            )
+        elif conn.vendor == "postgresql":
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS critica_texto_fts_idx ON reviews_critica "
+                "USING GIN (to_tsvector('portuguese', texto))"
+            )
+
+
+def remover(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            for nome in TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+            cursor.execute("DROP TABLE IF EXISTS reviews_critica_fts")
+        elif conn.vendor == "postgresql":
+            cursor.execute("DROP INDEX IF EXISTS critica_texto_fts_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_indices_padroes_de_acesso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CriticaIndiceBusca',
+            fields=[
+                ('critica', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='indice_busca', serialize=False, to='reviews.critica')),
+                ('documento', reviews.models.DocumentoBuscaField()),
+            ],
+            options={
+                'db_table': 'reviews_critica_fts',
+                'managed': False,
+            },
+        ),
+        # FTS5 (SQLite) / GIN com to_tsvector('portuguese') (PostgreSQL).
+        migrations.RunPython(instalar, reverse_code=remover),
+    ]
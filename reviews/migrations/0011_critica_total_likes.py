@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def preencher_total_likes(apps, schema_editor):
+    Critica = apps.get_model("reviews", "Critica")
+    Curtida = Critica.liked_users.through
+    contagens = (
+        Curtida.objects.order_by().values("critica_id").annotate(n=Count("id"))
+    )
+    for linha in contagens:
+        Critica.objects.filter(pk=linha["critica_id"]).update(total_likes=linha["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_indice_busca_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='critica',
+            name='total_likes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total de likes'),
+        ),
+        migrations.RunPython(preencher_total_likes, reverse_code=migrations.RunPython.noop),
+    ]
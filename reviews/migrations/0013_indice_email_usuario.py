@@ -0,0 +1,44 @@
+from django.db import migrations
+
+INDICE = "auth_user_email_lower_uniq"
+
+
+def criar_indice(apps, schema_editor):
+    """
+    Índice único parcial em LOWER(email) (e-mail vazio continua permitido).
+    Mesmo SQL no SQLite e no PostgreSQL; o auth_user é do django.contrib.auth,
+    por isso não é um Meta.constraints.
+    """
+    User = apps.get_model("auth", "User")
+    tabela = schema_editor.quote_name(User._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT LOWER(email) FROM {tabela} WHERE email <> '' "
+            "GROUP BY LOWER(email) HAVING COUNT(*) > 1"
+        )
+        duplicados = [linha[0] for linha in cursor.fetchall()]
+    if duplicados:
+        raise RuntimeError(
+            "Há e-mails repetidos (sem diferenciar maiúsculas) em auth_user; "
+            f"corrija antes de migrar: {', '.join(duplicados[:20])}"
+        )
+    schema_editor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {INDICE} "
+        f"ON {tabela} (LOWER(email)) WHERE email <> ''"
+    )
+
+
+def remover_indice(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('reviews', '0012_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, reverse_code=remover_indice),
+    ]
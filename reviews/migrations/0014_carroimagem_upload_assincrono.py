@@ -0,0 +1,43 @@
+# Generated by Django 5.2.2 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_indice_email_usuario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carroimagem',
+            name='arquivo_pendente',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Arquivo pendente'),
+        ),
+        migrations.AddField(
+            model_name='carroimagem',
+            name='erro',
+            field=models.TextField(blank=True, verbose_name='Erro'),
+        ),
+        migrations.AddField(
+            model_name='carroimagem',
+            name='processamento_iniciado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='carroimagem',
+            name='status',
+            field=models.CharField(choices=[('PE', 'Pendente'), ('PR', 'Processando'), ('OK', 'Pronta'), ('ER', 'Erro')], db_index=True, default='OK', max_length=2, verbose_name='Status'),
+        ),
+        migrations.AddField(
+            model_name='carroimagem',
+            name='variantes',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Variantes'),
+        ),
+        migrations.AlterField(
+            model_name='carroimagem',
+            name='foto',
+            field=models.ImageField(blank=True, upload_to='carros', verbose_name='Foto'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def preencher_urls(apps, schema_editor):
+    CarroImagem = apps.get_model("reviews", "CarroImagem")
+    imagens = []
+    for imagem in CarroImagem.objects.exclude(foto="").iterator(chunk_size=500):
+        imagem.url = default_storage.url(imagem.foto.name)
+        imagem.urls_variantes = {
+            nome: default_storage.url(caminho) for nome, caminho in imagem.variantes.items()
+        }
+        imagens.append(imagem)
+    CarroImagem.objects.bulk_update(imagens, ["url", "urls_variantes"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_carroimagem_upload_assincrono'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carroimagem',
+            name='url',
+            field=models.CharField(blank=True, max_length=500, verbose_name='URL'),
+        ),
+        migrations.AddField(
+            model_name='carroimagem',
+            name='urls_variantes',
+            field=models.JSONField(blank=True, default=dict, verbose_name='URLs das variantes'),
+        ),
+        migrations.RunPython(preencher_urls, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL = 200
+
+
+def preencher_feed(apps, schema_editor):
+    """Timeline inicial: críticas de outros sobre carros criticados ou curtidos."""
+    Critica = apps.get_model("reviews", "Critica")
+    ItemFeed = apps.get_model("reviews", "ItemFeed")
+    Curtida = Critica.liked_users.through
+    interesses = set(Critica.objects.values_list("usuario_id", "carro_id").distinct())
+    interesses |= set(Curtida.objects.values_list("user_id", "critica__carro_id").distinct())
+
+    recentes = {}
+    itens = []
+    for usuario_id, carro_id in interesses:
+        if carro_id not in recentes:
+            recentes[carro_id] = list(
+                Critica.objects.filter(carro_id=carro_id).order_by("-criado_em", "-id")
+                .values_list("pk", "usuario_id", "criado_em")[:BACKFILL]
+            )
+        itens += [
+            ItemFeed(usuario_id=usuario_id, critica_id=pk, carro_id=carro_id, criado_em=criado_em)
+            for pk, autor_id, criado_em in recentes[carro_id] if autor_id != usuario_id
+        ]
+    ItemFeed.objects.bulk_create(itens, batch_size=1_000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_carroimagem_urls'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('criado_em', models.DateTimeField()),
+                ('carro', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.carro')),
+                ('critica', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_feed', to='reviews.critica')),
+                ('usuario', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='itens_feed', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Item do feed',
+                'verbose_name_plural': 'Itens do feed',
+                'indexes': [models.Index(fields=['usuario', '-criado_em', '-id'], name='feed_usuario_criado_idx'), models.Index(fields=['carro', 'usuario'], name='feed_carro_usuario_idx')],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'critica'), name='item_feed_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MarcaSeguida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marca', models.CharField(max_length=40, verbose_name='Marca')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Seguida em')),
+                ('usuario', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='marcas_seguidas', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Marca seguida',
+                'verbose_name_plural': 'Marcas seguidas',
+                'ordering': ['marca'],
+                'indexes': [models.Index(fields=['marca'], name='marca_seguida_marca_idx')],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'marca'), name='marca_seguida_unica')],
+            },
+        ),
+        migrations.RunPython(preencher_feed, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def preencher_histograma(apps, schema_editor):
+    Carro   = apps.get_model("reviews", "Carro")
+    Critica = apps.get_model("reviews", "Critica")
+
+    contagens = {}
+    for linha in (
+        Critica.objects.filter(avaliacao__range=(1, 5)).order_by()
+        .values("carro_id", "avaliacao").annotate(n=Count("id"))
+    ):
+        contagens.setdefault(linha["carro_id"], {})[f"avaliacoes_{linha['avaliacao']}"] = linha["n"]
+    for carro_id, campos in contagens.items():
+        Carro.objects.filter(pk=carro_id).update(**campos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_feed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carro',
+            name='avaliacoes_1',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Críticas com 1 estrela'),
+        ),
+        migrations.AddField(
+            model_name='carro',
+            name='avaliacoes_2',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Críticas com 2 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='carro',
+            name='avaliacoes_3',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Críticas com 3 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='carro',
+            name='avaliacoes_4',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Críticas com 4 estrelas'),
+        ),
+        migrations.AddField(
+            model_name='carro',
+            name='avaliacoes_5',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Críticas com 5 estrelas'),
+        ),
+        migrations.AddIndex(
+            model_name='critica',
+            index=models.Index(fields=['carro', '-criado_em'], name='critica_carro_criado_idx'),
+        ),
+        migrations.RunPython(preencher_histograma, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncMonth
+
+
+def preencher_tendencias(apps, schema_editor):
+    Critica = apps.get_model("reviews", "Critica")
+    MesCarro = apps.get_model("reviews", "AvaliacaoMensalCarro")
+    MesMarca = apps.get_model("reviews", "AvaliacaoMensalMarca")
+
+    linhas = (
+        Critica.objects.annotate(mes=TruncMonth("criado_em", output_field=DateField()))
+        .values("carro_id", "mes").annotate(total=Count("id"), soma=Sum("avaliacao")).order_by()
+    )
+    MesCarro.objects.bulk_create([MesCarro(**linha) for linha in linhas], batch_size=1000)
+    MesMarca.objects.bulk_create([
+        MesMarca(marca=linha["carro__marca"], mes=linha["mes"], total=linha["total"], soma=linha["soma"])
+        for linha in (
+            MesCarro.objects.values("carro__marca", "mes")
+            .annotate(total=Sum("total"), soma=Sum("soma")).order_by()
+        )
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0017_histograma_avaliacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvaliacaoMensalMarca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marca', models.CharField(max_length=40, verbose_name='Marca')),
+                ('mes', models.DateField(verbose_name='Mês')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Críticas')),
+                ('soma', models.PositiveIntegerField(default=0, verbose_name='Soma das notas')),
+            ],
+            options={
+                'verbose_name': 'Avaliações da marca no mês',
+                'verbose_name_plural': 'Avaliações das marcas por mês',
+                'ordering': ['marca', 'mes'],
+                'constraints': [models.UniqueConstraint(fields=('marca', 'mes'), name='avaliacao_mensal_marca_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AvaliacaoMensalCarro',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(verbose_name='Mês')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Críticas')),
+                ('soma', models.PositiveIntegerField(default=0, verbose_name='Soma das notas')),
+                ('carro', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='avaliacoes_mensais', to='reviews.carro')),
+            ],
+            options={
+                'verbose_name': 'Avaliações do carro no mês',
+                'verbose_name_plural': 'Avaliações dos carros por mês',
+                'ordering': ['carro', 'mes'],
+                'constraints': [models.UniqueConstraint(fields=('carro', 'mes'), name='avaliacao_mensal_carro_unica')],
+            },
+        ),
+        migrations.RunPython(preencher_tendencias, reverse_code=migrations.RunPython.noop),
+    ]
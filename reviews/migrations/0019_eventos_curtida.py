@@ -0,0 +1,32 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0018_tendencia_mensal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoCurtida',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('curtir', models.BooleanField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('critica', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.critica')),
+                ('usuario', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Evento de curtida pendente',
+                'verbose_name_plural': 'Eventos de curtida pendentes',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['critica', 'id'], name='evento_curtida_critica_idx'), models.Index(fields=['usuario', 'critica', 'id'], name='evento_curtida_usuario_idx')],
+            },
+        ),
+    ]
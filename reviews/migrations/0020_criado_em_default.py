@@ -0,0 +1,19 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0019_eventos_curtida'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='critica',
+            name='criado_em',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Data de criação'),
+        ),
+    ]
@@ -1,6 +1,136 @@
 from django.db import models
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Subquery, Sum, When, Value
+from django.db.models.functions import Cast, Coalesce
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.utils import timezone
+
+
+CAMPOS_CATALOGO = {"marca", "modelo", "ano"}
+NOTAS = range(1, 6)
+
+
+def campo_da_nota(nota):
+    """Contador do histograma de `nota` (avaliacoes_1..5) ou None fora da escala."""
+    return f"avaliacoes_{nota}" if nota in NOTAS else None
+
+
+def _invalidar_catalogo():
+    from .facets import invalidar_facetas
+    from .response_cache import invalidar_respostas
+    invalidar_facetas()
+    invalidar_respostas()       # marca/modelo/ano aparecem nas críticas
+
+
+class CarroQuerySet(models.QuerySet):
+    # bulk_create/update não disparam sinais: avisam os caches aqui
+    def bulk_create(self, objs, *args, **kwargs):
+        criados = super().bulk_create(objs, *args, **kwargs)
+        _invalidar_catalogo()
+        return criados
+
+    def update(self, **kwargs):
+        # auto_now não vale para update(): agregados, imagens etc. também
+        # contam como modificação (ETag de reviews/conditional.py)
+        kwargs.setdefault("atualizado_em", timezone.now())
+        marcas = set(self.values_list("marca", flat=True).distinct()) if "marca" in kwargs else set()
+        linhas = super().update(**kwargs)
+        if CAMPOS_CATALOGO & set(kwargs):
+            _invalidar_catalogo()
+        if marcas:
+            from .rating_trends import recalcular_marcas
+            recalcular_marcas(marcas | {kwargs["marca"]})
+        return linhas
+
+    def registrar_avaliacao(self, delta_total, delta_soma, histograma=None):
+        """
+        Aplica um delta aos agregados de avaliação com F(), sem ler a linha.
+        Usado pelos sinais de Critica (uma crítica criada/alterada/removida).
+        `histograma` é {nota: delta} para os contadores avaliacoes_1..5.
+        """
+        total = F("total_criticas") + delta_total
+        soma = F("soma_avaliacoes") + delta_soma
+        contadores = {
+            campo_da_nota(nota): F(campo_da_nota(nota)) + delta
+            for nota, delta in (histograma or {}).items()
+            if delta and campo_da_nota(nota)
+        }
+        return self.update(
+            **contadores,
+            total_criticas=total,
+            soma_avaliacoes=soma,
+            media_avaliacao=Case(
+                When(condition=models.Q(total_criticas__gt=-delta_total),
+                     then=Cast(soma, FloatField()) / total),
+                default=None,
+                output_field=FloatField(),
+            ),
+        )
+
+    def recalcular_avaliacoes(self):
+        """
+        Recalcula do zero os agregados dos carros do queryset (um único UPDATE).
+        Usado nos caminhos em massa e pelo comando `recalcular_avaliacoes`.
+        """
+        criticas = (
+            Critica.objects
+            .filter(carro=OuterRef("pk"))
+            .order_by()
+            .values("carro")
+        )
+        linhas = self.update(
+            **{
+                campo_da_nota(nota): Coalesce(
+                    Subquery(criticas.filter(avaliacao=nota).annotate(v=Count("id")).values("v")),
+                    Value(0),
+                )
+                for nota in NOTAS
+            },
+            total_criticas=Coalesce(
+                Subquery(criticas.annotate(v=Count("id")).values("v")), Value(0)
+            ),
+            soma_avaliacoes=Coalesce(
+                Subquery(criticas.annotate(v=Sum("avaliacao")).values("v")), Value(0)
+            ),
+            media_avaliacao=Subquery(
+                criticas.annotate(v=Avg("avaliacao")).values("v"),
+                output_field=FloatField(),
+            ),
+        )
+        from .leaderboard import invalidar_ranking
+        invalidar_ranking()
+        return linhas
+
+    def divergencias(self):
+        """
+        Carros cujos agregados gravados diferem dos calculados a partir das
+        críticas: [(carro, {campo: (gravado, calculado)}), ...]. Só lê.
+        """
+        campos = ["total_criticas", "soma_avaliacoes", *(campo_da_nota(n) for n in NOTAS)]
+        calculado = self.annotate(
+            calc_total_criticas=Count("criticas"),
+            calc_soma_avaliacoes=Coalesce(Sum("criticas__avaliacao"), Value(0)),
+            **{
+                f"calc_{campo_da_nota(nota)}": Count("criticas", filter=models.Q(criticas__avaliacao=nota))
+                for nota in NOTAS
+            },
+            calc_media_avaliacao=Avg("criticas__avaliacao"),
+        ).order_by("pk")
+        resultado = []
+        for carro in calculado:
+            diferentes = {
+                campo: (getattr(carro, campo), getattr(carro, f"calc_{campo}"))
+                for campo in campos
+                if getattr(carro, campo) != getattr(carro, f"calc_{campo}")
+            }
+            media, esperada = carro.media_avaliacao, carro.calc_media_avaliacao
+            if (media is None) != (esperada is None) or (
+                media is not None and abs(media - esperada) > 1e-9
+            ):
+                diferentes["media_avaliacao"] = (media, esperada)
+            if diferentes:
+                resultado.append((carro, diferentes))
+        return resultado
 
 
 class Carro(models.Model):
@@ -8,13 +138,50 @@ class Carro(models.Model):
     modelo = models.CharField("Modelo", max_length=40)
     ano    = models.PositiveIntegerField("Ano")
 
+    # Agregados desnormalizados – mantidos pelos sinais de Critica
+    # (reviews/signals.py) e por CriticaQuerySet nos caminhos em massa.
+    total_criticas  = models.PositiveIntegerField("Total de críticas", default=0, db_index=True, editable=False)
+    soma_avaliacoes = models.PositiveIntegerField("Soma das avaliações", default=0, editable=False)
+    media_avaliacao = models.FloatField("Média das avaliações", null=True, blank=True, db_index=True, editable=False)
+    # histograma de estrelas (/api/cars/{id}/stats/)
+    avaliacoes_1 = models.PositiveIntegerField("Críticas com 1 estrela", default=0, editable=False)
+    avaliacoes_2 = models.PositiveIntegerField("Críticas com 2 estrelas", default=0, editable=False)
+    avaliacoes_3 = models.PositiveIntegerField("Críticas com 3 estrelas", default=0, editable=False)
+    avaliacoes_4 = models.PositiveIntegerField("Críticas com 4 estrelas", default=0, editable=False)
+    avaliacoes_5 = models.PositiveIntegerField("Críticas com 5 estrelas", default=0, editable=False)
+    atualizado_em   = models.DateTimeField("Atualizado em", auto_now=True, db_index=True)
+
+    objects = CarroQuerySet.as_manager()
+
     class Meta:
         unique_together = ("marca", "modelo", "ano")
         ordering = ["marca", "modelo", "-ano"]
+        indexes = [
+            # paginação por cursor (KeysetPagination): ordenação + id de desempate
+            models.Index(fields=["-ano", "-id"], name="carro_ano_id_idx"),
+            models.Index(fields=["-media_avaliacao", "-id"], name="carro_media_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.marca} {self.modelo} {self.ano}"
 
+    def imagens_disponiveis(self):
+        """
+        Imagens com arquivo no storage. Um upload ainda em processamento
+        (reviews/uploads.py) não aparece; numa troca de foto, a anterior
+        continua valendo até a nova ficar pronta.
+        Filtra em Python para aproveitar um prefetch de `imagens` quando houver.
+        """
+        return [imagem for imagem in self.imagens.all() if imagem.foto]
+
+    def imagem_capa(self):
+        """Imagem exterior do carro ou, na falta dela, a primeira disponível."""
+        imagens = self.imagens_disponiveis()
+        for imagem in imagens:
+            if imagem.tipo == CarroImagem.EXTERIOR:
+                return imagem
+        return imagens[0] if imagens else None
+
 
 class CarroImagem(models.Model):
     EXTERIOR = "EX"
@@ -26,6 +193,17 @@ class CarroImagem(models.Model):
         (MOTOR,    "Motor"),
     ]
 
+    PENDENTE    = "PE"
+    PROCESSANDO = "PR"
+    PRONTA      = "OK"
+    ERRO        = "ER"
+    STATUS_CHOICES = [
+        (PENDENTE,    "Pendente"),
+        (PROCESSANDO, "Processando"),
+        (PRONTA,      "Pronta"),
+        (ERRO,        "Erro"),
+    ]
+
     carro = models.ForeignKey(
         Carro,
         on_delete=models.CASCADE,
@@ -40,8 +218,24 @@ class CarroImagem(models.Model):
     foto  = models.ImageField(
         "Foto",
         upload_to="carros",          # caminho lógico em Cloudinary
+        blank=True,                  # vazia até o primeiro upload ser processado
     )
 
+    # Pipeline de upload (reviews/uploads.py): o arquivo recebido fica em
+    # `arquivo_pendente` (staging local) até um worker enviá-lo ao storage.
+    status = models.CharField(
+        "Status", max_length=2, choices=STATUS_CHOICES, default=PRONTA, db_index=True,
+    )
+    arquivo_pendente = models.CharField("Arquivo pendente", max_length=255, blank=True)
+    processamento_iniciado_em = models.DateTimeField(null=True, blank=True)
+    erro = models.TextField("Erro", blank=True)
+    variantes = models.JSONField("Variantes", default=dict, blank=True)   # nome → caminho no storage
+
+    # URLs resolvidas na gravação: os serializers só leem strings, sem passar
+    # pelo backend de storage (o do Cloudinary monta a URL a cada chamada).
+    url = models.CharField("URL", max_length=500, blank=True)
+    urls_variantes = models.JSONField("URLs das variantes", default=dict, blank=True)
+
     class Meta:
         unique_together = ("carro", "tipo")   # máx. 1 imagem de cada tipo
         ordering = ["carro", "tipo"]
@@ -51,26 +245,160 @@ class CarroImagem(models.Model):
     def __str__(self):
         return f"{self.carro} · {self.get_tipo_display()}"
 
+    def atualizar_urls(self):
+        storage = self.foto.storage
+        self.url = self.foto.url if self.foto else ""
+        self.urls_variantes = {
+            nome: storage.url(caminho) for nome, caminho in self.variantes.items()
+        }
+
+    def save(self, *args, **kwargs):
+        # bulk_create/update() não passam por aqui: use atualizar_urls() antes
+        # ou o comando atualizar_urls_imagens
+        self.atualizar_urls()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "url", "urls_variantes"}
+        super().save(*args, **kwargs)
+
+
+CAMPOS_AVALIACAO = {"avaliacao", "carro", "carro_id"}
+CAMPOS_TENDENCIA = CAMPOS_AVALIACAO | {"criado_em"}     # agregados mensais por criado_em
+
+
+def _invalidar_respostas():
+    from .response_cache import invalidar_respostas
+    invalidar_respostas()
+
+
+def _recalcular_carros(ids, campos=CAMPOS_TENDENCIA):
+    """Agregados (se a nota/carro mudou) e tendências mensais dos carros."""
+    from . import rating_trends
+    carros = Carro.objects.filter(pk__in=ids)
+    if CAMPOS_AVALIACAO & set(campos):
+        carros.recalcular_avaliacoes()
+    else:
+        carros.update()     # só a data mudou: avança atualizado_em (ETag da tendência)
+    rating_trends.recalcular(ids)
+
+
+def _sincronizar_datas_do_feed(critica_ids):
+    from . import feed
+    feed.sincronizar_datas(critica_ids)
+
+
+def _distribuir_no_feed(criticas):
+    from . import feed
+    criticas = [c for c in criticas if c.pk is not None]    # ignore_conflicts não devolve pk
+    feed.distribuir(criticas)
+    for usuario_id in {c.usuario_id for c in criticas}:
+        feed.incluir_carros(usuario_id, {c.carro_id for c in criticas if c.usuario_id == usuario_id})
+
+
+class CriticaQuerySet(models.QuerySet):
+    """
+    Operações em massa não disparam sinais de save/delete; estas sobrescritas
+    recalculam os agregados e as tendências mensais dos carros afetados
+    depois da escrita e invalidam o cache de respostas (inclusive updates de
+    total_likes). bulk_create também faz o fan-out do feed (reviews/feed.py).
+    """
+
+    def _carros_afetados(self):
+        return set(self.order_by().values_list("carro_id", flat=True).distinct())
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        criadas = super().bulk_create(objs, *args, **kwargs)
+        _recalcular_carros({c.carro_id for c in objs})
+        _invalidar_respostas()
+        _distribuir_no_feed(criadas)
+        return criadas
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        _invalidar_respostas()
+        objs, agora = list(objs), timezone.now()
+        for obj in objs:
+            obj.atualizado_em = agora
+        if "atualizado_em" not in fields:
+            fields = [*fields, "atualizado_em"]
+        if not CAMPOS_TENDENCIA & set(fields):
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        ids = {c.carro_id for c in objs}
+        if "carro" in fields or "carro_id" in fields:
+            ids |= self.filter(pk__in=[c.pk for c in objs])._carros_afetados()
+        linhas = super().bulk_update(objs, fields, *args, **kwargs)
+        _recalcular_carros(ids, fields)
+        if "criado_em" in fields:
+            _sincronizar_datas_do_feed([c.pk for c in objs])
+        return linhas
+
+    def update(self, **kwargs):
+        _invalidar_respostas()
+        kwargs.setdefault("atualizado_em", timezone.now())   # auto_now não vale em update()
+        if not CAMPOS_TENDENCIA & set(kwargs):
+            return super().update(**kwargs)
+        ids = self._carros_afetados()
+        critica_ids = list(self.values_list("pk", flat=True)) if "criado_em" in kwargs else []
+        linhas = super().update(**kwargs)
+        novo = kwargs.get("carro", kwargs.get("carro_id"))
+        if novo is not None:
+            ids.add(getattr(novo, "pk", novo))
+        _recalcular_carros(ids, kwargs)
+        if critica_ids:
+            _sincronizar_datas_do_feed(critica_ids)
+        return linhas
+
+    def delete(self):
+        _invalidar_respostas()
+        ids = self._carros_afetados()
+        resultado = super().delete()
+        _recalcular_carros(ids)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Critica(models.Model):
+    # Sem índice próprio nas FKs: os índices compostos abaixo começam por
+    # usuario/carro e já atendem esses lookups (inclusive CASCADE).
     usuario   = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="criticas",
         verbose_name="Usuário",
+        db_index=False,
     )
     carro     = models.ForeignKey(
         Carro,
         on_delete=models.CASCADE,
         related_name="criticas",
         verbose_name="Carro",
+        db_index=False,
     )
     avaliacao = models.IntegerField("Avaliação (1 a 5)")
     texto     = models.TextField("Texto da crítica", max_length=2_000)
-    criado_em = models.DateTimeField("Data de criação", auto_now_add=True)
+    # default em vez de auto_now_add: a importação (reviews/bulk_io.py) grava a
+    # data informada já no INSERT
+    criado_em = models.DateTimeField("Data de criação", default=timezone.now, editable=False)
+    atualizado_em = models.DateTimeField("Atualizado em", auto_now=True, db_index=True)
+    # mantido por reviews/likes.py (F() na mesma transação do insert/delete)
+    total_likes = models.PositiveIntegerField("Total de likes", default=0, editable=False)
+
+    objects = CriticaQuerySet.as_manager()
 
     class Meta:
         ordering = ["-criado_em"]
+        indexes = [
+            # paginação por cursor (KeysetPagination): ordenação + id de desempate
+            models.Index(fields=["-criado_em", "-id"], name="critica_criado_id_idx"),
+            models.Index(fields=["-avaliacao", "-id"], name="critica_avaliacao_id_idx"),
+            # ?my=true: filtra por usuário já na ordem de exibição
+            models.Index(fields=["usuario", "-criado_em"], name="critica_usuario_criado_idx"),
+            # agregações por carro (recalcular_avaliacoes) sem ler a tabela
+            models.Index(fields=["carro", "avaliacao"], name="critica_carro_avaliacao_idx"),
+            # tendência recente do carro (/api/cars/{id}/stats/): últimas N sem sort
+            models.Index(fields=["carro", "-criado_em"], name="critica_carro_criado_idx"),
+        ]
         verbose_name = "Crítica"
         verbose_name_plural = "Críticas"
 
@@ -82,3 +410,173 @@ class Critica(models.Model):
         related_name='liked_reviews',
         blank=True,
     )
+
+
+class MarcaSeguida(models.Model):
+    """Marca acompanhada pelo usuário: críticas de carros dela entram no feed."""
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="marcas_seguidas",
+        verbose_name="Usuário",
+        db_index=False,     # coberto pela constraint única (usuario, marca)
+    )
+    marca = models.CharField("Marca", max_length=40)
+    criado_em = models.DateTimeField("Seguida em", auto_now_add=True)
+
+    class Meta:
+        ordering = ["marca"]
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "marca"], name="marca_seguida_unica"),
+        ]
+        indexes = [
+            # fan-out: quem segue a marca do carro de uma crítica nova
+            models.Index(fields=["marca"], name="marca_seguida_marca_idx"),
+        ]
+        verbose_name = "Marca seguida"
+        verbose_name_plural = "Marcas seguidas"
+
+    def __str__(self):
+        return f"{self.usuario_id} → {self.marca}"
+
+
+class ItemFeed(models.Model):
+    """
+    Uma crítica na timeline de um usuário, gravada na escrita por
+    reviews/feed.py. `criado_em` é a data da crítica, copiada para que a
+    leitura do feed seja um range scan em (usuario, -criado_em, -id).
+    """
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="itens_feed",
+        db_index=False,     # índices compostos abaixo começam por usuario
+    )
+    critica = models.ForeignKey(Critica, on_delete=models.CASCADE, related_name="itens_feed")
+    carro = models.ForeignKey(
+        Carro,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,     # coberto por feed_carro_usuario_idx
+    )
+    criado_em = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "critica"], name="item_feed_unico"),
+        ]
+        indexes = [
+            # leitura do feed (KeysetPagination): ordenação + id de desempate
+            models.Index(fields=["usuario", "-criado_em", "-id"], name="feed_usuario_criado_idx"),
+            # feed.revisar (deixou de se interessar pelo carro) e CASCADE do carro
+            models.Index(fields=["carro", "usuario"], name="feed_carro_usuario_idx"),
+        ]
+        verbose_name = "Item do feed"
+        verbose_name_plural = "Itens do feed"
+
+
+class EventoCurtida(models.Model):
+    """
+    Like/unlike ainda não aplicado na M2M (LIKES_WRITE_BEHIND). O flusher de
+    reviews/likes.py consome os eventos em lote, pela ordem de id, e os apaga.
+    """
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,     # coberto por evento_curtida_usuario_idx
+    )
+    critica = models.ForeignKey(
+        Critica,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,     # coberto por evento_curtida_critica_idx
+    )
+    curtir = models.BooleanField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # saldo pendente da crítica (contagem otimista)
+            models.Index(fields=["critica", "id"], name="evento_curtida_critica_idx"),
+            # último evento do usuário na crítica / "curti?" de uma página
+            models.Index(fields=["usuario", "critica", "id"], name="evento_curtida_usuario_idx"),
+        ]
+        verbose_name = "Evento de curtida pendente"
+        verbose_name_plural = "Eventos de curtida pendentes"
+
+
+class AvaliacaoMensalCarro(models.Model):
+    """
+    Críticas de um carro num mês (total e soma das notas), mantidas por
+    reviews/rating_trends.py – a tendência não faz GROUP BY em Critica.
+    """
+    carro = models.ForeignKey(
+        Carro,
+        on_delete=models.CASCADE,
+        related_name="avaliacoes_mensais",
+        db_index=False,     # coberto pela constraint única (carro, mes)
+    )
+    mes = models.DateField("Mês")       # primeiro dia, no fuso do projeto
+    total = models.PositiveIntegerField("Críticas", default=0)
+    soma = models.PositiveIntegerField("Soma das notas", default=0)
+
+    class Meta:
+        ordering = ["carro", "mes"]
+        constraints = [
+            models.UniqueConstraint(fields=["carro", "mes"], name="avaliacao_mensal_carro_unica"),
+        ]
+        verbose_name = "Avaliações do carro no mês"
+        verbose_name_plural = "Avaliações dos carros por mês"
+
+
+class AvaliacaoMensalMarca(models.Model):
+    """Como AvaliacaoMensalCarro, somando os carros da marca."""
+    marca = models.CharField("Marca", max_length=40)
+    mes = models.DateField("Mês")
+    total = models.PositiveIntegerField("Críticas", default=0)
+    soma = models.PositiveIntegerField("Soma das notas", default=0)
+
+    class Meta:
+        ordering = ["marca", "mes"]
+        constraints = [
+            models.UniqueConstraint(fields=["marca", "mes"], name="avaliacao_mensal_marca_unica"),
+        ]
+        verbose_name = "Avaliações da marca no mês"
+        verbose_name_plural = "Avaliações das marcas por mês"
+
+
+class DocumentoBuscaField(models.TextField):
+    """Coluna de tabela FTS5; habilita o lookup `__match`."""
+
+
+@DocumentoBuscaField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class CriticaIndiceBusca(models.Model):
+    """
+    Tabela virtual FTS5 (só no SQLite) com "marca modelo texto" de cada crítica.
+    Criada e mantida por triggers em reviews/search.py – não é gerenciada pelo
+    Django; o modelo existe para permitir o JOIN a partir de Critica.
+    """
+    critica = models.OneToOneField(
+        Critica,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="indice_busca",
+    )
+    documento = DocumentoBuscaField()
+
+    class Meta:
+        managed = False
+        db_table = "reviews_critica_fts"
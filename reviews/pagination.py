@@ -1,6 +1,207 @@
 # reviews/pagination.py
-from rest_framework.pagination import LimitOffsetPagination
+import base64
+import datetime
+import json
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder corta datetimes em milissegundos; o seek precisa do valor exato."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
 
 class DefaultLimitOffsetPagination(LimitOffsetPagination):
     default_limit = 50      # 50 objetos por página
     max_limit = 50         # protege contra consultas gigantes
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # total já contado pela view (ex.: validador do GetCondicionalMixin)
+        self.total_conhecido = getattr(view, "total_conhecido", None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        if self.total_conhecido is not None:
+            return self.total_conhecido
+        return super().get_count(queryset)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por chave (seek): em vez de OFFSET, filtra as linhas "depois"
+    da última da página anterior, usando as colunas da ordenação + id como
+    desempate. Não faz COUNT(*) e o custo não cresce com a profundidade.
+
+    O cursor é opaco: base64 dos valores da última linha. Respeita a ordenação
+    já aplicada pelo OrderingFilter (restrita a `ordering_fields`).
+    """
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = 50
+    max_limit = 50
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.chaves = self._chaves_de_ordenacao(queryset)
+        self.next_values = None
+
+        queryset = queryset.order_by(*[self._expressao(*chave) for chave in self.chaves])
+        valores = self.decode_cursor(request)
+        if valores is not None:
+            queryset = queryset.filter(self._filtro_apos(valores))
+
+        pagina = list(queryset[:self.limit + 1])
+        if len(pagina) > self.limit:
+            pagina = pagina[:self.limit]
+            self.next_values = [self._valor(pagina[-1], campo) for campo, _, _ in self.chaves]
+        return pagina
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "offset")
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    # --------------------------------------------------
+    # Cursor
+    # --------------------------------------------------
+    def encode_cursor(self, valores):
+        bruto = json.dumps(valores, cls=_CursorEncoder).encode()
+        return base64.urlsafe_b64encode(bruto).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None     # ?cursor= vazio → primeira página
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(parse.unquote(encoded).encode()))
+            if len(valores) != len(self.chaves):
+                raise ValueError
+            return [
+                None if v is None else field.to_python(v)
+                for v, (_, _, field) in zip(valores, self.chaves)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    # --------------------------------------------------
+    # Ordenação e filtro de seek
+    # --------------------------------------------------
+    def _chaves_de_ordenacao(self, queryset):
+        """[(campo, desc, model_field), ...] terminando sempre na PK."""
+        model = queryset.model
+        pk = model._meta.pk.name
+        ordenacao = list(queryset.query.order_by) or list(model._meta.ordering)
+
+        chaves = []
+        for item in ordenacao:
+            if not isinstance(item, str) or item == "?":
+                continue
+            desc = item.startswith("-")
+            campo = item.lstrip("-")
+            if campo == "pk":
+                campo = pk
+            if any(c == campo for c, _, _ in chaves):
+                continue
+            chaves.append((campo, desc, self._resolver_campo(queryset, campo)))
+            if campo == pk:
+                break
+        if not chaves or chaves[-1][0] != pk:
+            desc = chaves[-1][1] if chaves else True
+            chaves.append((pk, desc, model._meta.pk))
+        return chaves
+
+    @staticmethod
+    def _resolver_campo(queryset, caminho):
+        if caminho in queryset.query.annotations:    # ex.: relevância da busca
+            return queryset.query.annotations[caminho].output_field
+        model, field = queryset.model, None
+        for parte in caminho.split("__"):
+            field = model._meta.get_field(parte)
+            if field.is_relation:
+                model = field.related_model
+        return field
+
+    @staticmethod
+    def _valor(obj, caminho):
+        for parte in caminho.split("__"):
+            if obj is None:
+                return None
+            obj = getattr(obj, parte)
+        return obj
+
+    @staticmethod
+    def _expressao(campo, desc, field):
+        if field.null:
+            # NULL tratado como "maior valor" (padrão do PostgreSQL): o mesmo
+            # índice btree serve a ordenação e o SQLite passa a concordar.
+            return F(campo).desc(nulls_first=True) if desc else F(campo).asc(nulls_last=True)
+        return F(campo).desc() if desc else F(campo).asc()
+
+    def _filtro_apos(self, valores):
+        """
+        (c1, c2, ..., id) > (v1, v2, ..., vid) na direção de cada coluna:
+        OR_i ( c1 = v1 AND ... AND c(i-1) = v(i-1) AND ci "depois de" vi ).
+        """
+        filtro = Q(pk__in=[])
+        iguais = Q()
+        for (campo, desc, field), valor in zip(self.chaves, valores):
+            if valor is None:
+                # NULL é o maior valor: no DESC tudo que não é NULL vem depois,
+                # no ASC nada vem depois
+                depois = Q(**{f"{campo}__isnull": False}) if desc else Q(pk__in=[])
+                igual = Q(**{f"{campo}__isnull": True})
+            else:
+                depois = Q(**{f"{campo}__{'lt' if desc else 'gt'}": valor})
+                if field.null and not desc:
+                    depois |= Q(**{f"{campo}__isnull": True})
+                igual = Q(**{campo: valor})
+            filtro |= iguais & depois
+            iguais &= igual
+        return filtro
+
+
+class KeysetOuLimitOffsetPagination(DefaultLimitOffsetPagination):
+    """
+    Limit/offset por padrão; com `?cursor=` (mesmo vazio) usa KeysetPagination.
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
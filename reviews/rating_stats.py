@@ -0,0 +1,54 @@
+# reviews/rating_stats.py
+"""
+Estatísticas de avaliação de um carro (/api/cars/{id}/stats/).
+
+Total, média e histograma de estrelas saem das colunas desnormalizadas do
+Carro (total_criticas, soma_avaliacoes, avaliacoes_1..5), mantidas pelos
+sinais de Critica e pelos caminhos em massa de CriticaQuerySet. A tendência
+lê só as RECENTES últimas notas pelo índice (carro, -criado_em). O custo é
+o mesmo para um carro com dez ou com um milhão de críticas.
+
+`python manage.py recalcular_avaliacoes --verificar` confere os contadores
+contra as críticas sem gravar nada.
+"""
+from .models import NOTAS, Carro, Critica, campo_da_nota
+
+RECENTES = 20
+CAMPOS = ["pk", "total_criticas", "soma_avaliacoes", "media_avaliacao", "atualizado_em",
+          *(campo_da_nota(nota) for nota in NOTAS)]
+
+
+def carregar(carro_id):
+    """Linha do carro só com as colunas das estatísticas (ou None)."""
+    return Carro.objects.filter(pk=carro_id).values(*CAMPOS).first()
+
+
+def montar(linha):
+    total = linha["total_criticas"]
+    media = linha["media_avaliacao"]
+    histograma = {str(nota): linha[campo_da_nota(nota)] for nota in NOTAS}
+
+    notas = list(
+        Critica.objects.filter(carro_id=linha["pk"])
+        .order_by("-criado_em").values_list("avaliacao", flat=True)[:RECENTES]
+    )
+    media_recente = sum(notas) / len(notas) if notas else None
+    return {
+        "carro": linha["pk"],
+        "total": total,
+        "media": round(media, 3) if media is not None else None,
+        "histograma": histograma,
+        "percentuais": {
+            nota: round(100 * n / total, 1) if total else 0.0
+            for nota, n in histograma.items()
+        },
+        "recentes": {
+            "quantidade": len(notas),
+            "media": round(media_recente, 3) if media_recente is not None else None,
+            # positiva: as últimas críticas estão melhores que a média geral
+            "variacao": (
+                round(media_recente - media, 3)
+                if media_recente is not None and media is not None else None
+            ),
+        },
+    }
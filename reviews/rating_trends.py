@@ -0,0 +1,187 @@
+# reviews/rating_trends.py
+"""
+Tendência mensal das avaliações (/api/cars/{id}/tendencia/ e
+/api/cars/tendencia-marca/?marca=...).
+
+AvaliacaoMensalCarro e AvaliacaoMensalMarca guardam total e soma das notas
+por mês (no fuso do projeto, pelo criado_em da crítica). Os sinais de
+Critica aplicam deltas com F() em `registrar`; os caminhos em massa de
+CriticaQuerySet e o comando `recalcular_tendencias` refazem as linhas dos
+carros afetados com um GROUP BY só sobre as críticas deles. A leitura de
+uma série é um range scan em (carro, mes) ou (marca, mes): o custo depende
+do número de meses pedidos, não do número de críticas.
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import AvaliacaoMensalCarro, AvaliacaoMensalMarca, Carro, Critica
+
+MESES_PADRAO = 12
+MAX_MESES = 120
+
+
+def mes_de(momento):
+    """Primeiro dia do mês de `momento` no fuso do projeto."""
+    return timezone.localtime(momento).date().replace(day=1)
+
+
+def _somar_meses(mes, n):
+    indice = mes.year * 12 + mes.month - 1 + n
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+# --------------------------------------------------
+# Escrita
+# --------------------------------------------------
+def _aplicar(modelo, chave, delta_total, delta_soma):
+    deltas = {"total": F("total") + delta_total, "soma": F("soma") + delta_soma}
+    if modelo.objects.filter(**chave).update(**deltas) or delta_total <= 0:
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**chave, total=delta_total, soma=delta_soma)
+    except IntegrityError:      # outra requisição criou o mês no meio tempo
+        modelo.objects.filter(**chave).update(**deltas)
+
+
+def registrar(carro_id, criado_em, delta_total, delta_soma):
+    """Aplica o delta de uma crítica no mês dela, para o carro e a marca."""
+    marca = Carro.objects.filter(pk=carro_id).values_list("marca", flat=True).first()
+    if marca is None:
+        return
+    mes = mes_de(criado_em)
+    _aplicar(AvaliacaoMensalCarro, {"carro_id": carro_id, "mes": mes}, delta_total, delta_soma)
+    _aplicar(AvaliacaoMensalMarca, {"marca": marca, "mes": mes}, delta_total, delta_soma)
+
+
+def recalcular(carro_ids=None):
+    """
+    Refaz do zero os meses dos carros (todos, se None) e das marcas deles.
+    Devolve quantas linhas de carro × mês foram gravadas.
+    """
+    criticas = Critica.objects.all()
+    carros = Carro.objects.all()
+    linhas_antigas = AvaliacaoMensalCarro.objects.all()
+    if carro_ids is not None:
+        carro_ids = set(carro_ids)
+        if not carro_ids:
+            return 0
+        criticas = criticas.filter(carro_id__in=carro_ids)
+        carros = carros.filter(pk__in=carro_ids)
+        linhas_antigas = linhas_antigas.filter(carro_id__in=carro_ids)
+
+    linhas = (
+        criticas
+        .annotate(mes=TruncMonth("criado_em", output_field=DateField()))
+        .values("carro_id", "mes")
+        .annotate(total=Count("pk"), soma=Sum("avaliacao"))
+        .order_by()
+    )
+    with transaction.atomic():
+        linhas_antigas.delete()
+        gravadas = AvaliacaoMensalCarro.objects.bulk_create(
+            [AvaliacaoMensalCarro(**linha) for linha in linhas], batch_size=1000,
+        )
+        recalcular_marcas(
+            None if carro_ids is None else set(carros.values_list("marca", flat=True))
+        )
+    return len(gravadas)
+
+
+def recalcular_marcas(marcas=None):
+    """Refaz os meses das marcas (todas, se None) somando os dos carros."""
+    antigas = AvaliacaoMensalMarca.objects.all()
+    meses = AvaliacaoMensalCarro.objects.all()
+    if marcas is not None:
+        marcas = set(marcas)
+        if not marcas:
+            return
+        antigas = antigas.filter(marca__in=marcas)
+        meses = meses.filter(carro__marca__in=marcas)
+
+    linhas = (
+        meses.values("carro__marca", "mes")
+        .annotate(total=Sum("total"), soma=Sum("soma"))
+        .order_by()
+    )
+    with transaction.atomic():
+        antigas.delete()
+        AvaliacaoMensalMarca.objects.bulk_create([
+            AvaliacaoMensalMarca(marca=linha["carro__marca"], mes=linha["mes"],
+                                 total=linha["total"], soma=linha["soma"])
+            for linha in linhas if linha["total"]
+        ], batch_size=1000)
+
+
+# --------------------------------------------------
+# Leitura
+# --------------------------------------------------
+def _ler_mes(valor, parametro):
+    try:
+        ano, mes = valor.split("-")
+        return date(int(ano), int(mes), 1)
+    except ValueError:
+        raise ValueError(f"Parâmetro '{parametro}' deve estar no formato AAAA-MM.")
+
+
+def intervalo(params):
+    """
+    (primeiro, último) mês a partir de ?de=AAAA-MM&ate=AAAA-MM. Sem `ate`,
+    vai até o mês corrente; sem `de`, cobre os MESES_PADRAO meses até `ate`.
+    ValueError com a mensagem para o cliente se o intervalo for inválido.
+    """
+    ate = params.get("ate")
+    ate = _ler_mes(ate, "ate") if ate else mes_de(timezone.now())
+    de = params.get("de")
+    de = _ler_mes(de, "de") if de else _somar_meses(ate, 1 - MESES_PADRAO)
+    if de > ate:
+        raise ValueError("'de' deve ser anterior ou igual a 'ate'.")
+    if (ate.year - de.year) * 12 + ate.month - de.month >= MAX_MESES:
+        raise ValueError(f"Intervalo máximo de {MAX_MESES} meses.")
+    return de, ate
+
+
+def serie(meses, de, ate):
+    """
+    Série mês a mês (inclusive os meses sem críticas) de um queryset de
+    AvaliacaoMensalCarro/AvaliacaoMensalMarca, com total e média do período.
+    """
+    por_mes = {
+        linha["mes"]: linha
+        for linha in (
+            meses.filter(mes__range=(de, ate))
+            .values("mes").annotate(total=Sum("total"), soma=Sum("soma")).order_by()
+        )
+    }
+    pontos, total, soma = [], 0, 0
+    mes = de
+    while mes <= ate:
+        linha = por_mes.get(mes, {"total": 0, "soma": 0})
+        pontos.append({
+            "mes": mes.strftime("%Y-%m"),
+            "total": linha["total"],
+            "media": round(linha["soma"] / linha["total"], 3) if linha["total"] else None,
+        })
+        total += linha["total"]
+        soma += linha["soma"]
+        mes = _somar_meses(mes, 1)
+    return {
+        "de": de.strftime("%Y-%m"),
+        "ate": ate.strftime("%Y-%m"),
+        "total": total,
+        "media": round(soma / total, 3) if total else None,
+        "meses": pontos,
+    }
+
+
+def do_carro(carro_id, de, ate):
+    return {"carro": carro_id, **serie(AvaliacaoMensalCarro.objects.filter(carro_id=carro_id), de, ate)}
+
+
+def da_marca(marca, de, ate):
+    # a marca vem do cliente: "fiat" e "Fiat" são a mesma série
+    return {"marca": marca, **serie(AvaliacaoMensalMarca.objects.filter(marca__iexact=marca), de, ate)}
@@ -0,0 +1,107 @@
+# reviews/response_cache.py
+"""
+Cache de respostas de leitura para visitantes anônimos.
+
+Para quem não está logado a listagem/detalhe de críticas é igual para
+todos (liked_by_me é sempre False), então o `response.data` já serializado
+vai para o cache do Django, sob chave versionada (reviews/cache.py) com a
+view, a ação e os query params que mudam o resultado, normalizados.
+
+Qualquer escrita que aparece nessas respostas troca a versão: Critica,
+Carro, CarroImagem (sinais e caminhos em massa dos QuerySets) e likes.
+Requisições autenticadas não passam pelo cache; todas levam
+`Vary: Authorization` para que caches intermediários não misturem as duas.
+
+A troca de versão só chega a todos os workers com cache compartilhado
+(Redis). Com LocMem cada worker vê só as próprias escritas, então as
+entradas valem no máximo CACHE_TTL_LOCAL segundos (cache.ttl()).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from rest_framework.response import Response
+
+from . import cache as cache_versionado
+from .cache import resposta_condicional
+
+NAMESPACE = "respostas:criticas"
+TIMEOUT = 60 * 10       # com Redis a invalidação é explícita; o TTL só limita memória
+
+
+def invalidar_respostas():
+    cache_versionado.invalidar(NAMESPACE)
+    # um leitor concorrente pode regravar o estado anterior antes do commit
+    transaction.on_commit(lambda: cache_versionado.invalidar(NAMESPACE))
+
+
+def _normalizar(nome, valor):
+    if nome == "search":
+        return " ".join(valor.lower().split())
+    if nome == "ordering":
+        return ",".join(campo.strip() for campo in valor.split(",") if campo.strip())
+    if nome in ("fields", "omit"):
+        return ",".join(sorted({campo.strip() for campo in valor.split(",") if campo.strip()}))
+    if nome == "resumo":
+        return valor.strip().lower()
+    return valor.strip()
+
+
+class CacheAnonimoMixin:
+    """
+    Para ViewSets: list/retrieve de visitantes anônimos saem do cache.
+    Só os parâmetros de `cache_anonimo_params` entram na chave (os demais
+    não mudam a resposta e não podem ser usados para furar o cache).
+    """
+    cache_anonimo_params = (
+        "ordering", "search", "limit", "offset", "cursor", "my", "fields", "omit", "resumo",
+    )
+
+    def list(self, request, *args, **kwargs):
+        return self._resposta_anonima(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._resposta_anonima(request, super().retrieve, *args, **kwargs)
+
+    def _chave_anonima(self, request):
+        params = sorted(
+            (nome, _normalizar(nome, valor))
+            for nome in self.cache_anonimo_params
+            for valor in request.query_params.getlist(nome)
+        )
+        return cache_versionado.chave(
+            NAMESPACE, self.basename, self.action, self.kwargs.get(self.lookup_field, ""),
+            "&".join(f"{nome}={valor}" for nome, valor in params),
+        )
+
+    def _resposta_anonima(self, request, gerar, *args, **kwargs):
+        if request.user.is_authenticated:
+            return gerar(request, *args, **kwargs)
+
+        chave = self._chave_anonima(request)
+        guardada = cache.get(chave)
+        if guardada is not None:
+            dados, etag = guardada
+            # a ETag guardada vale enquanto a entrada vale (mesma invalidação)
+            response = resposta_condicional(request, etag) if etag else None
+            response = response or Response(dados)
+            if etag:
+                response["ETag"] = etag
+            response["X-Cache"] = "HIT"
+        else:
+            response = gerar(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(chave, (response.data, response.get("ETag")), cache_versionado.ttl(TIMEOUT))
+            response["X-Cache"] = "MISS"
+        patch_cache_control(
+            response, public=True, max_age=getattr(settings, "CACHE_ANONIMO_MAX_AGE", 30)
+        )
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ("GET", "HEAD"):
+            patch_vary_headers(response, ["Authorization"])
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True)
+        return response
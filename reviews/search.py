@@ -0,0 +1,187 @@
+# reviews/search.py
+"""
+Busca textual de críticas.
+
+  • SQLite     → tabela virtual FTS5 `reviews_critica_fts` (modelo não
+                 gerenciado CriticaIndiceBusca) com "marca modelo texto" de
+                 cada crítica, mantida por triggers em reviews_critica e
+                 reviews_carro. Busca e ranking (bm25) saem de um único JOIN.
+  • PostgreSQL → índice GIN sobre to_tsvector('portuguese', texto), com
+                 stemming em português; marca/modelo casam na tabela de
+                 carros (pequena), nunca via JOIN sobre as críticas.
+
+O FTS5 não traz stemmer de português: os termos viram prefixos ("motor"*)
+e os acentos são ignorados (unicode61 remove_diacritics).
+"""
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Carro
+
+FTS_TABLE = "reviews_critica_fts"
+PG_INDEX = "critica_texto_fts_idx"
+PG_CONFIG = "portuguese"
+
+_DOCUMENTO = "car.marca || ' ' || car.modelo || ' ' || c.texto"
+
+_SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON reviews_critica BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, documento)
+            SELECT c.id, {_DOCUMENTO} FROM reviews_critica c
+            JOIN reviews_carro car ON car.id = c.carro_id WHERE c.id = new.id;
+        END""",
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON reviews_critica BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END""",
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF texto, carro_id ON reviews_critica BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE}(rowid, documento)
+            SELECT c.id, {_DOCUMENTO} FROM reviews_critica c
+            JOIN reviews_carro car ON car.id = c.carro_id WHERE c.id = new.id;
+        END""",
+    f"{FTS_TABLE}_carro_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_carro_au AFTER UPDATE OF marca, modelo ON reviews_carro BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM reviews_critica WHERE carro_id = new.id);
+            INSERT INTO {FTS_TABLE}(rowid, documento)
+            SELECT c.id, {_DOCUMENTO} FROM reviews_critica c
+            JOIN reviews_carro car ON car.id = c.carro_id WHERE c.carro_id = new.id;
+        END""",
+}
+
+
+def instalar_indice_busca(conn=connection):
+    """
+    Cria (de forma idempotente) o índice de busca do banco atual.
+
+    No SQLite as triggers só existem fora das migrações: o pre_migrate as
+    remove (o "remake" de tabelas do SQLite quebraria com elas) e o
+    post_migrate chama esta função, que as recoloca e reconstrói o índice.
+    """
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "documento, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s)"
+                % ", ".join(["%s"] * len(_SQLITE_TRIGGERS)),
+                list(_SQLITE_TRIGGERS),
+            )
+            existentes = {linha[0] for linha in cursor.fetchall()}
+            for sql in _SQLITE_TRIGGERS.values():
+                cursor.execute(sql)
+            if existentes != set(_SQLITE_TRIGGERS):
+                reconstruir_indice_busca(conn)
+        elif conn.vendor == "postgresql":
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON reviews_critica "
+                f"USING GIN (to_tsvector('{PG_CONFIG}', texto))"
+            )
+
+
+def reconstruir_indice_busca(conn=connection):
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, documento) "
+            f"SELECT c.id, {_DOCUMENTO} FROM reviews_critica c "
+            "JOIN reviews_carro car ON car.id = c.carro_id"
+        )
+
+
+def remover_triggers_busca(conn=connection):
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        for nome in _SQLITE_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+
+
+def remover_indice_busca(conn=connection):
+    remover_triggers_busca(conn)
+    with conn.cursor() as cursor:
+        if conn.vendor == "sqlite":
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif conn.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+def suporta_full_text(conn=connection):
+    return conn.vendor in ("sqlite", "postgresql")
+
+
+# --------------------------------------------------
+# Montagem das consultas
+# --------------------------------------------------
+def _fts5_consulta(termos):
+    # cada termo vira frase entre aspas (escapa operadores do FTS5) com prefixo
+    return " AND ".join('"%s"*' % t.replace('"', '""') for t in termos)
+
+
+def _buscar_sqlite(queryset, termos):
+    queryset = queryset.filter(indice_busca__documento__match=_fts5_consulta(termos))
+    # bm25 é calculado pelo mesmo cursor FTS do JOIN (menor = melhor)
+    return queryset, RawSQL(f'-bm25("{FTS_TABLE}")', [], output_field=FloatField())
+
+
+def _buscar_postgresql(queryset, termos):
+    for termo in termos:
+        carros = Carro.objects.filter(
+            Q(marca__icontains=termo) | Q(modelo__icontains=termo)
+        ).values("pk")
+        texto = RawSQL(
+            "SELECT id FROM reviews_critica "
+            f"WHERE to_tsvector('{PG_CONFIG}', texto) @@ plainto_tsquery('{PG_CONFIG}', %s)",
+            [termo],
+        )
+        queryset = queryset.filter(Q(pk__in=texto) | Q(carro__in=carros))
+
+    consulta = " || ".join([f"plainto_tsquery('{PG_CONFIG}', %s)"] * len(termos))
+    relevancia = RawSQL(
+        f"ts_rank(to_tsvector('{PG_CONFIG}', reviews_critica.texto), {consulta})",
+        list(termos), output_field=FloatField(),
+    )
+    return queryset, relevancia
+
+
+def buscar_criticas(queryset, termos, ordenar_por_relevancia=True):
+    """
+    Todos os termos precisam casar com o texto ou com marca/modelo do carro.
+    Com `ordenar_por_relevancia`, o resultado vem pela relevância.
+    """
+    if connection.vendor == "sqlite":
+        queryset, relevancia = _buscar_sqlite(queryset, termos)
+    else:
+        queryset, relevancia = _buscar_postgresql(queryset, termos)
+
+    if ordenar_por_relevancia:
+        queryset = queryset.annotate(relevancia=relevancia)
+        queryset = queryset.order_by("-relevancia", *queryset.query.order_by)
+    return queryset
+
+
+class CriticaSearchFilter(filters.SearchFilter):
+    """
+    Mesmo parâmetro `?search=`, mas resolvido pelo índice full-text.
+    Sem `?ordering=` explícito, ordena por relevância. Em bancos sem
+    suporte cai no SearchFilter padrão (icontains em `search_fields`).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        termos = self.get_search_terms(request)
+        if not termos:
+            return queryset
+        if not suporta_full_text():
+            return super().filter_queryset(request, queryset, view)
+        return buscar_criticas(
+            queryset, termos,
+            ordenar_por_relevancia=not request.query_params.get("ordering"),
+        )
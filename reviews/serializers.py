@@ -1,41 +1,51 @@
 from rest_framework import serializers
-from .models import Carro, CarroImagem, Critica
+from . import likes
+from . import uploads
+from .authentication import filtro_por_email
+from .field_selection import CamposDinamicosMixin
+from .instrumentation import ListSerializerMedido, SerializacaoMedidaMixin
+from .models import Carro, CarroImagem, Critica, MarcaSeguida
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
 from rest_framework import serializers
 
-class CarroSerializer(serializers.ModelSerializer):
+class CarroSerializer(CamposDinamicosMixin, SerializacaoMedidaMixin, serializers.ModelSerializer):
     media_avaliacao = serializers.FloatField(read_only=True)
+    pontuacao = serializers.FloatField(read_only=True)   # só presente em /top/
     imagens = serializers.SerializerMethodField()
     imagem = serializers.SerializerMethodField()  # novo campo
+    imagem_thumb = serializers.SerializerMethodField()   # variante para cards/listas
 
     class Meta:
         model = Carro
         fields = ["id", "marca", "modelo", "ano",
-                  "media_avaliacao", "imagem", "imagens"]
+                  "media_avaliacao", "total_criticas", "pontuacao", "imagem", "imagem_thumb", "imagens"]
+        list_serializer_class = ListSerializerMedido
 
+    # Todos leem o prefetch de `imagens` feito por CarroViewSet e as URLs
+    # guardadas em CarroImagem (nenhuma chamada ao storage).
     def get_imagens(self, obj):
-        return [im.foto.url for im in obj.imagens.all()]
+        return [im.url for im in obj.imagens_disponiveis()]
 
     def get_imagem(self, obj):
-        img = obj.imagens.filter(tipo='EX').first() or obj.imagens.first()
-        return img.foto.url if img else None
+        img = obj.imagem_capa()
+        return img.url if img else None
 
+    def get_imagem_thumb(self, obj):
+        img = obj.imagem_capa()
+        return img.urls_variantes.get("thumb", img.url) if img else None
 
 
 
-class CriticaSerializer(serializers.ModelSerializer):
+
+class CriticaSerializer(CamposDinamicosMixin, SerializacaoMedidaMixin, serializers.ModelSerializer):
     usuario_nome = serializers.SerializerMethodField()
     carro_nome = serializers.SerializerMethodField()
     carro_marca = serializers.SerializerMethodField()
     carro_ano = serializers.SerializerMethodField()
     carro_imagem = serializers.SerializerMethodField()
-    total_likes = serializers.IntegerField(
-        source='liked_users.count',
-        read_only=True
-    )
     liked_by_me = serializers.SerializerMethodField()
 
     class Meta:
@@ -46,7 +56,8 @@ class CriticaSerializer(serializers.ModelSerializer):
             "avaliacao", "texto", "criado_em",
             "total_likes", "liked_by_me"
         ]
-        read_only_fields = ["usuario", "criado_em"]
+        read_only_fields = ["usuario", "criado_em", "total_likes"]
+        list_serializer_class = ListSerializerMedido
         extra_kwargs = {
             "carro": {"write_only": True}
         }
@@ -80,15 +91,39 @@ class CriticaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("A avaliação deve ser entre 1 e 5.")
         return value
 
+    # Em listas, CriticaViewSet.get_serializer já resolveu "curti?" em lote
+    # (ids_curtidos); o fallback cobre o serializer de um objeto só.
     def get_liked_by_me(self, obj):
-        user = self.context['request'].user
-        if user.is_authenticated:
-            return obj.liked_users.filter(pk=user.pk).exists()
-        return False
+        ids_curtidos = self.context.get("ids_curtidos")
+        if ids_curtidos is not None:
+            return obj.pk in ids_curtidos
+        # ids_curtidos também vê os likes ainda pendentes (LIKES_WRITE_BEHIND)
+        return obj.pk in likes.ids_curtidos(self.context['request'].user, [obj.pk])
 
     def get_carro_imagem(self, obj):
-        img = obj.carro.imagens.filter(tipo='EX').first() or obj.carro.imagens.first()
-        return img.foto.url if img else None
+        img = obj.carro.imagem_capa()
+        return img.url if img else None
+
+
+class MarcaSeguidaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MarcaSeguida
+        fields = ["id", "marca", "criado_em"]
+
+    def validate_marca(self, value):
+        # grafia do catálogo: o fan-out do feed compara a marca exata
+        marca = (
+            Carro.objects.filter(marca__iexact=value.strip())
+            .values_list("marca", flat=True).first()
+        )
+        if marca is None:
+            raise serializers.ValidationError("Marca não encontrada no catálogo.")
+        if MarcaSeguida.objects.filter(usuario=self.context["request"].user, marca=marca).exists():
+            raise serializers.ValidationError("Você já segue esta marca.")
+        return marca
+
+    def create(self, validated_data):
+        return MarcaSeguida.objects.create(usuario=self.context["request"].user, **validated_data)
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -97,6 +132,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password']
         extra_kwargs = {'password': {'write_only': True}}
 
+    def validate_email(self, value):
+        # índice único em LOWER(email) (migração 0013): responde 400, não IntegrityError
+        if value and User.objects.filter(filtro_por_email(value)).exists():
+            raise serializers.ValidationError("Já existe um usuário com este e-mail.")
+        return value
+
     def create(self, validated_data):
         return User.objects.create_user(**validated_data)
 
@@ -108,21 +149,9 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
     
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
-        # Pega o campo que o usuário enviou como 'username' no Angular
-        username_or_email = attrs.get('username')
-        password = attrs.get('password')
-
-        # lógica para permitir login com email (que está ótima)
-        if '@' in username_or_email:
-            try:
-                # Encontra o usuário pelo email
-                user = User.objects.get(email__iexact=username_or_email) 
-                # Substitui o email pelo username correspondente para a autenticação padrão
-                attrs['username'] = user.username
-            except User.DoesNotExist:
-                # Se não encontrar, a validação padrão abaixo irá falhar, o que é o esperado
-                pass
-        
+        # O campo 'username' enviado pelo Angular pode ser o username ou o
+        # e-mail: quem resolve é o EmailOuUsernameBackend (reviews/authentication.py),
+        # numa única query indexada.
         # 1. Chama o metodo original para obter os tokens
         # Ele autentica o usuário e retorna {'access': '...', 'refresh': '...'}
         data = super().validate(attrs)
@@ -139,6 +168,35 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
     
 class CarroImagemSerializer(serializers.ModelSerializer):
+    """
+    O upload não vai ao storage na requisição: a foto recebida é validada,
+    gravada no staging local e processada em segundo plano (reviews/uploads.py).
+    `foto` continua vazia (ou com a anterior) até `status` virar "OK".
+    """
     class Meta:
         model = CarroImagem
-        fields = ["id", "carro", "tipo", "foto"]
\ No newline at end of file
+        fields = ["id", "carro", "tipo", "foto", "status", "url", "urls_variantes", "erro"]
+        read_only_fields = ["status", "url", "urls_variantes", "erro"]
+        extra_kwargs = {"foto": {"required": True, "allow_null": False}}
+
+    def create(self, validated_data):
+        arquivo = validated_data.pop("foto")
+        imagem = CarroImagem(**validated_data)
+        uploads.receber(imagem, arquivo)
+        imagem.save()
+        uploads.agendar(imagem.pk)
+        return imagem
+
+    def update(self, instance, validated_data):
+        arquivo = validated_data.pop("foto", None)
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        campos = list(validated_data)
+        if arquivo is not None:
+            uploads.receber(instance, arquivo)
+            campos += ["arquivo_pendente", "status", "erro"]
+        # só os campos alterados: não desfaz foto/variantes gravadas por um worker
+        instance.save(update_fields=campos)
+        if arquivo is not None:
+            uploads.agendar(instance.pk)
+        return instance
\ No newline at end of file
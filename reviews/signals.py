@@ -0,0 +1,257 @@
+# reviews/signals.py
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import m2m_changed, pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import feed
+from . import leaderboard as ranking
+from . import rating_trends
+from . import uploads
+from .authentication import invalidar_usuario
+from .facets import invalidar_facetas
+from .likes import recontar as recontar_likes
+from .models import Carro, CarroImagem, Critica, MarcaSeguida
+from .response_cache import invalidar_respostas
+from .search import instalar_indice_busca, remover_triggers_busca
+
+
+# --------------------------------------------------
+# Agregados de avaliação do Carro
+# --------------------------------------------------
+@receiver(pre_save, sender=Critica)
+def guardar_avaliacao_anterior(sender, instance, **kwargs):
+    """Lembra carro/nota/data antigos para que o post_save aplique só o delta."""
+    instance._avaliacao_anterior = None
+    if instance.pk and not instance._state.adding:
+        instance._avaliacao_anterior = (
+            Critica.objects.filter(pk=instance.pk)
+            .values_list("carro_id", "avaliacao", "criado_em")
+            .first()
+        )
+
+
+def _registrar(carro_id, histograma):
+    """
+    Aplica o delta ({nota: +1/-1}) nas colunas do Carro (totais e
+    histograma) e no ranking em cache.
+    """
+    delta_total = sum(histograma.values())
+    delta_soma = sum(nota * delta for nota, delta in histograma.items())
+    Carro.objects.filter(pk=carro_id).registrar_avaliacao(delta_total, delta_soma, histograma)
+    ranking.registrar_delta(carro_id, delta_total, delta_soma)
+
+
+@receiver(post_save, sender=Critica)
+def atualizar_agregados_ao_salvar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, "_avaliacao_anterior", None)
+    if created or anterior is None:
+        _registrar(instance.carro_id, {instance.avaliacao: 1})
+        return
+
+    carro_antigo, nota_antiga, _ = anterior
+    if carro_antigo != instance.carro_id:
+        _registrar(carro_antigo, {nota_antiga: -1})
+        _registrar(instance.carro_id, {instance.avaliacao: 1})
+    elif nota_antiga != instance.avaliacao:
+        _registrar(instance.carro_id, {nota_antiga: -1, instance.avaliacao: 1})
+
+
+@receiver(post_delete, sender=Critica)
+def atualizar_agregados_ao_excluir(sender, instance, **kwargs):
+    _registrar(instance.carro_id, {instance.avaliacao: -1})
+
+
+# --------------------------------------------------
+# Tendência mensal (reviews/rating_trends.py)
+# --------------------------------------------------
+@receiver(post_save, sender=Critica)
+def atualizar_tendencia_ao_salvar(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, "_avaliacao_anterior", None)
+    if not created and anterior is not None:
+        if anterior == (instance.carro_id, instance.avaliacao, instance.criado_em):
+            return
+        carro_antigo, nota_antiga, criado_antigo = anterior
+        rating_trends.registrar(carro_antigo, criado_antigo, -1, -nota_antiga)
+        if (carro_antigo, nota_antiga) == (instance.carro_id, instance.avaliacao):
+            # só a data mudou: os agregados não tocaram o carro (ETag da tendência)
+            Carro.objects.filter(pk=instance.carro_id).update()
+    rating_trends.registrar(instance.carro_id, instance.criado_em, 1, instance.avaliacao)
+
+
+@receiver(post_delete, sender=Critica)
+def atualizar_tendencia_ao_excluir(sender, instance, **kwargs):
+    rating_trends.registrar(instance.carro_id, instance.criado_em, -1, -instance.avaliacao)
+
+
+@receiver(pre_save, sender=Carro)
+def guardar_marca_anterior(sender, instance, **kwargs):
+    instance._marca_anterior = None
+    if instance.pk and not instance._state.adding:
+        instance._marca_anterior = (
+            Carro.objects.filter(pk=instance.pk).values_list("marca", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Carro)
+def mover_tendencia_da_marca(sender, instance, raw=False, **kwargs):
+    anterior = getattr(instance, "_marca_anterior", None)
+    if not raw and anterior is not None and anterior != instance.marca:
+        rating_trends.recalcular_marcas({anterior, instance.marca})
+
+
+# --------------------------------------------------
+# Contador de likes
+# --------------------------------------------------
+@receiver(m2m_changed, sender=Critica.liked_users.through)
+def recontar_likes_da_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    reviews/likes.py já mantém total_likes; isto cobre quem mexe direto na
+    M2M (admin, liked_users.add/remove/clear, user.liked_reviews...).
+    """
+    if action == "pre_clear" and reverse:
+        # user.liked_reviews.clear(): guarda quais críticas serão afetadas
+        instance._criticas_curtidas = list(instance.liked_reviews.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            recontar_likes([instance.pk])
+        else:
+            recontar_likes(pk_set or getattr(instance, "_criticas_curtidas", []))
+
+
+# --------------------------------------------------
+# Feed por usuário (reviews/feed.py)
+# --------------------------------------------------
+@receiver(post_save, sender=Critica)
+def distribuir_critica_no_feed(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, "_avaliacao_anterior", None)
+    if created or anterior is None:
+        feed.distribuir([instance])
+        feed.incluir_carros(instance.usuario_id, [instance.carro_id])
+    elif anterior[0] != instance.carro_id:
+        feed.mover(instance)
+        feed.incluir_carros(instance.usuario_id, [instance.carro_id])
+        feed.revisar(instance.usuario_id, [anterior[0]])
+
+
+@receiver(pre_delete, sender=Critica)
+def guardar_curtidores(sender, instance, **kwargs):
+    """Os likes somem junto com a crítica: quem curtiu pode perder o interesse."""
+    instance._curtidores = list(instance.liked_users.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Critica)
+def revisar_feed_ao_excluir(sender, instance, **kwargs):
+    for usuario_id in {instance.usuario_id, *getattr(instance, "_curtidores", [])}:
+        feed.revisar(usuario_id, [instance.carro_id])
+
+
+@receiver(m2m_changed, sender=Critica.liked_users.through)
+def atualizar_feed_das_curtidas(sender, instance, action, reverse, pk_set, **kwargs):
+    """likes.py já ajusta o feed; isto cobre quem mexe direto na M2M."""
+    if action == "pre_clear":
+        instance._feed_antes_do_clear = (
+            list(instance.liked_reviews.values_list("pk", flat=True)) if reverse
+            else list(instance.liked_users.values_list("pk", flat=True))
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_feed_antes_do_clear", [])
+    operacao = feed.incluir_carros if action == "post_add" else feed.revisar
+    if not reverse:
+        for usuario_id in pk_set:
+            operacao(usuario_id, [instance.carro_id])
+    else:
+        carros = Critica.objects.filter(pk__in=pk_set).values_list("carro_id", flat=True)
+        operacao(instance.pk, set(carros))
+
+
+@receiver(post_save, sender=MarcaSeguida)
+def incluir_marca_no_feed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        feed.incluir_marca(instance.usuario_id, instance.marca)
+
+
+@receiver(post_delete, sender=MarcaSeguida)
+def revisar_feed_da_marca(sender, instance, **kwargs):
+    carros = Carro.objects.filter(marca=instance.marca).values_list("pk", flat=True)
+    feed.revisar(instance.usuario_id, set(carros))
+
+
+# --------------------------------------------------
+# Cache de facetas do catálogo
+# --------------------------------------------------
+@receiver(post_save, sender=Carro)
+@receiver(post_delete, sender=Carro)
+def invalidar_facetas_do_catalogo(sender, **kwargs):
+    invalidar_facetas()
+
+
+@receiver(post_delete, sender=Carro)
+def invalidar_ranking_do_carro(sender, **kwargs):
+    ranking.invalidar_ranking()
+
+
+@receiver(post_save, sender=CarroImagem)
+@receiver(post_delete, sender=CarroImagem)
+def tocar_carro_da_imagem(sender, instance, **kwargs):
+    """Imagens fazem parte da representação do carro (ETag por atualizado_em)."""
+    Carro.objects.filter(pk=instance.carro_id).update(atualizado_em=timezone.now())
+
+
+@receiver(post_delete, sender=CarroImagem)
+def descartar_upload_pendente(sender, instance, **kwargs):
+    """Upload ainda não processado: o arquivo do staging não tem mais dono."""
+    uploads.descartar(instance)
+
+
+# --------------------------------------------------
+# Cache de respostas anônimas de críticas
+# --------------------------------------------------
+@receiver(post_save, sender=Critica)
+@receiver(post_delete, sender=Critica)
+@receiver(post_save, sender=Carro)
+@receiver(post_delete, sender=Carro)
+@receiver(post_save, sender=CarroImagem)
+@receiver(post_delete, sender=CarroImagem)
+def invalidar_respostas_de_criticas(sender, **kwargs):
+    invalidar_respostas()
+
+
+# --------------------------------------------------
+# Snapshot do usuário da autenticação JWT (reviews/authentication.py)
+# --------------------------------------------------
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidar_snapshot_do_usuario(sender, instance, **kwargs):
+    invalidar_usuario(instance.pk)
+
+
+if apps.is_installed("rest_framework_simplejwt.token_blacklist"):
+    @receiver(post_save, sender="token_blacklist.BlacklistedToken")
+    def invalidar_snapshot_ao_revogar(sender, instance, **kwargs):
+        invalidar_usuario(instance.token.user_id)
+
+
+# --------------------------------------------------
+# Índice de busca textual
+# --------------------------------------------------
+def suspender_indice_busca(sender, using, plan=None, **kwargs):
+    """pre_migrate: tira as triggers do FTS5 se há migrações a aplicar."""
+    if plan:
+        remover_triggers_busca(connections[using])
+
+
+def reinstalar_indice_busca(sender, using, **kwargs):
+    """post_migrate: recoloca as triggers e reconstrói o índice se preciso."""
+    instalar_indice_busca(connections[using])
@@ -2,7 +2,28 @@
 import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework_simplejwt.tokens import RefreshToken
+from reviews import throttling
+from reviews.authentication import snapshots_locais
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    """O LocMemCache vive no processo: cada teste começa sem dados em cache."""
+    cache.clear()
+    snapshots_locais.limpar()
+    throttling.limpar()
+    yield
+    cache.clear()
+    snapshots_locais.limpar()
+    throttling.limpar()
+
+
+@pytest.fixture(autouse=True)
+def hasher_rapido(settings):
+    """PBKDF2 custa centenas de ms por senha; nos testes o custo do hash não importa."""
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 
 
 @pytest.fixture
@@ -27,3 +48,15 @@ def usuario_autenticado(db):
     )
     refresh = RefreshToken.for_user(user)
     return {"user": user, "token": str(refresh.access_token)}
+
+
+@pytest.fixture
+def storage_local(settings, tmp_path):
+    """Troca o Cloudinary por FileSystemStorage em diretório temporário."""
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_URL = "/media/"
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    }
+    return tmp_path
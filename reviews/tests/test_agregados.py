@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def autor(db):
+    return User.objects.create_user(username="autor", password="senha123")
+
+
+def _agregados(carro):
+    carro.refresh_from_db()
+    return carro.total_criticas, carro.soma_avaliacoes, carro.media_avaliacao
+
+
+@pytest.mark.django_db
+def test_agregados_acompanham_criar_editar_excluir(autor):
+    carro = Carro.objects.create(marca="Mazda", modelo="RX-7", ano=1993)
+    assert _agregados(carro) == (0, 0, None)
+
+    c1 = Critica.objects.create(usuario=autor, carro=carro, avaliacao=5, texto="a")
+    c2 = Critica.objects.create(usuario=autor, carro=carro, avaliacao=2, texto="b")
+    assert _agregados(carro) == (2, 7, 3.5)
+
+    c2.avaliacao = 4
+    c2.save()
+    assert _agregados(carro) == (2, 9, 4.5)
+
+    c1.delete()
+    assert _agregados(carro) == (1, 4, 4.0)
+
+    c2.delete()
+    assert _agregados(carro) == (0, 0, None)
+
+
+@pytest.mark.django_db
+def test_trocar_carro_da_critica_move_agregados(autor):
+    origem = Carro.objects.create(marca="Mazda", modelo="MX-5", ano=1990)
+    destino = Carro.objects.create(marca="Mazda", modelo="MX-5", ano=1998)
+    critica = Critica.objects.create(usuario=autor, carro=origem, avaliacao=3, texto="x")
+
+    critica.carro = destino
+    critica.save()
+    assert _agregados(origem) == (0, 0, None)
+    assert _agregados(destino) == (1, 3, 3.0)
+
+
+@pytest.mark.django_db
+def test_caminhos_em_massa_mantem_agregados(autor):
+    carro = Carro.objects.create(marca="Nissan", modelo="Skyline", ano=1999)
+    outro = Carro.objects.create(marca="Nissan", modelo="Silvia", ano=1999)
+
+    Critica.objects.bulk_create([
+        Critica(usuario=autor, carro=carro, avaliacao=n, texto="bulk") for n in (1, 2, 3)
+    ])
+    assert _agregados(carro) == (3, 6, 2.0)
+
+    Critica.objects.filter(carro=carro).update(avaliacao=5)
+    assert _agregados(carro) == (3, 15, 5.0)
+
+    Critica.objects.filter(carro=carro, pk__in=Critica.objects.filter(carro=carro).values("pk")[:1]).update(carro=outro)
+    assert _agregados(carro) == (2, 10, 5.0)
+    assert _agregados(outro) == (1, 5, 5.0)
+
+    Critica.objects.filter(carro__in=[carro, outro]).delete()
+    assert _agregados(carro) == (0, 0, None)
+    assert _agregados(outro) == (0, 0, None)
+
+
+@pytest.mark.django_db
+def test_comando_recalcula_agregados_divergentes(autor):
+    carro = Carro.objects.create(marca="Honda", modelo="NSX", ano=1991)
+    Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto="ok")
+    Carro.objects.filter(pk=carro.pk).update(total_criticas=99, soma_avaliacoes=1, media_avaliacao=0)
+
+    call_command("recalcular_avaliacoes", carro=[carro.pk])
+    assert _agregados(carro) == (1, 4, 4.0)
+
+
+@pytest.mark.django_db
+def test_top_usa_agregados(api_client, usuario_autenticado, autor):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    carro = Carro.objects.create(marca="Zeta", modelo="Unico", ano=2030)
+    Critica.objects.create(usuario=autor, carro=carro, avaliacao=5, texto="nota máxima")
+    Critica.objects.create(usuario=autor, carro=carro, avaliacao=5, texto="de novo")
+
+    resp = api_client.get("/api/cars/top/?n=50")
+    assert resp.status_code == 200
+    ids = [c["id"] for c in resp.data]
+    assert ids.count(carro.id) == 1            # sem duplicar linhas por JOIN
+    item = next(c for c in resp.data if c["id"] == carro.id)
+    assert item["media_avaliacao"] == 5.0
+    assert item["total_criticas"] == 2
@@ -0,0 +1,52 @@
+# reviews/tests/test_asgi.py
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def catalogo(db, storage_local, usuario_autenticado):
+    autor = User.objects.create_user(username="autor_asgi", password="x")
+    carros = [Carro.objects.create(marca=f"Asgi{i % 2}", modelo=f"M{i}", ano=2000 + i) for i in range(4)]
+    for i in range(6):
+        Critica.objects.create(usuario=autor, carro=carros[i % 4], avaliacao=1 + i % 5, texto=f"asgi {i}")
+    return carros
+
+
+def _get_asgi(url, token=None, **headers):
+    """GET pelo handler ASGI do Django (o que o uvicorn usa)."""
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return async_to_sync(AsyncClient().get)(url, headers=headers)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url, autenticado", [
+    ("/api/cars/?limit=2&ordering=marca,-ano", True),
+    ("/api/cars/facetas/", True),
+    ("/api/reviews/?limit=3&cursor=", True),
+    ("/api/reviews/?search=asgi", False),
+])
+def test_mesmas_rotas_e_cabecalhos_no_asgi(api_client, usuario_autenticado, catalogo, url, autenticado):
+    token = usuario_autenticado["token"] if autenticado else None
+    if token:
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    wsgi = api_client.get(url)
+    asgi = _get_asgi(url, token)
+    assert asgi.status_code == wsgi.status_code == 200
+    assert asgi.json() == wsgi.json()
+    for cabecalho in ("ETag", "Vary", "Cache-Control"):
+        assert asgi.get(cabecalho) == wsgi.get(cabecalho)
+
+    etag = asgi["ETag"]
+    revalidada = _get_asgi(url, token, **{"If-None-Match": etag})
+    assert revalidada.status_code == 304
+
+
+@pytest.mark.django_db
+def test_exige_login_no_asgi(catalogo):
+    resp = _get_asgi("/api/cars/", token="nao-e-um-jwt")
+    assert resp.status_code == 401 and resp["WWW-Authenticate"].startswith("Bearer")
+
@@ -0,0 +1,85 @@
+# reviews/tests/test_autenticacao.py
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews import authentication
+from reviews.authentication import CachedJWTAuthentication, snapshots_locais
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+def _queries_em_auth_user(client, url="/api/cars/?limit=1"):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    return resp, [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_usuario_vem_do_snapshot(cliente, monkeypatch):
+    monkeypatch.setattr(authentication, "compartilhado", lambda: True)     # Redis
+    resp, sqls = _queries_em_auth_user(cliente)
+    assert resp.status_code == 200 and len(sqls) == 1
+    resp, sqls = _queries_em_auth_user(cliente)
+    assert resp.status_code == 200 and sqls == []
+
+    # só o cache de processo expirou: o cache do Django ainda responde
+    snapshots_locais.limpar()
+    resp, sqls = _queries_em_auth_user(cliente)
+    assert resp.status_code == 200 and sqls == []
+
+
+@pytest.mark.django_db
+def test_sem_cache_compartilhado_so_usa_o_processo(cliente, usuario_autenticado):
+    # LocMem: um snapshot de 300s aqui não seria invalidado pelos outros workers
+    resp, sqls = _queries_em_auth_user(cliente)
+    assert resp.status_code == 200 and len(sqls) == 1
+    assert cache.get(authentication._chave(usuario_autenticado["user"].pk)) is None
+
+    snapshots_locais.limpar()       # expirou o TTL local: volta ao banco
+    resp, sqls = _queries_em_auth_user(cliente)
+    assert resp.status_code == 200 and len(sqls) == 1
+
+
+@pytest.mark.django_db
+def test_desativar_usuario_invalida_snapshot(cliente, usuario_autenticado):
+    assert cliente.get("/api/cars/").status_code == 200
+    user = usuario_autenticado["user"]
+    user.is_active = False
+    user.save()
+    assert cliente.get("/api/cars/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_usuario_excluido_perde_acesso(cliente, usuario_autenticado):
+    assert cliente.get("/api/cars/").status_code == 200
+    usuario_autenticado["user"].delete()
+    assert cliente.get("/api/cars/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_snapshot_sem_senha_e_seguro_para_salvar(usuario_autenticado):
+    auth = CachedJWTAuthentication()
+    user = auth.get_user(AccessToken(usuario_autenticado["token"]))
+    assert user.pk == usuario_autenticado["user"].pk
+    assert "password" in user.get_deferred_fields()
+
+    user.first_name = "Novo"
+    user.save()
+    recarregado = User.objects.get(pk=user.pk)
+    assert recarregado.first_name == "Novo"
+    assert recarregado.check_password("senha123")
+
+
+@pytest.mark.django_db
+def test_desligado_consulta_o_banco(cliente, settings):
+    settings.JWT_CACHE_USUARIO = False
+    cliente.get("/api/cars/")
+    _, sqls = _queries_em_auth_user(cliente)
+    assert len(sqls) == 1
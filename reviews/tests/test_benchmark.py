@@ -0,0 +1,62 @@
+# reviews/tests/test_benchmark.py
+import json
+
+import pytest
+from django.core.management import call_command
+from reviews import feed
+from reviews.benchmark import GeradorDeDados, cliente_autenticado, executar_cenario
+from reviews.models import Carro, CarroImagem, Critica
+
+
+@pytest.mark.django_db
+def test_gerador_mantem_agregados_e_contadores(storage_local):   # as imagens guardam a URL
+    dados = GeradorDeDados(seed=1, lote=50, prefixo="t_bench")
+    dados.gerar_usuarios(5)
+    dados.gerar_carros(4, imagens_por_carro=2)
+    dados.gerar_criticas(120)
+    dados.gerar_likes(dados.criticas_ids, media_por_critica=1.5)
+
+    assert len(dados.criticas_ids) == 120
+    assert CarroImagem.objects.filter(carro__in=dados.carros).count() == 8
+    carros = Carro.objects.filter(pk__in=[c.pk for c in dados.carros])
+    assert sum(c.total_criticas for c in carros) == 120
+    for critica in Critica.objects.filter(pk__in=dados.criticas_ids[:20]):
+        assert critica.total_likes == critica.liked_users.count()
+
+
+@pytest.mark.django_db
+def test_comando_benchmark_grava_e_compara(tmp_path, capsys):
+    saida = tmp_path / "bench.json"
+    opcoes = dict(
+        carros=5, usuarios=3, escalas=[20, 40], iteracoes=2, aquecimento=0,
+        cenarios=["carros", "top", "like_unlike"],
+    )
+    call_command("benchmark", json=str(saida), **opcoes)
+
+    resultado = json.loads(saida.read_text())
+    assert set(resultado["escalas"]) == {"20", "40"}
+    medidas = resultado["escalas"]["40"]["like_unlike"]
+    assert {"p50_ms", "p99_ms", "rps", "queries_media"} <= set(medidas)
+    assert medidas["requisicoes"] == 2
+    # tudo desfeito no final
+    assert not Critica.objects.filter(usuario__username__startswith="bench_").exists()
+
+    call_command("benchmark", comparar=str(saida), **opcoes)
+    assert "Comparação com" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_on_commit_entra_na_medida(monkeypatch, settings):
+    settings.LIKES_WRITE_BEHIND = False
+    dados = GeradorDeDados(seed=3, prefixo="t_commit")
+    dados.gerar_usuarios(2)
+    dados.gerar_carros(1)
+    dados.gerar_criticas(2)
+    ajustes = []
+    monkeypatch.setattr(feed, "incluir_carros", lambda usuario_id, carros: ajustes.append(usuario_id))
+
+    cliente = cliente_autenticado(dados.usuarios[0])
+    alvo = dados.criticas_ids[0]
+    executar_cenario(cliente, lambda i: ("post", f"/api/reviews/{alvo}/like/"), iteracoes=1)
+    # o teste roda dentro de uma transação: sem a captura o callback ficaria pendente
+    assert ajustes == [dados.usuarios[0].pk]
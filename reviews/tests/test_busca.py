@@ -0,0 +1,71 @@
+# reviews/tests/test_busca.py
+import pytest
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def criticas_busca(usuario_autenticado):
+    user = usuario_autenticado["user"]
+    civic = Carro.objects.create(marca="Hondix", modelo="Civicão", ano=2001)
+    gol = Carro.objects.create(marca="Volkix", modelo="Golzinho", ano=2002)
+    return {
+        "motor": Critica.objects.create(usuario=user, carro=civic, avaliacao=5,
+                                        texto="Motor valente, desempenho ótimo e câmbio preciso."),
+        "consumo": Critica.objects.create(usuario=user, carro=gol, avaliacao=3,
+                                          texto="Consumo baixo; desempenho fraco na estrada."),
+        "repetida": Critica.objects.create(usuario=user, carro=gol, avaliacao=4,
+                                           texto="Desempenho, desempenho, desempenho! Desempenho de sobra."),
+    }
+
+
+def _ids(api_client, url):
+    resp = api_client.get(url)
+    assert resp.status_code == 200
+    return [item["id"] for item in resp.data["results"]]
+
+
+@pytest.mark.django_db
+def test_busca_full_text_ignora_acentos_e_aceita_prefixo(api_client, criticas_busca):
+    assert _ids(api_client, "/api/reviews/?search=cambio") == [criticas_busca["motor"].id]
+    assert _ids(api_client, "/api/reviews/?search=valent") == [criticas_busca["motor"].id]
+
+
+@pytest.mark.django_db
+def test_busca_combina_texto_e_carro(api_client, criticas_busca):
+    # "golzinho" casa pelo modelo do carro, "estrada" pelo texto
+    assert _ids(api_client, "/api/reviews/?search=golzinho estrada") == [criticas_busca["consumo"].id]
+    assert set(_ids(api_client, "/api/reviews/?search=volkix")) == {
+        criticas_busca["consumo"].id, criticas_busca["repetida"].id,
+    }
+
+
+@pytest.mark.django_db
+def test_busca_ordena_por_relevancia_sem_ordering(api_client, criticas_busca):
+    ids = _ids(api_client, "/api/reviews/?search=desempenho")
+    assert len(ids) == 3
+    assert ids[0] == criticas_busca["repetida"].id
+
+    ids = _ids(api_client, "/api/reviews/?search=desempenho&ordering=-avaliacao")
+    assert ids == [criticas_busca[k].id for k in ("motor", "repetida", "consumo")]
+
+
+@pytest.mark.django_db
+def test_indice_acompanha_edicao_e_exclusao(api_client, criticas_busca):
+    critica = criticas_busca["motor"]
+    critica.texto = "Suspensão macia"
+    critica.save()
+    assert _ids(api_client, "/api/reviews/?search=cambio") == []
+    assert _ids(api_client, "/api/reviews/?search=suspensao") == [critica.id]
+
+    Critica.objects.filter(pk=critica.pk).delete()
+    assert _ids(api_client, "/api/reviews/?search=suspensao") == []
+
+
+@pytest.mark.django_db
+def test_busca_com_cursor(api_client, criticas_busca):
+    resp = api_client.get("/api/reviews/?search=desempenho&cursor=&limit=2")
+    ids = [item["id"] for item in resp.data["results"]]
+    resp = api_client.get(resp.data["next"])
+    ids += [item["id"] for item in resp.data["results"]]
+    assert resp.data["next"] is None
+    assert ids == _ids(api_client, "/api/reviews/?search=desempenho")
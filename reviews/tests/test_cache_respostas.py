@@ -0,0 +1,96 @@
+# reviews/tests/test_cache_respostas.py
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import cache as cache_versionado
+from reviews import response_cache
+from reviews.models import Carro, CarroImagem, Critica
+
+
+@pytest.fixture
+def critica(db, storage_local):
+    autor = User.objects.create_user(username="autor_cache", password="x")
+    carro = Carro.objects.create(marca="Cachex", modelo="C", ano=2003)
+    return Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto="primeira")
+
+
+def _get(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return resp, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_leitura_anonima_vem_do_cache_sem_queries(api_client, critica):
+    primeira, _ = _get(api_client, "/api/reviews/?ordering=-criado_em")
+    segunda, queries = _get(api_client, "/api/reviews/?ordering=-criado_em&utm=x")
+
+    assert primeira["X-Cache"] == "MISS"
+    assert segunda["X-Cache"] == "HIT"
+    assert queries == 0
+    assert segunda.data == primeira.data
+    assert "public" in segunda["Cache-Control"] and "max-age=" in segunda["Cache-Control"]
+    assert "Authorization" in segunda["Vary"]
+
+
+@pytest.mark.django_db
+def test_busca_normalizada_compartilha_entrada(api_client, critica):
+    _get(api_client, "/api/reviews/?search=Cachex")
+    resp, _ = _get(api_client, "/api/reviews/?search=%20%20cachex%20")
+    assert resp["X-Cache"] == "HIT"
+    # parâmetros relevantes diferentes → outra entrada
+    resp, _ = _get(api_client, "/api/reviews/?search=cachex&limit=1")
+    assert resp["X-Cache"] == "MISS"
+
+
+@pytest.mark.django_db
+def test_autenticado_nao_usa_cache(api_client, usuario_autenticado, critica):
+    _get(api_client, "/api/reviews/")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    resp, queries = _get(api_client, "/api/reviews/")
+    assert "X-Cache" not in resp
+    assert queries > 0
+    assert "private" in resp["Cache-Control"]
+    assert "Authorization" in resp["Vary"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("escrita", ["critica", "carro", "imagem", "like", "bulk"])
+def test_escritas_invalidam(api_client, critica, escrita):
+    url = f"/api/reviews/{critica.id}/"
+    _get(api_client, url)
+    assert _get(api_client, url)[0]["X-Cache"] == "HIT"
+
+    if escrita == "critica":
+        critica.texto = "editada"
+        critica.save()
+    elif escrita == "carro":
+        Carro.objects.filter(pk=critica.carro_id).update(modelo="Novo")
+    elif escrita == "imagem":
+        CarroImagem.objects.create(carro=critica.carro, tipo=CarroImagem.EXTERIOR, foto="carros/c.jpg")
+    elif escrita == "like":
+        fa = User.objects.create_user(username="fa_cache", password="x")
+        critica.liked_users.add(fa)
+    else:
+        Critica.objects.filter(pk=critica.pk).update(texto="em massa")
+
+    resp, _ = _get(api_client, url)
+    assert resp["X-Cache"] == "MISS"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compartilhado, esperado", [(False, 5), (True, response_cache.TIMEOUT)])
+def test_ttl_curto_sem_cache_compartilhado(api_client, critica, settings, monkeypatch,
+                                           compartilhado, esperado):
+    # LocMem: a invalidação feita por outro worker não apagaria esta entrada
+    settings.CACHE_TTL_LOCAL = 5
+    monkeypatch.setattr(cache_versionado, "compartilhado", lambda: compartilhado)
+    gravados = []
+    set_original = response_cache.cache.set
+    monkeypatch.setattr(
+        response_cache.cache, "set", lambda *a, **kw: gravados.append(a[2]) or set_original(*a, **kw)
+    )
+    _get(api_client, "/api/reviews/")
+    assert gravados == [esperado]
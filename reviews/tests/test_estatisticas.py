@@ -0,0 +1,117 @@
+# reviews/tests/test_estatisticas.py
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def autor(db):
+    return User.objects.create_user(username="autor_stats", password="x")
+
+
+@pytest.fixture
+def logado(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    api_client.get("/api/cars/marcas/")      # carrega o snapshot do usuário
+    return api_client
+
+
+def _histograma(carro):
+    carro.refresh_from_db()
+    return [getattr(carro, f"avaliacoes_{n}") for n in range(1, 6)]
+
+
+@pytest.mark.django_db
+def test_histograma_acompanha_escritas(autor):
+    carro = Carro.objects.create(marca="Stats", modelo="H", ano=2001)
+    outro = Carro.objects.create(marca="Stats", modelo="H", ano=2002)
+
+    c1 = Critica.objects.create(usuario=autor, carro=carro, avaliacao=5, texto="a")
+    c2 = Critica.objects.create(usuario=autor, carro=carro, avaliacao=2, texto="b")
+    assert _histograma(carro) == [0, 1, 0, 0, 1]
+
+    c2.avaliacao = 4
+    c2.save()
+    assert _histograma(carro) == [0, 0, 0, 1, 1]
+
+    c1.carro = outro
+    c1.save()
+    assert _histograma(carro) == [0, 0, 0, 1, 0]
+    assert _histograma(outro) == [0, 0, 0, 0, 1]
+
+    c2.delete()
+    assert _histograma(carro) == [0, 0, 0, 0, 0]
+
+    Critica.objects.bulk_create([
+        Critica(usuario=autor, carro=carro, avaliacao=n, texto="lote") for n in (1, 1, 3)
+    ])
+    assert _histograma(carro) == [2, 0, 1, 0, 0]
+    Critica.objects.filter(carro=carro, avaliacao=1).update(avaliacao=2)
+    assert _histograma(carro) == [0, 2, 1, 0, 0]
+
+
+@pytest.mark.django_db
+def test_stats_do_carro(logado, autor):
+    carro = Carro.objects.create(marca="Stats", modelo="E", ano=2003)
+    for nota in (5, 5, 4, 1):
+        Critica.objects.create(usuario=autor, carro=carro, avaliacao=nota, texto="x")
+
+    resp = logado.get(f"/api/cars/{carro.pk}/stats/")
+    assert resp.status_code == 200
+    assert resp.data["total"] == 4
+    assert resp.data["media"] == 3.75
+    assert resp.data["histograma"] == {"1": 1, "2": 0, "3": 0, "4": 1, "5": 2}
+    assert resp.data["percentuais"]["5"] == 50.0
+    assert resp.data["recentes"] == {"quantidade": 4, "media": 3.75, "variacao": 0.0}
+
+
+@pytest.mark.django_db
+def test_stats_tem_custo_constante(logado, autor, monkeypatch):
+    monkeypatch.setattr("reviews.rating_stats.RECENTES", 3)
+    carro = Carro.objects.create(marca="Stats", modelo="C", ano=2004)
+    Critica.objects.bulk_create([
+        Critica(usuario=autor, carro=carro, avaliacao=1 + i % 5, texto="x") for i in range(200)
+    ])
+    Critica.objects.create(usuario=autor, carro=carro, avaliacao=5, texto="recente")
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = logado.get(f"/api/cars/{carro.pk}/stats/")
+    assert resp.data["total"] == 201
+    assert resp.data["recentes"]["quantidade"] == 3
+    sqls = [q["sql"] for q in ctx.captured_queries]
+    assert len(sqls) == 2                    # linha do carro + últimas notas
+    assert not any("COUNT(" in sql.upper() for sql in sqls)
+
+
+@pytest.mark.django_db
+def test_stats_etag_e_404(logado, autor):
+    carro = Carro.objects.create(marca="Stats", modelo="T", ano=2005)
+    primeira = logado.get(f"/api/cars/{carro.pk}/stats/")
+    assert primeira.data["media"] is None and primeira.data["recentes"]["variacao"] is None
+
+    repetida = logado.get(f"/api/cars/{carro.pk}/stats/", HTTP_IF_NONE_MATCH=primeira["ETag"])
+    assert repetida.status_code == 304
+
+    Critica.objects.create(usuario=autor, carro=carro, avaliacao=3, texto="muda")
+    depois = logado.get(f"/api/cars/{carro.pk}/stats/", HTTP_IF_NONE_MATCH=primeira["ETag"])
+    assert depois.status_code == 200 and depois.data["total"] == 1
+
+    assert logado.get("/api/cars/999999/stats/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_verificar_nao_grava_e_aponta_divergencias(autor):
+    carro = Carro.objects.create(marca="Stats", modelo="V", ano=2006)
+    Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto="ok")
+    call_command("recalcular_avaliacoes", "--verificar", carro=[carro.pk])
+
+    Carro.objects.filter(pk=carro.pk).update(avaliacoes_4=0, avaliacoes_2=3)
+    with pytest.raises(CommandError, match="1 carro"):
+        call_command("recalcular_avaliacoes", "--verificar", carro=[carro.pk])
+    assert _histograma(carro) == [0, 3, 0, 0, 0]
+
+    call_command("recalcular_avaliacoes", carro=[carro.pk])
+    assert _histograma(carro) == [0, 0, 0, 1, 0]
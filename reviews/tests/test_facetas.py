@@ -0,0 +1,69 @@
+# reviews/tests/test_facetas.py
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import cache as cache_versionado
+from reviews import facets
+from reviews.models import Carro
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    Carro.objects.create(marca="Facet", modelo="Alfa", ano=2001)
+    Carro.objects.create(marca="Facet", modelo="Alfa", ano=2003)
+    Carro.objects.create(marca="Facet", modelo="Beta", ano=1999)
+    return api_client
+
+
+@pytest.mark.django_db
+def test_endpoints_de_facetas(cliente):
+    assert "Facet" in cliente.get("/api/cars/marcas/").data
+    assert cliente.get("/api/cars/modelos/?marca=Facet").data == ["Alfa", "Beta"]
+    assert cliente.get("/api/cars/anos/?marca=Facet&modelo=Alfa").data == [2003, 2001]
+    assert cliente.get("/api/cars/facetas/").data["Facet"] == {"Alfa": [2003, 2001], "Beta": [1999]}
+    assert cliente.get("/api/cars/modelos/").status_code == 400
+
+
+@pytest.mark.django_db
+def test_facetas_vem_do_cache(cliente):
+    cliente.get("/api/cars/marcas/")
+    with CaptureQueriesContext(connection) as ctx:
+        cliente.get("/api/cars/modelos/?marca=Facet")
+        cliente.get("/api/cars/anos/?marca=Facet&modelo=Beta")
+    # só a busca do usuário autenticado, nenhum SELECT DISTINCT
+    assert all("reviews_carro" not in q["sql"] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_etag_devolve_304_e_invalida_com_carro_novo(cliente):
+    resp = cliente.get("/api/cars/modelos/?marca=Facet")
+    etag = resp["ETag"]
+    assert resp["Last-Modified"]
+
+    resp = cliente.get("/api/cars/modelos/?marca=Facet", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+
+    Carro.objects.create(marca="Facet", modelo="Gama", ano=2010)
+    resp = cliente.get("/api/cars/modelos/?marca=Facet", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.data == ["Alfa", "Beta", "Gama"]
+
+    Carro.objects.filter(modelo="Gama").update(modelo="Delta")
+    assert cliente.get("/api/cars/modelos/?marca=Facet").data == ["Alfa", "Beta", "Delta"]
+
+    Carro.objects.filter(modelo="Delta").delete()
+    assert cliente.get("/api/cars/modelos/?marca=Facet").data == ["Alfa", "Beta"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("compartilhado, esperado", [(False, 5), (True, facets.TIMEOUT)])
+def test_ttl_curto_sem_cache_compartilhado(cliente, settings, monkeypatch, compartilhado, esperado):
+    # LocMem: a troca de versão feita num worker não chega aos outros
+    settings.CACHE_TTL_LOCAL = 5
+    monkeypatch.setattr(cache_versionado, "compartilhado", lambda: compartilhado)
+    gravados = []
+    set_original = facets.cache.set
+    monkeypatch.setattr(facets.cache, "set", lambda *a, **kw: gravados.append(a[2]) or set_original(*a, **kw))
+    facets.arvore_de_facetas()
+    assert gravados == [esperado]
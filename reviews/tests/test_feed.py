@@ -0,0 +1,158 @@
+# reviews/tests/test_feed.py
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import likes
+from reviews.models import Carro, Critica, ItemFeed, MarcaSeguida
+
+
+@pytest.fixture
+def cenario(db, storage_local):
+    autores = [User.objects.create_user(username=f"autor_feed{i}", password="x") for i in range(3)]
+    carros = [Carro.objects.create(marca=m, modelo="F", ano=2020) for m in ("Feedx", "Outra")]
+    return autores, carros
+
+
+@pytest.fixture
+def logado(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+def _feed(usuario):
+    return list(
+        ItemFeed.objects.filter(usuario=usuario).order_by("-criado_em", "-id")
+        .values_list("critica__texto", flat=True)
+    )
+
+
+def _criar(autor, carro, texto):
+    return Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto=texto)
+
+
+@pytest.mark.django_db
+def test_criticar_inclui_e_distribui(usuario_autenticado, cenario):
+    eu = usuario_autenticado["user"]
+    (a, b, _), (carro, outro) = cenario
+    _criar(a, carro, "antiga")
+    _criar(a, outro, "outro carro")
+
+    _criar(eu, carro, "minha")                  # interesse novo: backfill
+    assert _feed(eu) == ["antiga"]
+
+    _criar(b, carro, "nova")                    # fan-out para quem criticou
+    assert _feed(eu) == ["nova", "antiga"]
+    assert _feed(a) == ["nova", "minha"]
+
+
+@pytest.mark.django_db
+def test_like_e_unlike(usuario_autenticado, cenario, django_capture_on_commit_callbacks):
+    eu = usuario_autenticado["user"]
+    (a, b, _), (carro, _) = cenario
+    curtida = _criar(a, carro, "curtida")
+    _criar(b, carro, "vizinha")
+
+    with django_capture_on_commit_callbacks(execute=True):     # o feed é ajustado no commit
+        likes.curtir(curtida.pk, eu)
+    assert _feed(eu) == ["vizinha", "curtida"]
+    with django_capture_on_commit_callbacks(execute=True):
+        likes.descurtir(curtida.pk, eu)
+    assert _feed(eu) == []
+
+    curtida.liked_users.add(eu)                 # M2M direta (admin)
+    assert len(_feed(eu)) == 2
+    eu.liked_reviews.clear()
+    assert _feed(eu) == []
+
+
+@pytest.mark.django_db
+def test_seguir_marca_pela_api(logado, usuario_autenticado, cenario):
+    eu = usuario_autenticado["user"]
+    (a, b, _), (carro, outro) = cenario
+    _criar(a, carro, "da marca")
+    _criar(a, outro, "de outra")
+
+    resp = logado.post("/api/marcas-seguidas/", {"marca": " feedx "}, format="json")
+    assert resp.status_code == 201 and resp.data["marca"] == "Feedx"
+    assert logado.post("/api/marcas-seguidas/", {"marca": "Feedx"}, format="json").status_code == 400
+    assert logado.post("/api/marcas-seguidas/", {"marca": "Nenhuma"}, format="json").status_code == 400
+    assert _feed(eu) == ["da marca"]
+
+    _criar(b, carro, "nova da marca")
+    assert _feed(eu) == ["nova da marca", "da marca"]
+
+    assert logado.delete(f"/api/marcas-seguidas/{resp.data['id']}/").status_code == 204
+    assert _feed(eu) == []
+
+
+@pytest.mark.django_db
+def test_excluir_critica_revisa_interesse(usuario_autenticado, cenario):
+    eu = usuario_autenticado["user"]
+    (a, _, _), (carro, _) = cenario
+    _criar(a, carro, "dele")
+    minha = _criar(eu, carro, "minha")
+    assert _feed(eu) == ["dele"]
+
+    minha.delete()
+    assert _feed(eu) == []
+
+    outra = _criar(a, carro, "outra")
+    assert ItemFeed.objects.filter(critica=outra).count() == 0
+
+
+@pytest.mark.django_db
+def test_endpoint_do_feed_pagina_por_cursor(logado, usuario_autenticado, cenario):
+    eu = usuario_autenticado["user"]
+    (a, b, c), (carro, _) = cenario
+    _criar(eu, carro, "minha")
+    for i, autor in enumerate([a, b, c, a, b]):
+        _criar(autor, carro, f"feed {i}")
+
+    primeira = logado.get("/api/feed/?limit=3")
+    assert primeira.status_code == 200
+    assert [r["texto"] for r in primeira.data["results"]] == ["feed 4", "feed 3", "feed 2"]
+    assert "liked_by_me" in primeira.data["results"][0]
+
+    with CaptureQueriesContext(connection) as ctx:
+        segunda = logado.get(primeira.data["next"])
+    assert [r["texto"] for r in segunda.data["results"]] == ["feed 1", "feed 0"]
+    assert segunda.data["next"] is None
+    # página (range scan + joins por PK) + prefetch de imagens + "curti?"
+    assert len(ctx.captured_queries) <= 4
+
+
+@pytest.mark.django_db
+def test_feed_exige_login(api_client):
+    assert api_client.get("/api/feed/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_importacao_em_massa_distribui(usuario_autenticado, cenario):
+    eu = usuario_autenticado["user"]
+    (a, _, _), (carro, _) = cenario
+    _criar(eu, carro, "minha")
+    Critica.objects.bulk_create([
+        Critica(usuario=a, carro=carro, avaliacao=3, texto=f"lote {i}") for i in range(3)
+    ])
+    assert sorted(_feed(eu)) == ["lote 0", "lote 1", "lote 2"]
+    assert _feed(a) == ["minha"]
+
+
+@pytest.mark.django_db
+def test_reconstruir_feed(usuario_autenticado, cenario):
+    eu = usuario_autenticado["user"]
+    (a, _, _), (carro, outro) = cenario
+    _criar(eu, carro, "minha")
+    _criar(a, carro, "dele")
+    MarcaSeguida.objects.create(usuario=eu, marca="Outra")
+    _criar(a, outro, "da marca")
+    ItemFeed.objects.all().delete()
+
+    call_command("reconstruir_feed", "--usuario", eu.username)
+    assert sorted(_feed(eu)) == ["da marca", "dele"]
+    assert _feed(a) == []
+
+    call_command("reconstruir_feed")
+    assert _feed(a) == ["minha"]
@@ -0,0 +1,124 @@
+# reviews/tests/test_get_condicional.py
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import likes
+from reviews.models import Carro, CarroImagem, Critica
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+@pytest.fixture
+def critica(db, storage_local):
+    autor = User.objects.create_user(username="autor_etag", password="x")
+    carro = Carro.objects.create(marca="Etagx", modelo="E", ano=2004)
+    return Critica.objects.create(usuario=autor, carro=carro, avaliacao=3, texto="etag")
+
+
+def _revalidar(client, url, etag):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    return resp, [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", [
+    "/api/reviews/?search=Etagx",
+    "/api/reviews/{critica}/",
+    "/api/cars/?search=Etagx",
+    "/api/cars/{carro}/",
+])
+def test_304_sem_serializar(cliente, critica, url):
+    url = url.format(critica=critica.id, carro=critica.carro_id)
+    primeira = cliente.get(url)
+    assert primeira.status_code == 200
+    etag = primeira["ETag"]
+
+    resp, sqls = _revalidar(cliente, url, etag)
+    assert resp.status_code == 304
+    assert resp["ETag"] == etag
+    # auth + validador; nada de página, prefetch de imagens ou AVG
+    assert len(sqls) <= 2
+    assert not any("AVG(" in sql for sql in sqls)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mudanca", ["texto", "carro", "imagem", "like", "exclusao", "nova"])
+@pytest.mark.parametrize("url", ["/api/reviews/?search=Etagx", "/api/reviews/?search=Etagx&cursor="])
+def test_mudancas_trocam_a_etag_da_lista(cliente, critica, mudanca, url):
+    outra = Critica.objects.create(usuario=critica.usuario, carro=critica.carro, avaliacao=4, texto="etag 2")
+    etag = cliente.get(url)["ETag"]
+
+    if mudanca == "texto":
+        Critica.objects.filter(pk=critica.pk).update(texto="etag editada")
+    elif mudanca == "carro":
+        Carro.objects.filter(pk=critica.carro_id).update(ano=2005)
+    elif mudanca == "imagem":
+        CarroImagem.objects.create(carro=critica.carro, tipo=CarroImagem.MOTOR, foto="carros/m.jpg")
+    elif mudanca == "like":
+        likes.curtir(critica.pk, User.objects.create_user(username="fa_etag", password="x"))
+    elif mudanca == "exclusao":
+        outra.delete()
+    else:
+        Critica.objects.create(usuario=critica.usuario, carro=critica.carro, avaliacao=1, texto="etag 3")
+
+    assert _revalidar(cliente, url, etag)[0].status_code == 200
+
+
+@pytest.mark.django_db
+def test_cursor_valida_pela_propria_pagina(cliente, critica):
+    for i in range(4):
+        Critica.objects.create(usuario=critica.usuario, carro=critica.carro, avaliacao=4, texto=f"etag {i}")
+    primeira = cliente.get("/api/reviews/?limit=2&cursor=")
+    url = primeira.data["next"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = cliente.get(url)
+    etag = resp["ETag"]
+    sqls = [q["sql"] for q in ctx.captured_queries]
+    assert not any("COUNT(" in sql for sql in sqls)     # nada de varrer a lista inteira
+    assert _revalidar(cliente, url, etag)[0].status_code == 304
+
+    # mudança fora da página não invalida; dentro dela, sim
+    fora = Critica.objects.exclude(pk__in=[c["id"] for c in resp.data["results"]]).first()
+    Critica.objects.filter(pk=fora.pk).update(texto="fora da página")
+    assert _revalidar(cliente, url, etag)[0].status_code == 304
+    Critica.objects.filter(pk=resp.data["results"][0]["id"]).update(texto="dentro da página")
+    assert _revalidar(cliente, url, etag)[0].status_code == 200
+
+
+@pytest.mark.django_db
+def test_etag_depende_do_usuario_e_dos_parametros(cliente, api_client, critica):
+    url = f"/api/reviews/{critica.id}/"
+    etag = cliente.get(url)["ETag"]
+    assert cliente.get(url + "?ordering=avaliacao")["ETag"] != etag
+
+    outro = User.objects.create_user(username="outro_etag", password="x")
+    cliente.force_authenticate(outro)
+    assert _revalidar(cliente, url, etag)[0].status_code == 200
+
+
+@pytest.mark.django_db
+def test_cache_anonimo_responde_304_sem_queries(api_client, critica):
+    url = "/api/reviews/?search=Etagx"
+    etag = api_client.get(url)["ETag"]
+    resp, sqls = _revalidar(api_client, url, etag)
+    assert resp.status_code == 304
+    assert sqls == []
+
+
+@pytest.mark.django_db
+def test_agregados_e_likes_avancam_atualizado_em(critica):
+    carro_antes = Carro.objects.get(pk=critica.carro_id).atualizado_em
+    critica_antes = Critica.objects.get(pk=critica.pk).atualizado_em
+
+    Critica.objects.create(usuario=critica.usuario, carro=critica.carro, avaliacao=5, texto="nova")
+    likes.curtir(critica.pk, critica.usuario)
+
+    assert Carro.objects.get(pk=critica.carro_id).atualizado_em > carro_antes
+    assert Critica.objects.get(pk=critica.pk).atualizado_em > critica_antes
@@ -0,0 +1,149 @@
+# reviews/tests/test_importacao.py
+import io
+import json
+import warnings
+from datetime import datetime, timezone as dt_timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.bulk_io import Importacao, exportar, importar
+from reviews.models import Carro, Critica
+
+JSONL = "\n".join([
+    json.dumps({"marca": "Importx", "modelo": "A", "ano": 1990, "usuario": "leitor",
+                "avaliacao": 4, "texto": "bom", "criado_em": "2020-01-02T03:04:05+00:00"}),
+    json.dumps({"marca": "Importx", "modelo": "A", "ano": 1990, "usuario": "leitor",
+                "avaliacao": 2, "texto": "ruim"}),
+    json.dumps({"marca": "Importx", "modelo": "B", "ano": 1991}),                 # só o carro
+    json.dumps({"marca": "Importx", "modelo": "C", "ano": 1992, "usuario": "fantasma",
+                "avaliacao": 3, "texto": "x"}),
+    json.dumps({"marca": "Importx", "modelo": "A", "ano": 1990, "usuario": "leitor",
+                "avaliacao": 9, "texto": "nota fora da faixa"}),
+    "{quebrado",
+])
+
+
+@pytest.fixture
+def leitor(db):
+    return User.objects.create_user(username="leitor", password="x")
+
+
+@pytest.mark.django_db
+def test_importa_em_lotes_com_carros_deduplicados(leitor):
+    Carro.objects.create(marca="Importx", modelo="A", ano=1990)
+    resumo = importar(io.StringIO(JSONL), "jsonl", lote=2)
+
+    assert resumo["linhas"] == 6
+    assert resumo["criticas_criadas"] == 2
+    # A já existia; B e C são novos (C mesmo com a crítica rejeitada)
+    assert resumo["carros_criados"] == 2
+    assert Carro.objects.filter(marca="Importx").count() == 3
+    assert {e["linha"] for e in resumo["erros"]} == {4, 5, 6}
+
+    carro = Carro.objects.get(marca="Importx", modelo="A")
+    assert (carro.total_criticas, carro.soma_avaliacoes) == (2, 6)
+    datada = Critica.objects.get(texto="bom")
+    assert datada.criado_em.isoformat() == "2020-01-02T03:04:05+00:00"
+
+
+@pytest.mark.django_db
+def test_criado_em_sem_fuso_usa_o_fuso_do_projeto(leitor, settings):
+    settings.TIME_ZONE = "America/Sao_Paulo"
+    linhas = "\n".join(
+        json.dumps({"marca": "Importx", "modelo": "E", "ano": 1994, "usuario": "leitor",
+                    "avaliacao": 3, "texto": texto, "criado_em": criado_em})
+        for texto, criado_em in (("ingenua", "2020-01-02T03:04:05"), ("impossivel", "2020-13-01T00:00:00"))
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)      # naive datetime no banco
+        resumo = importar(io.StringIO(linhas), "jsonl")
+
+    assert resumo["erros"] == [{"linha": 2, "erro": "criado_em inválido"}]
+    criado_em = Critica.objects.get(texto="ingenua").criado_em
+    assert criado_em == datetime(2020, 1, 2, 6, 4, 5, tzinfo=dt_timezone.utc)     # -03:00
+
+
+@pytest.mark.django_db
+def test_lote_datado_grava_a_data_no_insert(leitor):
+    linhas = "\n".join(
+        json.dumps({"marca": "Importx", "modelo": "D", "ano": 1993, "usuario": "leitor",
+                    "avaliacao": 5, "texto": f"d{i}", "criado_em": f"2019-0{i + 1}-01T00:00:00+00:00"})
+        for i in range(3)
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        importar(io.StringIO(linhas), "jsonl")
+    sqls = [q["sql"] for q in ctx.captured_queries]
+    # nenhum UPDATE de críticas e um único recálculo dos agregados do carro
+    assert not any(sql.startswith('UPDATE "reviews_critica"') for sql in sqls)
+    assert len([sql for sql in sqls if sql.startswith('UPDATE "reviews_carro"')]) == 1
+    carro = Carro.objects.get(marca="Importx", modelo="D")
+    assert sorted(d.month for d in carro.criticas.values_list("criado_em", flat=True)) == [1, 2, 3]
+
+
+@pytest.mark.django_db
+def test_carro_criado_por_outro_import_nao_conta(leitor, monkeypatch):
+    buscar = Importacao._buscar_carros
+    chamadas = []
+
+    def buscar_com_concorrente(self, chaves):
+        faltando = buscar(self, chaves)
+        if not chamadas and faltando:
+            # outro import grava o carro entre a leitura e o INSERT
+            Carro.objects.create(marca="Importx", modelo="A", ano=1990)
+        chamadas.append(chaves)
+        return faltando
+
+    monkeypatch.setattr(Importacao, "_buscar_carros", buscar_com_concorrente)
+    linhas = "\n".join(json.dumps({"marca": "Importx", "modelo": m, "ano": 1990}) for m in "AE")
+    resumo = importar(io.StringIO(linhas), "jsonl")
+    assert resumo["carros_criados"] == 1
+    assert Carro.objects.filter(marca="Importx").count() == 2
+
+
+@pytest.mark.django_db
+def test_exporta_e_reimporta_csv(leitor, tmp_path):
+    importar(io.StringIO(JSONL), "jsonl")
+    saida = tmp_path / "criticas.csv"
+    call_command("exportar_criticas", saida=str(saida), marca="Importx")
+
+    linhas = saida.read_text(encoding="utf-8").splitlines()
+    assert linhas[0] == "marca,modelo,ano,usuario,avaliacao,texto,criado_em"
+    assert len(linhas) == 3
+
+    Critica.objects.filter(carro__marca="Importx").delete()
+    call_command("importar_criticas", str(saida), stdout=io.StringIO())
+    assert Critica.objects.filter(carro__marca="Importx").count() == 2
+    assert Carro.objects.filter(marca="Importx").count() == 3
+
+
+@pytest.mark.django_db
+def test_exportacao_em_pedacos(leitor):
+    carro = Carro.objects.create(marca="Importx", modelo="P", ano=2000)
+    Critica.objects.bulk_create([
+        Critica(usuario=leitor, carro=carro, avaliacao=3, texto=f"t{i}") for i in range(1_200)
+    ])
+    pedacos = list(exportar(Critica.objects.filter(carro=carro), "jsonl", chunk_size=100))
+    assert len(pedacos) == 3            # 500 + 500 + 200 linhas
+    assert sum(p.count("\n") for p in pedacos) == 1_200
+
+
+@pytest.mark.django_db
+def test_endpoints_de_importacao_e_exportacao(api_client, leitor, usuario_autenticado):
+    api_client.force_authenticate(usuario_autenticado["user"])
+    assert api_client.get("/api/reviews/exportar/").status_code == 403
+
+    admin = User.objects.create_superuser(username="admin_import", password="x")
+    api_client.force_authenticate(admin)
+    arquivo = SimpleUploadedFile("criticas.jsonl", JSONL.encode(), content_type="application/x-ndjson")
+    resp = api_client.post("/api/reviews/importar/", {"arquivo": arquivo}, format="multipart")
+    assert resp.status_code == 201
+    assert resp.data["criticas_criadas"] == 2
+
+    resp = api_client.get("/api/reviews/exportar/?formato=jsonl")
+    assert resp.status_code == 200 and resp.streaming
+    linhas = [json.loads(l) for l in b"".join(resp.streaming_content).decode().splitlines()]
+    assert {l["texto"] for l in linhas if l["marca"] == "Importx"} == {"bom", "ruim"}
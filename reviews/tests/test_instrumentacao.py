@@ -0,0 +1,80 @@
+# reviews/tests/test_instrumentacao.py
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from reviews.instrumentation import estatisticas
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def instrumentado(settings):
+    """Liga a instrumentação; o middleware é carregado no primeiro request do cliente."""
+    settings.INSTRUMENTACAO = True
+    estatisticas.limpar()
+    yield
+    estatisticas.limpar()
+
+
+@pytest.fixture
+def criticas(db):
+    autor = User.objects.create_user(username="autor_instr", password="x")
+    carro = Carro.objects.create(marca="Instr", modelo="I", ano=2001)
+    return [
+        Critica.objects.create(usuario=autor, carro=carro, avaliacao=3, texto=f"c{i}")
+        for i in range(3)
+    ]
+
+
+def _timing(resp):
+    return {
+        nome: (float(dur), desc)
+        for nome, dur, desc in re.findall(
+            r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', resp["Server-Timing"]
+        )
+    }
+
+
+@pytest.mark.django_db
+def test_server_timing_traz_queries_e_tempos(api_client, instrumentado, criticas):
+    resp = api_client.get("/api/reviews/")
+    assert resp.status_code == 200
+    timing = _timing(resp)
+    assert set(timing) == {"db", "serializer", "total"}
+    assert timing["db"][1] != "0 queries"
+    assert timing["serializer"][0] > 0
+    assert timing["total"][0] >= timing["db"][0]
+
+
+@pytest.mark.django_db
+def test_estatisticas_agregadas_por_view(api_client, instrumentado, criticas):
+    for _ in range(3):
+        api_client.get("/api/reviews/")
+    api_client.get(f"/api/reviews/{criticas[0].id}/")
+
+    admin = User.objects.create_superuser(username="admin_instr", password="x")
+    api_client.force_authenticate(admin)
+    resumo = api_client.get("/api/instrumentacao/").data
+
+    assert resumo["ativa"] is True
+    lista = resumo["views"]["GET critica-list"]
+    assert lista["requisicoes"] == 3
+    assert lista["queries_max"] >= 1
+    assert resumo["views"]["GET critica-detail"]["requisicoes"] == 1
+
+    assert api_client.delete("/api/instrumentacao/").status_code == 204
+    assert "GET critica-list" not in api_client.get("/api/instrumentacao/").data["views"]
+
+
+@pytest.mark.django_db
+def test_estatisticas_so_para_admin(api_client, usuario_autenticado):
+    assert api_client.get("/api/instrumentacao/").status_code == 401
+    api_client.force_authenticate(usuario_autenticado["user"])
+    assert api_client.get("/api/instrumentacao/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_desligada_nao_emite_headers(api_client, settings, criticas):
+    settings.INSTRUMENTACAO = False
+    resp = api_client.get("/api/reviews/")
+    assert "Server-Timing" not in resp
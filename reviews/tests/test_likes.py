@@ -0,0 +1,84 @@
+# reviews/tests/test_likes.py
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def critica(db):
+    autor = User.objects.create_user(username="autor_like", password="x")
+    carro = Carro.objects.create(marca="Like", modelo="L", ano=2000)
+    return Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto="curta")
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+@pytest.mark.django_db
+def test_like_e_unlike_sao_idempotentes(cliente, critica):
+    url = f"/api/reviews/{critica.id}/"
+    for _ in range(2):
+        resp = cliente.post(url + "like/")
+        assert resp.status_code == 200
+        assert resp.data == {"total_likes": 1, "liked_by_me": True}
+    critica.refresh_from_db()
+    assert critica.total_likes == critica.liked_users.count() == 1
+
+    for _ in range(2):
+        resp = cliente.post(url + "unlike/")
+        assert resp.data == {"total_likes": 0, "liked_by_me": False}
+    critica.refresh_from_db()
+    assert critica.total_likes == critica.liked_users.count() == 0
+
+
+@pytest.mark.django_db
+def test_like_sem_count_e_com_poucas_queries(cliente, critica):
+    with CaptureQueriesContext(connection) as ctx:
+        cliente.post(f"/api/reviews/{critica.id}/like/")
+    sqls = [q["sql"] for q in ctx.captured_queries]
+    assert not any("COUNT(" in sql for sql in sqls)
+    assert len([sql for sql in sqls if not sql.startswith(("SAVEPOINT", "RELEASE"))]) <= 4
+
+
+@pytest.mark.django_db
+def test_like_em_critica_inexistente(cliente):
+    assert cliente.post("/api/reviews/999999/like/").status_code == 404
+    assert cliente.post("/api/reviews/999999/unlike/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_like_exige_login(api_client, critica):
+    assert api_client.post(f"/api/reviews/{critica.id}/like/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_contador_acompanha_m2m_direta(critica):
+    fas = [User.objects.create_user(username=f"fa_like{i}", password="x") for i in range(3)]
+    critica.liked_users.add(*fas)
+    critica.refresh_from_db()
+    assert critica.total_likes == 3
+
+    fas[0].liked_reviews.remove(critica)
+    critica.refresh_from_db()
+    assert critica.total_likes == 2
+
+    fas[1].liked_reviews.clear()
+    critica.refresh_from_db()
+    assert critica.total_likes == 1
+
+
+@pytest.mark.django_db
+def test_lookup_em_lote_de_curtidas(cliente, critica, usuario_autenticado):
+    outra = Critica.objects.create(
+        usuario=critica.usuario, carro=critica.carro, avaliacao=2, texto="outra"
+    )
+    cliente.post(f"/api/reviews/{critica.id}/like/")
+
+    resp = cliente.get(f"/api/reviews/curtidas/?ids={critica.id},{outra.id}")
+    assert resp.data == [critica.id]
+    assert cliente.get("/api/reviews/curtidas/?ids=a,b").status_code == 400
@@ -0,0 +1,161 @@
+# reviews/tests/test_likes_write_behind.py
+import random
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews import likes
+from reviews.models import Carro, Critica, EventoCurtida, ItemFeed
+
+
+@pytest.fixture(autouse=True)
+def write_behind(settings):
+    settings.LIKES_WRITE_BEHIND = True
+    settings.LIKES_FLUSH_THREAD = False     # os testes drenam a fila na mão
+
+
+@pytest.fixture
+def criticas(db):
+    autor = User.objects.create_user(username="autor_wb", password="x")
+    carro = Carro.objects.create(marca="Behind", modelo="W", ano=2001)
+    return [
+        Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto=f"wb {i}")
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+def _curtidores(n):
+    return [User.objects.create_user(username=f"curtidor_wb{i}", password="x") for i in range(n)]
+
+
+def _m2m(critica):
+    return set(likes.Curtida.objects.filter(critica=critica).values_list("user_id", flat=True))
+
+
+@pytest.mark.django_db
+def test_resposta_otimista_e_aplicacao_em_lote(cliente, usuario_autenticado, criticas,
+                                               django_capture_on_commit_callbacks):
+    eu = usuario_autenticado["user"]
+    critica = criticas[0]
+    url = f"/api/reviews/{critica.pk}/"
+    likes.curtir(critica.pk, _curtidores(1)[0])
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = cliente.post(url + "like/")
+    assert resp.data == {"total_likes": 2, "liked_by_me": True}
+    escritas = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))]
+    assert len(escritas) == 1 and "reviews_eventocurtida" in escritas[0]
+    assert "FOR UPDATE" not in " ".join(q["sql"] for q in ctx.captured_queries)
+
+    assert cliente.post(url + "like/").data["total_likes"] == 2       # idempotente
+    assert cliente.get(url).data["liked_by_me"] is True                # lê os pendentes
+    assert cliente.get(f"/api/reviews/curtidas/?ids={critica.pk}").data == [critica.pk]
+
+    critica.refresh_from_db()
+    assert critica.total_likes == 0 and _m2m(critica) == set()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert likes.drenar() == 2
+    critica.refresh_from_db()
+    assert critica.total_likes == 2 and eu.pk in _m2m(critica)
+    assert not EventoCurtida.objects.exists()
+    assert ItemFeed.objects.filter(usuario=eu).exists()                # feed ajustado no lote
+
+    assert cliente.post(url + "unlike/").data == {"total_likes": 1, "liked_by_me": False}
+    assert cliente.get(url).data["liked_by_me"] is False
+
+
+@pytest.mark.django_db
+def test_alternancias_viram_um_comando_por_par(criticas):
+    usuarios = _curtidores(20)
+    critica = criticas[0]
+    for user in usuarios:
+        for _ in range(3):
+            likes.curtir(critica.pk, user)
+            likes.descurtir(critica.pk, user)
+        likes.curtir(critica.pk, user)
+    assert EventoCurtida.objects.count() == 20 * 7
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert likes.aplicar_pendentes() == 20 * 7
+    critica.refresh_from_db()
+    assert critica.total_likes == 20 and _m2m(critica) == {u.pk for u in usuarios}
+    # eventos, trava das críticas, M2M atual, INSERT em lote, UPDATE do contador,
+    # DELETE dos eventos
+    assert len([q for q in ctx.captured_queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]) <= 6
+    insert = next(q["sql"] for q in ctx.captured_queries if q["sql"].startswith("INSERT"))
+    assert "OR IGNORE" in insert or "ON CONFLICT" in insert      # SQLite / PostgreSQL
+
+
+@pytest.mark.django_db
+def test_eventos_sobrevivem_ao_processo_e_o_comando_aplica(criticas):
+    user = _curtidores(1)[0]
+    likes.curtir(criticas[1].pk, user)
+    likes.curtir(criticas[2].pk, user)
+    # "o worker morreu": nada em memória, a fila está na tabela
+    assert EventoCurtida.objects.count() == 2
+
+    call_command("aplicar_curtidas")
+    assert {c.pk for c in criticas if user.pk in _m2m(c)} == {criticas[1].pk, criticas[2].pk}
+    assert not EventoCurtida.objects.exists()
+
+
+@pytest.mark.django_db
+def test_lotes_pequenos_preservam_a_ordem(criticas):
+    user = _curtidores(1)[0]
+    critica = criticas[0]
+    likes.curtir(critica.pk, user)
+    likes.descurtir(critica.pk, user)
+    likes.curtir(critica.pk, user)
+    assert likes.drenar(lote=1) == 3
+    critica.refresh_from_db()
+    assert critica.total_likes == 1 and _m2m(critica) == {user.pk}
+
+
+@pytest.mark.django_db
+def test_consistencia_com_o_modo_sincrono(criticas, settings):
+    """
+    A mesma sequência aleatória de likes/unlikes, com drenagens no meio,
+    termina no mesmo estado que o modo síncrono, e total_likes bate com a M2M.
+    """
+    usuarios = _curtidores(6)
+    rng = random.Random(7)
+    operacoes = [
+        (rng.choice(usuarios), rng.choice(criticas).pk, rng.random() < 0.6) for _ in range(300)
+    ]
+
+    def executar(write_behind):
+        settings.LIKES_WRITE_BEHIND = write_behind
+        likes.Curtida.objects.filter(critica__in=criticas).delete()
+        likes.recontar([c.pk for c in criticas])
+        otimistas = []
+        for i, (user, critica_id, curtir) in enumerate(operacoes):
+            otimistas.append((likes.curtir if curtir else likes.descurtir)(critica_id, user))
+            if write_behind and i % 37 == 0:
+                likes.drenar()
+        likes.drenar()
+        estado = {c.pk: _m2m(c) for c in criticas}
+        totais = dict(Critica.objects.filter(pk__in=estado).values_list("pk", "total_likes"))
+        return otimistas, estado, totais
+
+    sincrono = executar(False)
+    assincrono = executar(True)
+    assert assincrono == sincrono
+    _, estado, totais = assincrono
+    assert all(totais[pk] == len(ids) for pk, ids in estado.items())
+
+
+@pytest.mark.django_db
+def test_excluir_critica_descarta_pendentes(criticas):
+    user = _curtidores(1)[0]
+    likes.curtir(criticas[0].pk, user)
+    criticas[0].delete()
+    assert not EventoCurtida.objects.exists()
+    assert likes.drenar() == 0
@@ -0,0 +1,86 @@
+# reviews/tests/test_login.py
+import pytest
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from reviews.authentication import filtro_por_email
+
+
+def _login(client, login, senha="senha123"):
+    return client.post("/api/token/", {"username": login, "password": senha}, format="json")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("login", ["user1", "user1@example.com", "USER1@Example.COM"])
+def test_login_por_username_ou_email(api_client, usuario_autenticado, login):
+    resp = _login(api_client, login)
+    assert resp.status_code == 200
+    assert resp.data["user"]["username"] == "user1"
+    assert "access" in resp.data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("login, senha", [("user1", "errada"), ("ninguem@example.com", "senha123")])
+def test_login_invalido(api_client, usuario_autenticado, login, senha):
+    assert _login(api_client, login, senha).status_code == 401
+
+
+@pytest.mark.django_db
+def test_username_tem_precedencia_sobre_email(usuario_autenticado):
+    # o username de um é o e-mail (em outra caixa) de outro
+    User.objects.create_user(username="USER1@EXAMPLE.COM", password="outra")
+    assert authenticate(username="USER1@EXAMPLE.COM", password="outra").username == "USER1@EXAMPLE.COM"
+    assert authenticate(username="user1@example.com", password="senha123").username == "user1"
+
+
+@pytest.mark.django_db
+def test_autenticar_e_uma_query(usuario_autenticado):
+    with CaptureQueriesContext(connection) as ctx:
+        assert authenticate(username="User1@Example.com", password="senha123") is not None
+    assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_usuario_inativo_nao_autentica(usuario_autenticado):
+    User.objects.filter(pk=usuario_autenticado["user"].pk).update(is_active=False)
+    assert authenticate(username="user1@example.com", password="senha123") is None
+
+
+@pytest.mark.django_db
+def test_email_unico_sem_diferenciar_maiusculas(usuario_autenticado):
+    with pytest.raises(IntegrityError), transaction.atomic():
+        User.objects.create_user(username="outro", email="USER1@example.com", password="x")
+    # e-mail vazio continua permitido para vários usuários
+    User.objects.create_user(username="sem_email_1", password="x")
+    User.objects.create_user(username="sem_email_2", password="x")
+
+
+@pytest.mark.django_db
+def test_cadastro_com_email_repetido_responde_400(api_client, usuario_autenticado):
+    resp = api_client.post(
+        "/api/register/",
+        {"username": "novo", "email": "User1@Example.com", "password": "senha123"},
+        format="json",
+    )
+    assert resp.status_code == 400
+    assert "email" in resp.data
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="plano de execução do SQLite")
+def test_busca_por_email_usa_o_indice(usuario_autenticado):
+    sql, params = User.objects.filter(filtro_por_email("x@y.com")).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        plano = " ".join(str(linha[-1]) for linha in cursor.fetchall())
+    assert "auth_user_email_lower_uniq" in plano
+
+
+@pytest.mark.django_db
+def test_bench_login(capsys):
+    call_command("bench_login", usuarios=5, iteracoes=2, aquecimento=0, hasher="md5")
+    saida = capsys.readouterr().out
+    assert "login_email" in saida and "login_username" in saida
+    assert not User.objects.filter(username__startswith="bench_login").exists()
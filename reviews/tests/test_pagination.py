@@ -33,3 +33,62 @@ def test_paginacao_carros(api_client, usuario_autenticado):
     # next deve ser None, previous não-None
     assert resp2.data["next"] is None
     assert resp2.data["previous"] is not None
+
+
+def _percorrer_com_cursor(api_client, url):
+    """Segue os links `next` do modo keyset e devolve todos os ids."""
+    ids, paginas = [], 0
+    while url:
+        resp = api_client.get(url)
+        assert resp.status_code == 200
+        assert "count" not in resp.data
+        ids += [item["id"] for item in resp.data["results"]]
+        url = resp.data["next"]
+        paginas += 1
+    return ids, paginas
+
+
+@pytest.mark.django_db
+def test_paginacao_keyset_criticas_com_empates(api_client, usuario_autenticado):
+    from reviews.models import Critica
+    carro = Carro.objects.create(marca="Cursor", modelo="K", ano=2001)
+    user = usuario_autenticado["user"]
+    Critica.objects.bulk_create([
+        Critica(usuario=user, carro=carro, avaliacao=(i % 3) + 1, texto=f"r{i}") for i in range(11)
+    ])
+
+    criticas = list(Critica.objects.filter(carro=carro))
+    for ordering in ("-criado_em", "-avaliacao", "avaliacao"):
+        campo, desc = ordering.lstrip("-"), ordering.startswith("-")
+        esperado = [
+            c.id for c in sorted(criticas, key=lambda c: (getattr(c, campo), c.id), reverse=desc)
+        ]
+        ids, paginas = _percorrer_com_cursor(
+            api_client, f"/api/reviews/?search=Cursor&ordering={ordering}&cursor=&limit=4"
+        )
+        assert ids == esperado
+        assert paginas == 3
+
+
+@pytest.mark.django_db
+def test_paginacao_keyset_carros_media_nula(api_client, usuario_autenticado):
+    from reviews.models import Critica
+    user = usuario_autenticado["user"]
+    carros = [Carro.objects.create(marca="Seek", modelo=f"S{i}", ano=1990 + i) for i in range(7)]
+    for carro, nota in zip(carros[:4], (5, 3, 3, 1)):
+        Critica.objects.create(usuario=user, carro=carro, avaliacao=nota, texto="x")
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    ids, _ = _percorrer_com_cursor(
+        api_client, "/api/cars/?search=Seek&ordering=-media_avaliacao&cursor=&limit=2"
+    )
+    assert len(ids) == 7 and len(set(ids)) == 7
+    # NULL conta como maior valor (como no PostgreSQL): sem avaliação vêm antes
+    assert set(ids[:3]) == {c.id for c in carros[4:]}
+    assert ids[3] == carros[0].id and ids[-1] == carros[3].id
+
+
+@pytest.mark.django_db
+def test_paginacao_keyset_cursor_invalido(api_client):
+    resp = api_client.get("/api/reviews/?cursor=nao-e-um-cursor")
+    assert resp.status_code == 404
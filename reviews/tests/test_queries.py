@@ -0,0 +1,97 @@
+# reviews/tests/test_queries.py
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Carro, CarroImagem, Critica
+
+
+def _contar_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return len(ctx.captured_queries), resp
+
+
+@pytest.fixture
+def criticas_com_imagens(storage_local, usuario_autenticado):
+    """20 críticas em 5 carros com imagens, cada uma com 2 likes."""
+    autor = usuario_autenticado["user"]
+    fas = [User.objects.create_user(username=f"fa{i}", password="x") for i in range(2)]
+    for i in range(5):
+        carro = Carro.objects.create(marca="Query", modelo=f"M{i}", ano=2000 + i)
+        CarroImagem.objects.create(carro=carro, tipo=CarroImagem.INTERIOR, foto=f"carros/in{i}.jpg")
+        CarroImagem.objects.create(carro=carro, tipo=CarroImagem.EXTERIOR, foto=f"carros/ex{i}.jpg")
+        for j in range(4):
+            critica = Critica.objects.create(usuario=autor, carro=carro, avaliacao=3, texto=f"c{j}")
+            critica.liked_users.add(*fas)
+
+
+@pytest.mark.django_db
+def test_lista_de_criticas_tem_numero_constante_de_queries(api_client, usuario_autenticado, criticas_com_imagens):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    api_client.get("/api/reviews/curtidas/")     # carrega o snapshot do usuário
+
+    poucas, _ = _contar_queries(api_client, "/api/reviews/?search=Query&limit=2")
+    muitas, resp = _contar_queries(api_client, "/api/reviews/?search=Query&limit=20")
+
+    assert len(resp.data["results"]) == 20
+    assert poucas == muitas
+    # COUNT + página + prefetch de imagens + "curti?" em lote (auth em cache)
+    assert muitas <= 4
+
+
+@pytest.mark.django_db
+def test_lista_de_criticas_dados_em_lote(api_client, usuario_autenticado, criticas_com_imagens):
+    user = usuario_autenticado["user"]
+    curtida = Critica.objects.filter(carro__marca="Query").first()
+    curtida.liked_users.add(user)
+
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    resp = api_client.get("/api/reviews/?search=Query&limit=20")
+    por_id = {r["id"]: r for r in resp.data["results"]}
+
+    assert por_id[curtida.id]["total_likes"] == 3
+    assert por_id[curtida.id]["liked_by_me"] is True
+    outras = [r for i, r in por_id.items() if i != curtida.id]
+    assert all(r["total_likes"] == 2 and r["liked_by_me"] is False for r in outras)
+    assert all(r["carro_imagem"].endswith(".jpg") and "/ex" in r["carro_imagem"] for r in por_id.values())
+
+
+@pytest.fixture
+def carros_com_imagens(storage_local, usuario_autenticado):
+    autor = usuario_autenticado["user"]
+    carros = []
+    for i in range(6):
+        carro = Carro.objects.create(marca="Galeria", modelo=f"G{i}", ano=2100 + i)
+        CarroImagem.objects.create(carro=carro, tipo=CarroImagem.MOTOR, foto=f"carros/mo{i}.jpg")
+        CarroImagem.objects.create(carro=carro, tipo=CarroImagem.EXTERIOR, foto=f"carros/ex{i}.jpg")
+        Critica.objects.create(usuario=autor, carro=carro, avaliacao=5, texto="top")
+        carros.append(carro)
+    return carros
+
+
+@pytest.mark.django_db
+def test_queries_fixas_em_carros(api_client, usuario_autenticado, carros_com_imagens):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    carro = carros_com_imagens[0]
+
+    # auth (só na 1ª requisição; depois vem do snapshot) + COUNT + página + prefetch de imagens
+    n, resp = _contar_queries(api_client, "/api/cars/?search=Galeria&limit=2")
+    assert n == 4
+    n, resp = _contar_queries(api_client, "/api/cars/?search=Galeria&limit=6")
+    assert n == 3
+    assert all(c["imagem"].endswith(f"/ex{c['modelo'][1:]}.jpg") for c in resp.data["results"])
+    assert all(len(c["imagens"]) == 2 for c in resp.data["results"])
+
+    # carro + prefetch de imagens
+    n, resp = _contar_queries(api_client, f"/api/cars/{carro.id}/")
+    assert n == 2
+    assert resp.data["imagem"].endswith("/ex0.jpg")
+
+    # montagem do ranking (cache frio) + carros + prefetch de imagens
+    n, _ = _contar_queries(api_client, "/api/cars/top/?n=3")
+    assert n == 3
+    # ranking já em cache: carros + prefetch de imagens
+    n, _ = _contar_queries(api_client, "/api/cars/top/?n=10")
+    assert n == 2
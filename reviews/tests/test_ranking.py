@@ -0,0 +1,105 @@
+# reviews/tests/test_ranking.py
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from reviews import leaderboard
+from reviews.models import Carro, Critica
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+def _avaliar(carro, *notas):
+    for i, nota in enumerate(notas):
+        autor, _ = User.objects.get_or_create(username=f"rank{i}")
+        Critica.objects.create(usuario=autor, carro=carro, avaliacao=nota, texto="r")
+
+
+def _top_ids(cliente, url="/api/cars/top/?n=50"):
+    resp = cliente.get(url)
+    assert resp.status_code == 200
+    return [c["id"] for c in resp.data]
+
+
+@pytest.mark.django_db
+def test_media_bayesiana_nao_premia_nota_unica(cliente):
+    unica = Carro.objects.create(marca="Rank", modelo="Unica", ano=2001)
+    consagrado = Carro.objects.create(marca="Rank", modelo="Consagrado", ano=2001)
+    _avaliar(unica, 5)
+    _avaliar(consagrado, *[5] * 19, 4)
+
+    ids = _top_ids(cliente)
+    assert ids.index(consagrado.id) < ids.index(unica.id)
+    item = next(c for c in cliente.get("/api/cars/top/?n=50").data if c["id"] == consagrado.id)
+    assert 4 < item["pontuacao"] < 5
+
+
+@pytest.mark.django_db
+def test_minimo_de_criticas_e_n_limitado(cliente, settings):
+    settings.RANKING_MAX_N = 2
+    poucas = Carro.objects.create(marca="Rank", modelo="Poucas", ano=2002)
+    _avaliar(poucas, 5, 5)
+
+    assert poucas.id not in _top_ids(cliente, "/api/cars/top/?n=50&min_criticas=1000")
+    assert len(_top_ids(cliente, "/api/cars/top/?n=50")) == 2
+    assert cliente.get("/api/cars/top/?min_criticas=x").status_code == 400
+
+
+@pytest.mark.django_db
+def test_min_criticas_nao_multiplica_o_cache(cliente):
+    poucas = Carro.objects.create(marca="Rank", modelo="Poucas", ano=2002)
+    muitas = Carro.objects.create(marca="Rank", modelo="Muitas", ano=2002)
+    _avaliar(poucas, 5)
+    _avaliar(muitas, 4, 4, 4)
+
+    for minimo in range(-5, 50):
+        assert cliente.get(f"/api/cars/top/?n=50&min_criticas={minimo}").status_code == 200
+    assert _top_ids(cliente, "/api/cars/top/?n=50&min_criticas=-3") == _top_ids(cliente)
+    ids = _top_ids(cliente, "/api/cars/top/?n=50&min_criticas=2")
+    assert muitas.id in ids and poucas.id not in ids
+    assert _top_ids(cliente, "/api/cars/top/?n=50&min_criticas=999999999") == []
+
+    dados = cache.get(leaderboard._chave())
+    assert dados["ordenados"][0] == settings.RANKING_PESO_BAYESIANO      # uma única lista
+
+
+@pytest.mark.django_db
+def test_ranking_atualiza_incrementalmente_sem_ler_criticas(cliente, django_capture_on_commit_callbacks):
+    carro = Carro.objects.create(marca="Rank", modelo="Subindo", ano=2003)
+    _avaliar(carro, 1)
+    _top_ids(cliente)                                     # aquece o cache
+
+    with django_capture_on_commit_callbacks(execute=True):
+        critica = Critica.objects.get(carro=carro)
+        critica.avaliacao = 5
+        critica.save()
+        _avaliar(carro, *[5] * 30)
+
+    with CaptureQueriesContext(connection) as ctx:
+        ids = _top_ids(cliente, "/api/cars/top/?n=1")
+    assert ids == [carro.id]
+    assert all("reviews_critica" not in q["sql"] for q in ctx.captured_queries)
+
+    Critica.objects.filter(carro=carro).delete()          # caminho em massa
+    assert carro.id not in _top_ids(cliente)
+
+
+@pytest.mark.django_db
+def test_delta_so_entra_no_commit(cliente):
+    carro = Carro.objects.create(marca="Rank", modelo="Desfeito", ano=2004)
+    _avaliar(carro, 3)
+    _top_ids(cliente)                                     # aquece o cache
+
+    try:
+        with transaction.atomic():
+            _avaliar(carro, *[5] * 30)
+            raise RuntimeError("rollback")
+    except RuntimeError:
+        pass
+    assert cache.get(leaderboard._chave())["carros"][carro.id] == [1, 3]
@@ -0,0 +1,129 @@
+# reviews/tests/test_selecao_campos.py
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Carro, CarroImagem, Critica
+
+TEXTO_LONGO = "Motor forte e câmbio preciso. " * 20
+
+
+@pytest.fixture
+def criticas(storage_local, usuario_autenticado):
+    autor = User.objects.create_user(username="autor_campos", password="x")
+    for i in range(3):
+        carro = Carro.objects.create(marca="Campos", modelo=f"M{i}", ano=2010 + i)
+        CarroImagem.objects.create(carro=carro, tipo=CarroImagem.EXTERIOR, foto=f"carros/c{i}.jpg")
+        Critica.objects.create(usuario=autor, carro=carro, avaliacao=4, texto=TEXTO_LONGO)
+    return Critica.objects.filter(carro__marca="Campos").order_by("pk")
+
+
+@pytest.fixture
+def logado(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    api_client.get("/api/reviews/curtidas/")     # carrega o snapshot do usuário
+    return api_client
+
+
+def _get(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    return resp, [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+def test_fields_restringe_resposta_e_colunas(logado, criticas):
+    resp, sqls = _get(logado, "/api/reviews/?search=Campos&fields=id,avaliacao")
+
+    assert resp.status_code == 200
+    assert [set(item) for item in resp.data["results"]] == [{"id", "avaliacao"}] * 3
+    # ETag/COUNT + página: sem join, sem prefetch de imagens e sem "curti?"
+    assert len(sqls) == 2
+    pagina = sqls[-1]
+    assert '"texto"' not in pagina and "auth_user" not in pagina
+    assert "reviews_carroimagem" not in " ".join(sqls)
+
+
+@pytest.mark.django_db
+def test_omit_remove_campos(logado, criticas):
+    resp, sqls = _get(logado, "/api/reviews/?omit=texto,carro_imagem")
+
+    item = resp.data["results"][0]
+    assert "texto" not in item and "carro_imagem" not in item
+    assert item["usuario_nome"] == "autor_campos" and "liked_by_me" in item
+    assert "reviews_carroimagem" not in " ".join(sqls)
+
+
+@pytest.mark.django_db
+def test_resumo_trunca_texto_no_banco(logado, criticas):
+    resp, sqls = _get(logado, "/api/reviews/?resumo=true")
+
+    item = resp.data["results"][0]
+    assert list(item) == [
+        "id", "usuario_nome", "carro_nome", "carro_marca",
+        "avaliacao", "texto", "total_likes", "liked_by_me",
+    ]
+    assert len(item["texto"]) == 140 and item["texto"].endswith("…")
+    assert TEXTO_LONGO.startswith(item["texto"][:-1])
+    assert "SUBSTR" in sqls[-2].upper()      # página; a última é o "curti?"
+
+
+@pytest.mark.django_db
+def test_resumo_nao_corta_texto_curto(logado, criticas):
+    Critica.objects.filter(pk=criticas[0].pk).update(texto="Curto.")
+    resp = logado.get(f"/api/reviews/{criticas[0].pk}/?resumo=true")
+    assert resp.status_code == 200
+    assert resp.data["texto"] == "Curto."
+    assert "carro_ano" not in resp.data
+
+
+@pytest.mark.django_db
+def test_campo_desconhecido_responde_400(logado, criticas):
+    resp = logado.get("/api/reviews/?fields=id,senha")
+    assert resp.status_code == 400
+    assert "senha" in str(resp.data["fields"])
+
+
+@pytest.mark.django_db
+def test_keyset_com_fields(logado, criticas):
+    primeira = logado.get("/api/reviews/?search=Campos&cursor=&limit=2&ordering=carro__ano&fields=id")
+    assert [set(item) for item in primeira.data["results"]] == [{"id"}] * 2
+
+    resp, sqls = _get(logado, primeira.data["next"])
+    assert [item["id"] for item in resp.data["results"]] == [criticas[2].pk]
+
+
+@pytest.mark.django_db
+def test_cache_anonimo_separa_por_campos(api_client, criticas):
+    completo = api_client.get("/api/reviews/")
+    resumo = api_client.get("/api/reviews/?resumo=TRUE")
+    mesmo = api_client.get("/api/reviews/?resumo=true")
+
+    assert completo["X-Cache"] == "MISS" and resumo["X-Cache"] == "MISS"
+    assert mesmo["X-Cache"] == "HIT"
+    assert "carro_ano" not in mesmo.data["results"][0]
+
+    api_client.get("/api/reviews/?fields=id,texto")
+    assert api_client.get("/api/reviews/?fields=texto,id,id")["X-Cache"] == "HIT"
+
+
+@pytest.mark.django_db
+def test_carros_resumo_e_fields(logado, criticas):
+    resp, sqls = _get(logado, "/api/cars/?search=Campos&fields=id,marca")
+    assert [set(item) for item in resp.data["results"]] == [{"id", "marca"}] * 3
+    assert "reviews_carroimagem" not in " ".join(sqls)
+
+    resp = logado.get("/api/cars/?search=Campos&resumo=true")
+    item = resp.data["results"][0]
+    assert list(item) == ["id", "marca", "modelo", "ano", "media_avaliacao", "imagem_thumb"]
+    assert item["imagem_thumb"]
+
+
+@pytest.mark.django_db
+def test_escrita_ignora_parametros(logado, criticas):
+    carro = criticas[0].carro
+    resp = logado.post(
+        "/api/reviews/?fields=id", {"carro": carro.pk, "avaliacao": 5, "texto": "ok"},
+    )
+    assert resp.status_code == 201
+    assert "texto" in resp.data
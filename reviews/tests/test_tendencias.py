@@ -0,0 +1,173 @@
+# reviews/tests/test_tendencias.py
+from datetime import datetime
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from reviews.models import AvaliacaoMensalCarro, AvaliacaoMensalMarca, Carro, Critica, ItemFeed
+
+
+@pytest.fixture
+def autor(db):
+    return User.objects.create_user(username="autor_tendencia", password="x")
+
+
+@pytest.fixture
+def logado(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+def _em(ano, mes, dia=15):
+    return timezone.make_aware(datetime(ano, mes, dia, 12))
+
+
+def _criar(autor, carro, nota, quando):
+    critica = Critica.objects.create(usuario=autor, carro=carro, avaliacao=nota, texto="t")
+    Critica.objects.filter(pk=critica.pk).update(criado_em=quando)
+    critica.refresh_from_db()
+    return critica
+
+
+def _meses(modelo, **filtro):
+    return {
+        linha.mes.strftime("%Y-%m"): (linha.total, linha.soma)
+        for linha in modelo.objects.filter(total__gt=0, **filtro)
+    }
+
+
+@pytest.mark.django_db
+def test_agregados_acompanham_escritas(autor):
+    carro = Carro.objects.create(marca="Tendx", modelo="A", ano=2010)
+    outro = Carro.objects.create(marca="Tendx", modelo="B", ano=2011)
+
+    c1 = _criar(autor, carro, 5, _em(2024, 1))
+    _criar(autor, carro, 3, _em(2024, 1))
+    _criar(autor, outro, 4, _em(2024, 3))
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {"2024-01": (2, 8)}
+    assert _meses(AvaliacaoMensalMarca, marca="Tendx") == {"2024-01": (2, 8), "2024-03": (1, 4)}
+
+    c1.avaliacao = 1
+    c1.save()
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {"2024-01": (2, 4)}
+
+    c1.criado_em = _em(2024, 2)
+    c1.save()
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {"2024-01": (1, 3), "2024-02": (1, 1)}
+
+    c1.carro = outro
+    c1.save()
+    assert _meses(AvaliacaoMensalCarro, carro=outro) == {"2024-02": (1, 1), "2024-03": (1, 4)}
+
+    c1.delete()
+    assert _meses(AvaliacaoMensalMarca, marca="Tendx") == {"2024-01": (1, 3), "2024-03": (1, 4)}
+
+
+@pytest.mark.django_db
+def test_mes_no_fuso_do_projeto(autor):
+    carro = Carro.objects.create(marca="Tendx", modelo="Fuso", ano=2012)
+    # 31/01 23h em São Paulo já é fevereiro em UTC
+    _criar(autor, carro, 4, timezone.make_aware(datetime(2024, 1, 31, 23)))
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {"2024-01": (1, 4)}
+    call_command("recalcular_tendencias", carro=[carro.pk])
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {"2024-01": (1, 4)}
+
+
+@pytest.mark.django_db
+def test_caminhos_em_massa_e_feed(autor, usuario_autenticado):
+    carro = Carro.objects.create(marca="Tendx", modelo="M", ano=2013)
+    Critica.objects.create(usuario=usuario_autenticado["user"], carro=carro, avaliacao=2, texto="minha")
+    importadas = Critica.objects.bulk_create([
+        Critica(usuario=autor, carro=carro, avaliacao=n, texto="lote") for n in (5, 4)
+    ])
+    for critica in importadas:                  # como em bulk_io: data do arquivo
+        critica.criado_em = _em(2023, 6)
+    Critica.objects.bulk_update(importadas, ["criado_em"])
+
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {
+        "2023-06": (2, 9), timezone.localdate().strftime("%Y-%m"): (1, 2),
+    }
+    # a cópia da data no feed acompanha a crítica
+    assert set(
+        ItemFeed.objects.filter(critica__in=importadas).values_list("criado_em", flat=True)
+    ) == {_em(2023, 6)}
+
+    Critica.objects.filter(carro=carro, texto="lote").update(avaliacao=1)
+    assert _meses(AvaliacaoMensalCarro, carro=carro)["2023-06"] == (2, 2)
+    Critica.objects.filter(carro=carro).delete()
+    assert _meses(AvaliacaoMensalMarca, marca="Tendx") == {}
+
+
+@pytest.mark.django_db
+def test_troca_de_marca(autor):
+    carro = Carro.objects.create(marca="Tendx", modelo="T", ano=2014)
+    _criar(autor, carro, 5, _em(2024, 5))
+
+    carro.marca = "Tendy"
+    carro.save()
+    assert _meses(AvaliacaoMensalMarca, marca="Tendx") == {}
+    assert _meses(AvaliacaoMensalMarca, marca="Tendy") == {"2024-05": (1, 5)}
+
+    Carro.objects.filter(pk=carro.pk).update(marca="Tendz")
+    assert _meses(AvaliacaoMensalMarca, marca="Tendy") == {}
+    assert _meses(AvaliacaoMensalMarca, marca="Tendz") == {"2024-05": (1, 5)}
+
+
+@pytest.mark.django_db
+def test_comando_reconstroi(autor):
+    carro = Carro.objects.create(marca="Tendx", modelo="C", ano=2015)
+    _criar(autor, carro, 3, _em(2024, 2))
+    _criar(autor, carro, 5, _em(2024, 4))
+    AvaliacaoMensalCarro.objects.filter(carro=carro).update(total=9, soma=9)
+    AvaliacaoMensalMarca.objects.filter(marca="Tendx").delete()
+
+    call_command("recalcular_tendencias")
+    assert _meses(AvaliacaoMensalCarro, carro=carro) == {"2024-02": (1, 3), "2024-04": (1, 5)}
+    assert _meses(AvaliacaoMensalMarca, marca="Tendx") == {"2024-02": (1, 3), "2024-04": (1, 5)}
+
+
+@pytest.mark.django_db
+def test_endpoint_do_carro(logado, autor):
+    carro = Carro.objects.create(marca="Tendx", modelo="E", ano=2016)
+    for nota, mes in ((5, 1), (4, 1), (2, 3)):
+        _criar(autor, carro, nota, _em(2024, mes))
+
+    url = f"/api/cars/{carro.pk}/tendencia/?de=2024-01&ate=2024-04"
+    with CaptureQueriesContext(connection) as ctx:
+        resp = logado.get(url)
+    assert resp.status_code == 200
+    assert resp.data["total"] == 3 and resp.data["media"] == 3.667
+    assert resp.data["meses"] == [
+        {"mes": "2024-01", "total": 2, "media": 4.5},
+        {"mes": "2024-02", "total": 0, "media": None},
+        {"mes": "2024-03", "total": 1, "media": 2.0},
+        {"mes": "2024-04", "total": 0, "media": None},
+    ]
+    assert not any("reviews_critica" in q["sql"] for q in ctx.captured_queries)
+
+    assert logado.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code == 304
+    _criar(autor, carro, 1, _em(2024, 2))
+    assert logado.get(url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code == 200
+
+    padrao = logado.get(f"/api/cars/{carro.pk}/tendencia/")
+    assert len(padrao.data["meses"]) == 12
+    assert padrao.data["ate"] == timezone.localdate().strftime("%Y-%m")
+
+    assert logado.get("/api/cars/999999/tendencia/").status_code == 404
+    for params in ("de=2024-13", "de=ontem", "de=2024-05&ate=2024-01", "de=2000-01&ate=2024-01"):
+        assert logado.get(f"/api/cars/{carro.pk}/tendencia/?{params}").status_code == 400
+
+
+@pytest.mark.django_db
+def test_endpoint_da_marca(logado, autor):
+    for modelo, nota in (("X", 5), ("Y", 3)):
+        carro = Carro.objects.create(marca="Tendx", modelo=modelo, ano=2017)
+        _criar(autor, carro, nota, _em(2024, 6))
+
+    resp = logado.get("/api/cars/tendencia-marca/?marca=tendx&de=2024-06&ate=2024-06")
+    assert resp.status_code == 200
+    assert resp.data["meses"] == [{"mes": "2024-06", "total": 2, "media": 4.0}]
+    assert logado.get("/api/cars/tendencia-marca/").status_code == 400
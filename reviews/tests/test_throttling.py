@@ -0,0 +1,251 @@
+# reviews/tests/test_throttling.py
+import sys
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from rest_framework.settings import api_settings
+from reviews import throttling
+from reviews.models import Carro, Critica
+from reviews.throttling import MemoriaLocal, RedisStore, WatchError, consumir_balde
+
+
+class FakeRedis:
+    """GET/SET com PX e pipeline com WATCH/MULTI, como o redis-py."""
+
+    def __init__(self):
+        self.dados = {}
+        self.versoes = {}
+        self.antes_do_execute = None      # simula outro worker gravando no meio
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def gravar(self, chave, valor):
+        self.dados[chave] = valor.encode()
+        self.versoes[chave] = self.versoes.get(chave, 0) + 1
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.vigiadas = {}
+        self.comandos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.vigiadas.clear()
+
+    def watch(self, chave):
+        self.vigiadas[chave] = self.redis.versoes.get(chave, 0)
+
+    def get(self, chave):
+        return self.redis.dados.get(chave)
+
+    def multi(self):
+        self.comandos = []
+
+    def set(self, chave, valor, px=None):
+        assert px and px > 0
+        self.comandos.append((chave, valor))
+
+    def execute(self):
+        if self.redis.antes_do_execute:
+            self.redis.antes_do_execute()
+        if any(self.redis.versoes.get(c, 0) != v for c, v in self.vigiadas.items()):
+            raise WatchError()
+        for chave, valor in self.comandos:
+            self.redis.gravar(chave, valor)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(throttling.BaldeDeTokensThrottle, "timer", lambda self: agora[0])
+    return agora
+
+
+@pytest.fixture
+def baldes(settings):
+    settings.THROTTLE_BALDES = {
+        "login": {"capacidade": 2, "por_minuto": 6},
+        "registro": {"capacidade": 1, "por_minuto": 1},
+        "likes": {"capacidade": 3, "por_minuto": 60},
+    }
+    return settings.THROTTLE_BALDES
+
+
+def test_balde_recompoe_com_o_tempo():
+    estado = None
+    for _ in range(3):
+        permitido, estado, _ = consumir_balde(estado, 3, 1.0, 10.0)
+        assert permitido
+    permitido, estado, espera = consumir_balde(estado, 3, 1.0, 10.0)
+    assert not permitido and espera == 1.0
+    permitido, estado, _ = consumir_balde(estado, 3, 1.0, 11.5)
+    assert permitido and estado[0] == 0.5
+    # nunca passa da capacidade
+    assert consumir_balde(estado, 3, 1.0, 1000.0)[1][0] == 2.0
+
+
+@pytest.mark.parametrize("store", [MemoriaLocal, lambda: RedisStore(FakeRedis())])
+def test_armazenamentos_sao_equivalentes(store):
+    store = store()
+    resultados = [store.consumir("k", 2, 0.5, 100.0)[0] for _ in range(3)]
+    assert resultados == [True, True, False]
+    assert store.consumir("k", 2, 0.5, 101.0) == (False, 1.0)
+    assert store.consumir("k", 2, 0.5, 102.0)[0] is True
+    assert store.consumir("outra", 2, 0.5, 102.0)[0] is True
+
+
+def test_redis_repete_quando_outro_worker_grava_no_meio():
+    redis = FakeRedis()
+    store = RedisStore(redis)
+    store.consumir("k", 5, 1.0, 0.0)
+    interferencias = iter([lambda: redis.gravar("throttle:k", "0.0:0.0")])
+    redis.antes_do_execute = lambda: next(interferencias, lambda: None)()
+
+    permitido, espera = store.consumir("k", 5, 1.0, 0.0)
+    assert not permitido and espera == 1.0           # releu o balde vazio
+    assert redis.dados["throttle:k"] == b"0.0:0.0"
+
+
+def test_memoria_descarta_baldes_recompostos():
+    store = MemoriaLocal(max_chaves=2)
+    store.consumir("a", 1, 1.0, 0.0)
+    store.consumir("b", 1, 1.0, 0.0)
+    store.consumir("c", 1, 1.0, 5.0)
+    assert set(store._baldes) == {"c"}
+
+
+@pytest.mark.django_db
+def test_login_responde_429_com_retry_after(api_client, baldes, relogio):
+    User.objects.create_user(username="alvo", password="certa")
+    dados = {"username": "alvo", "password": "errada"}
+    assert [api_client.post("/api/token/", dados).status_code for _ in range(2)] == [401, 401]
+
+    bloqueada = api_client.post("/api/token/", dados)
+    assert bloqueada.status_code == 429
+    assert bloqueada["Retry-After"] == "10"
+
+    relogio[0] += 10
+    assert api_client.post("/api/token/", {"username": "alvo", "password": "certa"}).status_code == 200
+    # outro IP tem o próprio balde
+    assert api_client.post("/api/token/", dados, REMOTE_ADDR="10.0.0.9").status_code == 401
+
+
+@pytest.mark.django_db
+def test_registro_limitado(api_client, baldes, relogio):
+    dados = {"username": "novo1", "email": "n1@example.com", "password": "Senha!12345"}
+    assert api_client.post("/api/register/", dados).status_code == 201
+    dados = {**dados, "username": "novo2", "email": "n2@example.com"}
+    assert api_client.post("/api/register/", dados).status_code == 429
+    assert not User.objects.filter(username="novo2").exists()
+
+
+@pytest.mark.django_db
+def test_likes_por_usuario_e_metricas(api_client, usuario_autenticado, baldes, relogio):
+    carro = Carro.objects.create(marca="Throttle", modelo="L", ano=2020)
+    critica = Critica.objects.create(usuario=usuario_autenticado["user"], carro=carro, avaliacao=4, texto="x")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+
+    codigos = [
+        api_client.post(f"/api/reviews/{critica.pk}/{acao}/").status_code
+        for acao in ("like", "unlike", "like", "unlike")
+    ]
+    assert codigos == [200, 200, 200, 429]
+    # leituras não gastam o balde
+    assert api_client.get(f"/api/reviews/{critica.pk}/").status_code == 200
+
+    admin = User.objects.create_superuser(username="admin_thr", password="x")
+    api_client.force_authenticate(admin)
+    resumo = api_client.get("/api/instrumentacao/").data["throttling"]
+    assert resumo["likes"] == {"permitidas": 3, "rejeitadas": 1, "falhas": 0}
+
+
+@pytest.mark.django_db
+def test_store_fora_do_ar_libera(api_client, baldes, monkeypatch):
+    class Quebrado:
+        def consumir(self, *args):
+            raise ConnectionError("redis fora")
+
+        def limpar(self):
+            pass
+
+    monkeypatch.setattr(throttling, "_store", Quebrado())
+    User.objects.create_user(username="alvo", password="certa")
+    for _ in range(3):
+        assert api_client.post("/api/token/", {"username": "alvo", "password": "certa"}).status_code == 200
+    assert throttling.metricas.resumo()["login"]["falhas"] == 3
+
+
+@pytest.mark.django_db
+def test_redis_pela_api(api_client, baldes, relogio, monkeypatch):
+    monkeypatch.setattr(throttling, "_store", RedisStore(FakeRedis()))
+    dados = {"username": "ninguem", "password": "x"}
+    codigos = [api_client.post("/api/token/", dados).status_code for _ in range(3)]
+    assert codigos == [401, 401, 429]
+
+
+@pytest.mark.django_db
+def test_desligado(api_client, baldes, settings):
+    settings.THROTTLE_ATIVO = False
+    dados = {"username": "ninguem", "password": "x"}
+    assert {api_client.post("/api/token/", dados).status_code for _ in range(5)} == {401}
+
+
+@pytest.mark.django_db
+def test_benchmarks_nao_sao_limitados(baldes, settings):
+    assert settings.THROTTLE_ATIVO
+    call_command(
+        "benchmark", carros=3, usuarios=2, escalas=[10], iteracoes=6, aquecimento=0,
+        cenarios=["like_unlike"],
+    )
+    call_command("bench_login", usuarios=2, iteracoes=4, aquecimento=0, hasher="md5")
+
+
+@pytest.mark.django_db
+def test_x_forwarded_for_forjado_nao_troca_o_balde(api_client, baldes, relogio):
+    dados = {"username": "ninguem", "password": "x"}
+    codigos = [
+        api_client.post("/api/token/", dados, HTTP_X_FORWARDED_FOR=f"10.9.9.{i}").status_code
+        for i in range(3)
+    ]
+    assert codigos == [401, 401, 429]
+
+
+@pytest.mark.django_db
+def test_atras_de_proxy_usa_o_endereco_acrescentado_por_ele(api_client, baldes, relogio, monkeypatch):
+    monkeypatch.setattr(api_settings, "NUM_PROXIES", 1)
+    dados = {"username": "ninguem", "password": "x"}
+    # o cliente forja o começo do cabeçalho; o proxy acrescenta o IP real no fim
+    codigos = [
+        api_client.post("/api/token/", dados, HTTP_X_FORWARDED_FOR=f"10.9.9.{i}, 203.0.113.7").status_code
+        for i in range(3)
+    ]
+    assert codigos == [401, 401, 429]
+    assert api_client.post("/api/token/", dados, HTTP_X_FORWARDED_FOR="203.0.113.8").status_code == 401
+
+
+@pytest.mark.parametrize("store, url, erro", [
+    ("redis", None, "REDIS_URL"),
+    ("redis", "redis://localhost:6379/0", "pacote redis"),
+    ("memcached", None, "inválido"),
+])
+def test_configuracao_invalida_falha_alto(settings, monkeypatch, store, url, erro):
+    monkeypatch.setitem(sys.modules, "redis", None)     # pacote ausente
+    monkeypatch.setattr(throttling, "_store", None)
+    settings.THROTTLE_STORE = store
+    settings.THROTTLE_REDIS_URL = url
+    with pytest.raises(ImproperlyConfigured, match=erro):
+        throttling.armazenamento()
+    assert throttling._store is None
+
+
+def test_armazenamento_criado_uma_vez(settings, monkeypatch):
+    monkeypatch.setattr(throttling, "_store", None)
+    settings.THROTTLE_STORE = "memoria"
+    assert throttling.armazenamento() is throttling.armazenamento()
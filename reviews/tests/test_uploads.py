@@ -0,0 +1,167 @@
+# reviews/tests/test_uploads.py
+import io
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+from reviews import uploads
+from reviews.models import Carro, CarroImagem, Critica
+
+
+@pytest.fixture
+def cliente(api_client, usuario_autenticado):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {usuario_autenticado['token']}")
+    return api_client
+
+
+@pytest.fixture
+def staging(settings, storage_local, tmp_path):
+    settings.UPLOAD_STAGING_ROOT = str(tmp_path / "staging")
+    settings.UPLOAD_ASSINCRONO = False      # processa no on_commit da requisição
+    return tmp_path / "staging"
+
+
+@pytest.fixture
+def carro(db):
+    return Carro.objects.create(marca="Upload", modelo="U", ano=2010)
+
+
+def _jpeg(nome="foto.jpg", tamanho=(1600, 900)):
+    buffer = io.BytesIO()
+    Image.new("RGB", tamanho, "red").save(buffer, format="JPEG")
+    return SimpleUploadedFile(nome, buffer.getvalue(), content_type="image/jpeg")
+
+
+def _enviar(cliente, carro, arquivo=None, tipo=CarroImagem.EXTERIOR):
+    return cliente.post(
+        "/api/car-images/",
+        {"carro": carro.pk, "tipo": tipo, "foto": arquivo or _jpeg()},
+        format="multipart",
+    )
+
+
+@pytest.mark.django_db
+def test_upload_responde_antes_do_envio(cliente, carro, staging):
+    resp = _enviar(cliente, carro)
+    assert resp.status_code == 202
+    assert resp.data["status"] == CarroImagem.PENDENTE and resp.data["foto"] is None
+    imagem = CarroImagem.objects.get(pk=resp.data["id"])
+    assert (staging / imagem.arquivo_pendente).exists()
+    # ainda não aparece no carro
+    assert cliente.get(f"/api/cars/{carro.pk}/").data["imagens"] == []
+
+
+@pytest.mark.django_db
+def test_worker_envia_original_e_variantes(cliente, carro, staging, storage_local,
+                                           django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = _enviar(cliente, carro)
+    imagem = CarroImagem.objects.get(pk=resp.data["id"])
+    assert imagem.status == CarroImagem.PRONTA and imagem.arquivo_pendente == ""
+    assert (storage_local / imagem.foto.name).exists()
+    assert set(imagem.variantes) == set(uploads.VARIANTES)
+    with Image.open(storage_local / imagem.variantes["thumb"]) as thumb:
+        assert max(thumb.size) == uploads.VARIANTES["thumb"]
+    assert list(staging.iterdir()) == []
+    assert cliente.get(f"/api/cars/{carro.pk}/").data["imagem"].endswith(imagem.foto.name)
+
+
+@pytest.mark.django_db
+def test_troca_mantem_a_foto_anterior_ate_a_nova_ficar_pronta(
+        cliente, carro, staging, storage_local, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        imagem_id = _enviar(cliente, carro).data["id"]
+    anterior = CarroImagem.objects.get(pk=imagem_id).foto.name
+
+    resp = cliente.patch(f"/api/car-images/{imagem_id}/", {"foto": _jpeg("nova.jpg")}, format="multipart")
+    assert resp.status_code == 202
+    assert cliente.get(f"/api/cars/{carro.pk}/").data["imagem"].endswith(anterior)
+
+    uploads.processar(imagem_id)
+    imagem = CarroImagem.objects.get(pk=imagem_id)
+    assert imagem.status == CarroImagem.PRONTA and imagem.foto.name != anterior
+    assert not (storage_local / anterior).exists()
+
+
+@pytest.mark.django_db
+def test_arquivo_invalido_e_rejeitado_na_requisicao(cliente, carro, staging):
+    resp = _enviar(cliente, carro, SimpleUploadedFile("x.jpg", b"nada", content_type="image/jpeg"))
+    assert resp.status_code == 400
+    assert not CarroImagem.objects.exists()
+
+
+@pytest.mark.django_db
+def test_falha_marca_erro_e_comando_tenta_de_novo(cliente, carro, staging, monkeypatch):
+    imagem_id = _enviar(cliente, carro).data["id"]
+
+    def quebra(arquivo):
+        raise OSError("storage fora do ar")
+    monkeypatch.setattr(uploads, "gerar_variantes", quebra)
+    uploads.processar(imagem_id)
+    imagem = CarroImagem.objects.get(pk=imagem_id)
+    assert imagem.status == CarroImagem.ERRO and "fora do ar" in imagem.erro
+    assert (staging / imagem.arquivo_pendente).exists()
+
+    monkeypatch.undo()
+    call_command("processar_imagens", erros=True)
+    assert CarroImagem.objects.get(pk=imagem_id).status == CarroImagem.PRONTA
+
+
+@pytest.mark.django_db
+def test_processamento_abandonado_e_retomado(cliente, carro, staging):
+    imagem_id = _enviar(cliente, carro).data["id"]
+    assert uploads._reivindicar(imagem_id)
+    assert not uploads.processar(imagem_id)           # outro worker já pegou
+
+    call_command("processar_imagens")                 # ainda dentro do prazo
+    assert CarroImagem.objects.get(pk=imagem_id).status == CarroImagem.PROCESSANDO
+    call_command("processar_imagens", reprocessar_apos=0)
+    assert CarroImagem.objects.get(pk=imagem_id).status == CarroImagem.PRONTA
+
+
+@pytest.mark.django_db
+def test_excluir_pendente_apaga_o_staging(cliente, carro, staging):
+    imagem_id = _enviar(cliente, carro).data["id"]
+    assert cliente.delete(f"/api/car-images/{imagem_id}/").status_code == 204
+    assert list(staging.iterdir()) == []
+
+
+# --------------------------------------------------
+# URLs guardadas (sem chamadas ao storage na leitura)
+# --------------------------------------------------
+@pytest.fixture
+def storage_proibido_depois(monkeypatch):
+    def proibir():
+        def url(self, name):
+            raise AssertionError(f"storage.url({name!r}) chamado na serialização")
+        monkeypatch.setattr(FileSystemStorage, "url", url)
+    return proibir
+
+
+@pytest.mark.django_db
+def test_listagens_nao_chamam_o_storage(cliente, carro, staging, usuario_autenticado,
+                                        django_capture_on_commit_callbacks, storage_proibido_depois):
+    with django_capture_on_commit_callbacks(execute=True):
+        _enviar(cliente, carro)
+    imagem = CarroImagem.objects.get()
+    assert imagem.url.endswith(imagem.foto.name)
+    assert set(imagem.urls_variantes) == set(uploads.VARIANTES)
+    Critica.objects.create(usuario=usuario_autenticado["user"], carro=carro, avaliacao=4, texto="url")
+
+    storage_proibido_depois()
+    carros = cliente.get("/api/cars/?search=Upload").data["results"]
+    assert carros[0]["imagem"] == imagem.url
+    assert carros[0]["imagem_thumb"] == imagem.urls_variantes["thumb"]
+    assert cliente.get("/api/reviews/").data["results"][0]["carro_imagem"] == imagem.url
+
+
+@pytest.mark.django_db
+def test_comando_recalcula_urls(carro, storage_local, settings):
+    imagem = CarroImagem.objects.create(carro=carro, tipo=CarroImagem.MOTOR, foto="carros/m.jpg")
+    assert imagem.url == "/media/carros/m.jpg"
+    settings.MEDIA_URL = "https://cdn.example.com/"
+    call_command("atualizar_urls_imagens")
+    imagem.refresh_from_db()
+    assert imagem.url == "https://cdn.example.com/carros/m.jpg"
@@ -0,0 +1,241 @@
+# reviews/throttling.py
+"""
+Limites de taxa por balde de tokens (token bucket) para os endpoints de
+escrita e de autenticação.
+
+Cada escopo (`throttle_scope` da view: "login", "registro", "likes") tem um
+balde por usuário – ou por IP, para anônimos (REMOTE_ADDR, ou o endereço
+que os NUM_PROXIES proxies confiáveis acrescentam ao X-Forwarded-For) – com
+`capacidade` tokens que se recompõem a `por_minuto` tokens por minuto
+(THROTTLE_BALDES). Cada requisição gasta um token; sem token, o DRF responde
+429 com `Retry-After` (segundos até o próximo token). Assim uma rajada de
+logins, que custa um hash de senha cada, não ocupa os workers do gunicorn
+inteiros.
+
+O estado fica num armazenamento plugável:
+
+  • MemoriaLocal – dicionário por processo (padrão). Cada worker tem o seu
+    balde: o limite efetivo é multiplicado pelo número de workers.
+  • RedisStore – qualquer cliente compatível com redis-py (pipeline com
+    WATCH/MULTI, GET e SET com PX). Compartilhado entre workers; ligado com
+    THROTTLE_STORE = "redis" (padrão quando há REDIS_URL).
+
+Se o armazenamento falhar em uso (Redis fora do ar), a requisição passa
+(fail-open) e a falha é contada. Já um THROTTLE_STORE que não dá para
+montar (pacote redis ausente, sem REDIS_URL) impede o processo de subir.
+Permitidas, rejeitadas e falhas por escopo aparecem em
+/api/instrumentacao/.
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:         # redis é opcional: só o RedisStore o usa
+    class WatchError(Exception):
+        pass
+
+logger = logging.getLogger("reviews.throttling")
+
+
+def consumir_balde(estado, capacidade, por_segundo, agora):
+    """
+    Gasta um token do balde `estado` = (tokens, instante) ou None (cheio).
+    Devolve (permitido, novo_estado, espera em segundos).
+    """
+    if estado is None:
+        tokens = float(capacidade)
+    else:
+        tokens, instante = estado
+        tokens = min(float(capacidade), tokens + max(0.0, agora - instante) * por_segundo)
+    if tokens >= 1:
+        return True, (tokens - 1, agora), 0.0
+    return False, (tokens, agora), (1 - tokens) / por_segundo
+
+
+def _validade(capacidade, por_segundo):
+    """Depois disso, sem uso, o balde está cheio de novo: o estado pode sumir."""
+    return capacidade / por_segundo
+
+
+# --------------------------------------------------
+# Armazenamentos
+# --------------------------------------------------
+class MemoriaLocal:
+    """Baldes num dicionário do processo, com limpeza dos já recompostos."""
+
+    def __init__(self, max_chaves=10000):
+        self.max_chaves = max_chaves
+        self._lock = threading.Lock()
+        self._baldes = {}       # chave → (tokens, instante, expira_em)
+
+    def consumir(self, chave, capacidade, por_segundo, agora):
+        with self._lock:
+            linha = self._baldes.get(chave)
+            estado = linha[:2] if linha and linha[2] > agora else None
+            permitido, novo, espera = consumir_balde(estado, capacidade, por_segundo, agora)
+            if len(self._baldes) >= self.max_chaves and chave not in self._baldes:
+                self._descartar_expirados(agora)
+            self._baldes[chave] = (*novo, agora + _validade(capacidade, por_segundo))
+            return permitido, espera
+
+    def _descartar_expirados(self, agora):
+        for chave in [c for c, linha in self._baldes.items() if linha[2] <= agora]:
+            del self._baldes[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._baldes.clear()
+
+
+class RedisStore:
+    """
+    Baldes no Redis como "tokens:instante", atualizados com transação
+    otimista (WATCH/MULTI): se outro worker mexeu na chave no meio, tenta
+    de novo. A chave expira quando o balde estaria cheio.
+    """
+
+    def __init__(self, cliente, prefixo="throttle:", tentativas=5):
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self.tentativas = tentativas
+
+    def consumir(self, chave, capacidade, por_segundo, agora):
+        chave = self.prefixo + chave
+        validade_ms = math.ceil(_validade(capacidade, por_segundo) * 1000)
+        for _ in range(self.tentativas):
+            with self.cliente.pipeline() as pipe:
+                try:
+                    pipe.watch(chave)
+                    bruto = pipe.get(chave)
+                    estado = None
+                    if bruto is not None:
+                        tokens, instante = (bruto.decode() if isinstance(bruto, bytes) else bruto).split(":")
+                        estado = (float(tokens), float(instante))
+                    permitido, (tokens, instante), espera = consumir_balde(
+                        estado, capacidade, por_segundo, agora
+                    )
+                    pipe.multi()
+                    pipe.set(chave, f"{tokens!r}:{instante!r}", px=validade_ms)
+                    pipe.execute()
+                    return permitido, espera
+                except WatchError:
+                    continue
+        raise WatchError(f"Balde {chave} disputado demais ({self.tentativas} tentativas).")
+
+    def limpar(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _criar_armazenamento():
+    if settings.THROTTLE_STORE == "memoria":
+        return MemoriaLocal()
+    if settings.THROTTLE_STORE != "redis":
+        raise ImproperlyConfigured(f"THROTTLE_STORE inválido: {settings.THROTTLE_STORE!r}.")
+    if not settings.THROTTLE_REDIS_URL:
+        raise ImproperlyConfigured("THROTTLE_STORE=redis exige REDIS_URL.")
+    try:
+        import redis
+    except ImportError as erro:
+        raise ImproperlyConfigured("THROTTLE_STORE=redis exige o pacote redis.") from erro
+    return RedisStore(redis.Redis.from_url(settings.THROTTLE_REDIS_URL))
+
+
+def armazenamento():
+    """
+    O armazenamento configurado em THROTTLE_STORE, criado uma vez por
+    processo. Chamado no ready() do app: configuração errada impede a
+    subida em vez de deixar todas as requisições passarem.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _criar_armazenamento()
+    return _store
+
+
+# --------------------------------------------------
+# Métricas
+# --------------------------------------------------
+class Metricas:
+    """Contagem por escopo de requisições permitidas, rejeitadas e falhas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dados = {}
+
+    def registrar(self, escopo, resultado):
+        with self._lock:
+            dados = self._dados.setdefault(escopo, {"permitidas": 0, "rejeitadas": 0, "falhas": 0})
+            dados[resultado] += 1
+
+    def resumo(self):
+        with self._lock:
+            return {escopo: dict(dados) for escopo, dados in sorted(self._dados.items())}
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+
+metricas = Metricas()
+
+
+def limpar():
+    """Esvazia os baldes locais e as métricas (testes)."""
+    if _store is not None:
+        _store.limpar()
+    metricas.limpar()
+
+
+# --------------------------------------------------
+# DRF
+# --------------------------------------------------
+class BaldeDeTokensThrottle(BaseThrottle):
+    """
+    Throttle do DRF pelo `throttle_scope` da view (ou da action). Views sem
+    escopo, ou com escopo fora de THROTTLE_BALDES, não são limitadas.
+    """
+    timer = time.time
+
+    def allow_request(self, request, view):
+        escopo = getattr(view, "throttle_scope", None)
+        config = settings.THROTTLE_BALDES.get(escopo)
+        if not settings.THROTTLE_ATIVO or config is None:
+            return True
+
+        if request.user and request.user.is_authenticated:
+            ident = f"u{request.user.pk}"
+        else:
+            ident = f"ip{self.get_ident(request)}"
+        por_segundo = config["por_minuto"] / 60
+        store = armazenamento()         # erro de configuração não é "store fora do ar"
+        try:
+            permitido, self.espera = store.consumir(
+                f"{escopo}:{ident}", config["capacidade"], por_segundo, self.timer()
+            )
+        except Exception:
+            logger.warning("Armazenamento de throttling indisponível; liberando.", exc_info=True)
+            metricas.registrar(escopo, "falhas")
+            return True
+
+        if permitido:
+            metricas.registrar(escopo, "permitidas")
+            return True
+        metricas.registrar(escopo, "rejeitadas")
+        logger.info("429 %s %s (próximo token em %.1fs)", escopo, ident, self.espera)
+        return False
+
+    def wait(self):
+        return self.espera
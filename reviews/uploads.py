@@ -0,0 +1,198 @@
+# reviews/uploads.py
+"""
+Pipeline assíncrono de upload de CarroImagem.
+
+Na requisição o arquivo só é validado (ImageField do serializer) e gravado
+no staging local (UPLOAD_STAGING_ROOT); a linha fica com status PENDENTE e a
+API responde 202. Depois do commit, um pool de threads do próprio processo
+(UPLOAD_WORKERS) faz o trabalho lento:
+
+  1. gera as variantes redimensionadas (VARIANTES, JPEG) com o Pillow;
+  2. envia original e variantes ao storage padrão (Cloudinary em produção);
+  3. grava `foto`/`variantes`, status PRONTA e apaga o arquivo do staging.
+
+Falhas deixam status ERRO (com a mensagem) e mantêm o arquivo no staging.
+
+A fila de verdade é a própria tabela: o pool é só o caminho rápido. Se o
+processo morrer no meio, `python manage.py processar_imagens` retoma as
+PENDENTE e as PROCESSANDO abandonadas (e, com --erros, as ERRO).
+Com UPLOAD_ASSINCRONO=False o processamento roda no on_commit da própria
+requisição (útil em testes e no shell).
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import CarroImagem
+
+logger = logging.getLogger(__name__)
+
+VARIANTES = {"thumb": 320, "media": 960}     # nome → maior lado, em px
+QUALIDADE_JPEG = 85
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def staging():
+    return FileSystemStorage(location=settings.UPLOAD_STAGING_ROOT)
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "UPLOAD_WORKERS", 2),
+                thread_name_prefix="upload",
+            )
+        return _executor
+
+
+# --------------------------------------------------
+# Na requisição
+# --------------------------------------------------
+def receber(imagem, arquivo):
+    """Grava o upload no staging e marca a imagem como PENDENTE (sem salvar)."""
+    descartar(imagem)
+    imagem.arquivo_pendente = staging().save(os.path.basename(arquivo.name), arquivo)
+    imagem.status = CarroImagem.PENDENTE
+    imagem.erro = ""
+
+
+def agendar(imagem_id):
+    """Processa depois do commit: no pool ou, sem UPLOAD_ASSINCRONO, ali mesmo."""
+    if getattr(settings, "UPLOAD_ASSINCRONO", True):
+        transaction.on_commit(lambda: _pool().submit(_processar_em_thread, imagem_id))
+    else:
+        transaction.on_commit(lambda: processar(imagem_id))
+
+
+def descartar(imagem):
+    """Apaga do staging o arquivo ainda não processado (troca ou exclusão)."""
+    if imagem.arquivo_pendente:
+        staging().delete(imagem.arquivo_pendente)
+        imagem.arquivo_pendente = ""
+
+
+# --------------------------------------------------
+# No worker
+# --------------------------------------------------
+def _processar_em_thread(imagem_id):
+    close_old_connections()
+    try:
+        processar(imagem_id)
+    except Exception:       # processar já registra; o pool não tem a quem avisar
+        logger.exception("upload %s: falha inesperada", imagem_id)
+    finally:
+        close_old_connections()
+
+
+def _reivindicar(imagem_id):
+    """PENDENTE → PROCESSANDO atômico: só um worker processa cada imagem."""
+    return CarroImagem.objects.filter(pk=imagem_id, status=CarroImagem.PENDENTE).update(
+        status=CarroImagem.PROCESSANDO, processamento_iniciado_em=timezone.now(),
+    ) == 1
+
+
+def gerar_variantes(arquivo):
+    """{nome: ContentFile JPEG} redimensionados a partir do original."""
+    with Image.open(arquivo) as original:
+        original = ImageOps.exif_transpose(original).convert("RGB")
+        variantes = {}
+        for nome, lado in VARIANTES.items():
+            copia = original.copy()
+            copia.thumbnail((lado, lado))
+            buffer = io.BytesIO()
+            copia.save(buffer, format="JPEG", quality=QUALIDADE_JPEG, optimize=True)
+            variantes[nome] = ContentFile(buffer.getvalue())
+        return variantes
+
+
+def processar(imagem_id):
+    """Envia uma imagem PENDENTE ao storage. Devolve False se outro já a pegou."""
+    if not _reivindicar(imagem_id):
+        return False
+    imagem = CarroImagem.objects.get(pk=imagem_id)
+    nome_pendente = imagem.arquivo_pendente
+    pendente = staging()
+    antigos = [imagem.foto.name, *imagem.variantes.values()] if imagem.foto else []
+    storage = imagem.foto.storage
+    enviados = []
+    try:
+        with pendente.open(nome_pendente, "rb") as arquivo:
+            variantes = gerar_variantes(arquivo)
+            arquivo.seek(0)
+            nome = os.path.basename(nome_pendente)
+            imagem.foto.save(nome, arquivo, save=False)
+            enviados.append(imagem.foto.name)
+        raiz = os.path.splitext(nome)[0]
+        imagem.variantes = {}
+        for variante, conteudo in variantes.items():
+            imagem.variantes[variante] = storage.save(
+                f"carros/variantes/{raiz}_{variante}.jpg", conteudo
+            )
+            enviados.append(imagem.variantes[variante])
+    except Exception as erro:
+        logger.exception("upload %s: falhou", imagem_id)
+        _apagar(storage, enviados, imagem_id)
+        CarroImagem.objects.filter(pk=imagem_id, arquivo_pendente=nome_pendente).update(
+            status=CarroImagem.ERRO, erro=str(erro)[:500],
+        )
+        return True
+
+    with transaction.atomic():
+        # a foto pode ter sido trocada (ou a imagem excluída) durante o envio
+        vigente = CarroImagem.objects.select_for_update().filter(
+            pk=imagem_id, arquivo_pendente=nome_pendente,
+        ).exists()
+        if vigente:
+            imagem.arquivo_pendente = ""
+            imagem.status = CarroImagem.PRONTA
+            imagem.erro = ""
+            # save() (e não update) para os sinais de ETag/cache do carro
+            imagem.save(update_fields=["foto", "variantes", "arquivo_pendente", "status", "erro"])
+    if not vigente:
+        _apagar(storage, enviados, imagem_id)
+        return True
+    pendente.delete(nome_pendente)
+    _apagar(storage, antigos, imagem_id)     # foto substituída: os arquivos anteriores sobram
+    return True
+
+
+def _apagar(storage, nomes, imagem_id):
+    for nome in nomes:
+        try:
+            storage.delete(nome)
+        except Exception:
+            logger.warning("upload %s: não foi possível apagar %s", imagem_id, nome)
+
+
+def retomar(reprocessar_apos=timedelta(minutes=10), erros=False):
+    """
+    Volta para PENDENTE as imagens presas em PROCESSANDO há mais de
+    `reprocessar_apos` (worker morto) e, com `erros`, as que falharam.
+    Devolve os ids PENDENTE a processar.
+    """
+    presas = Q(status=CarroImagem.PROCESSANDO,
+               processamento_iniciado_em__lt=timezone.now() - reprocessar_apos)
+    if erros:
+        presas |= Q(status=CarroImagem.ERRO)
+    CarroImagem.objects.filter(presas).exclude(arquivo_pendente="").update(
+        status=CarroImagem.PENDENTE,
+    )
+    return list(
+        CarroImagem.objects.filter(status=CarroImagem.PENDENTE)
+        .order_by("pk").values_list("pk", flat=True)
+    )
@@ -5,22 +5,32 @@ from .views import (
     CarroImagemViewSet,
     CarroViewSet,
     CriticaViewSet,
+    FeedView,
+    MarcaSeguidaViewSet,
     RegisterView,
     CustomTokenObtainPairView,
+    InstrumentacaoView,
 )
 
 router = DefaultRouter()
 router.register(r'cars', CarroViewSet, basename='carro')
 router.register(r'reviews', CriticaViewSet, basename='critica')
 router.register(r'car-images', CarroImagemViewSet, basename='carroimagem')
+router.register(r'marcas-seguidas', MarcaSeguidaViewSet, basename='marcaseguida')
 
 urlpatterns = [
     # endpoints CRUD + actions (marcas, modelos, anos, top)
     path('', include(router.urls)),
 
+    # críticas sobre os carros que interessam ao usuário (reviews/feed.py)
+    path('feed/', FeedView.as_view(), name='feed'),
+
     # registro de usuário
     path('register/', RegisterView.as_view(), name='register'),
 
+    # métricas por view (INSTRUMENTACAO=True, só admin)
+    path('instrumentacao/', InstrumentacaoView.as_view(), name='instrumentacao'),
+
     # JWT
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
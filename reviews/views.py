@@ -1,8 +1,25 @@
 # reviews/views.py
-from rest_framework import viewsets, permissions, filters
-from django.db.models import Avg
-from rest_framework.exceptions import PermissionDenied
-from .models import Carro, Critica, CarroImagem
+import io
+import logging
+
+from rest_framework import viewsets, permissions, filters, mixins, status
+from rest_framework.exceptions import NotFound, PermissionDenied
+from . import bulk_io
+from . import feed
+from . import leaderboard as ranking
+from . import likes
+from . import rating_stats
+from . import rating_trends
+from . import throttling
+from .cache import aplicar_validadores, resposta_condicional
+from .conditional import GetCondicionalMixin, carimbo_mais_recente
+from .facets import arvore_de_facetas
+from .field_selection import SelecaoDeCamposMixin
+from .instrumentation import estatisticas
+from .models import Carro, Critica, CarroImagem, MarcaSeguida
+from .pagination import KeysetOuLimitOffsetPagination, KeysetPagination
+from .response_cache import CacheAnonimoMixin
+from .search import CriticaSearchFilter
 from .serializers import (
     CarroSerializer,
     CriticaSerializer,
@@ -10,37 +27,60 @@ from .serializers import (
     EmailTokenObtainPairSerializer,
     CustomTokenObtainPairSerializer,
     CarroImagemSerializer,
+    MarcaSeguidaSerializer,
 )
 from rest_framework import generics
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.contrib.auth.models import User
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
 
 
-class CarroViewSet(viewsets.ModelViewSet):
-    queryset = Carro.objects.all().annotate(media_avaliacao=Avg('criticas__avaliacao'))
+class CarroViewSet(GetCondicionalMixin, SelecaoDeCamposMixin, viewsets.ModelViewSet):
+    queryset = Carro.objects.prefetch_related("imagens")
     serializer_class = CarroSerializer
     permission_classes = [permissions.IsAuthenticated]          # exige login
+    pagination_class = KeysetOuLimitOffsetPagination             # ?cursor= ativa keyset
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     ordering_fields = ["marca", "modelo", "ano", "media_avaliacao"]
     ordering = ["-ano"]
     search_fields = ["marca", "modelo", "ano"]
 
+    # ?fields= / ?omit= / ?resumo=true (reviews/field_selection.py)
+    campos_resumo = ["id", "marca", "modelo", "ano", "media_avaliacao", "imagem_thumb"]
+    colunas_obrigatorias = ["atualizado_em"]
+    colunas_por_campo = {"pontuacao": [], "imagem": [], "imagem_thumb": [], "imagens": []}
+    prefetch_por_campo = {"imagem": ["imagens"], "imagem_thumb": ["imagens"], "imagens": ["imagens"]}
+
+    # Facetas: servidas da árvore em cache (reviews/facets.py), com ETag /
+    # Last-Modified para que o frontend receba 304 enquanto nada mudar.
+    def _responder_facetas(self, request, extrair):
+        facetas = arvore_de_facetas()
+        nao_modificado = resposta_condicional(request, facetas["etag"], facetas["modificado_em"])
+        response = nao_modificado or Response(extrair(facetas["arvore"]))
+        return aplicar_validadores(response, facetas["etag"], facetas["modificado_em"])
+
+    @action(detail=False, methods=['get'])
+    def facetas(self, request):
+        return self._responder_facetas(request, lambda arvore: arvore)
+
     @action(detail=False, methods=['get'])
     def marcas(self, request):
-        marcas = Carro.objects.values_list('marca', flat=True).distinct()
-        return Response(marcas)
+        return self._responder_facetas(request, lambda arvore: list(arvore))
 
     @action(detail=False, methods=['get'])
     def modelos(self, request):
         marca = request.query_params.get('marca')
         if not marca:
             return Response({"error": "Parâmetro 'marca' é obrigatório."}, status=400)
-        modelos = Carro.objects.filter(marca=marca).values_list('modelo', flat=True).distinct()
-        return Response(modelos)
+        return self._responder_facetas(request, lambda arvore: list(arvore.get(marca, {})))
 
     @action(detail=False, methods=['get'])
     def anos(self, request):
@@ -48,40 +88,119 @@ class CarroViewSet(viewsets.ModelViewSet):
         modelo = request.query_params.get('modelo')
         if not marca or not modelo:
             return Response({"error": "Parâmetros 'marca' e 'modelo' são obrigatórios."}, status=400)
-        anos = Carro.objects.filter(marca=marca, modelo=modelo).values_list('ano', flat=True).distinct()
-        return Response(anos)
+        return self._responder_facetas(
+            request, lambda arvore: arvore.get(marca, {}).get(modelo, [])
+        )
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        Total, média, histograma de estrelas e tendência das últimas críticas,
+        lidos dos contadores do carro (reviews/rating_stats.py). ETag pelo
+        atualizado_em do carro, que avança a cada crítica.
+        """
+        try:
+            linha = rating_stats.carregar(int(pk))
+        except ValueError:
+            linha = None
+        if linha is None:
+            raise NotFound()
+        etag = self.gerar_etag(request, linha["atualizado_em"])
+        response = resposta_condicional(request, etag) or Response(rating_stats.montar(linha))
+        response["ETag"] = etag
+        return response
+
+    @action(detail=True, methods=['get'])
+    def tendencia(self, request, pk=None):
+        """
+        Total e média de avaliações mês a mês (?de=AAAA-MM&ate=AAAA-MM), lidos
+        dos agregados mensais (reviews/rating_trends.py). ETag pelo
+        atualizado_em do carro, como em stats.
+        """
+        try:
+            linha = Carro.objects.filter(pk=int(pk)).values("pk", "atualizado_em").first()
+        except ValueError:
+            linha = None
+        if linha is None:
+            raise NotFound()
+        try:
+            de, ate = rating_trends.intervalo(request.query_params)
+        except ValueError as erro:
+            return Response({"error": str(erro)}, status=400)
+        etag = self.gerar_etag(request, linha["atualizado_em"], de, ate)
+        response = (
+            resposta_condicional(request, etag)
+            or Response(rating_trends.do_carro(linha["pk"], de, ate))
+        )
+        response["ETag"] = etag
+        return response
+
+    @action(detail=False, methods=['get'], url_path='tendencia-marca')
+    def tendencia_marca(self, request):
+        """Como tendencia, somando todos os carros de ?marca=."""
+        marca = request.query_params.get('marca')
+        if not marca:
+            return Response({"error": "Parâmetro 'marca' é obrigatório."}, status=400)
+        try:
+            de, ate = rating_trends.intervalo(request.query_params)
+        except ValueError as erro:
+            return Response({"error": str(erro)}, status=400)
+        return Response(rating_trends.da_marca(marca, de, ate))
 
     @action(detail=False, methods=['get'])
     def top(self, request):
         """
-        Retorna os N carros com maior média de avaliação.
-        Query param 'n' define quantos retornar (padrão 3).
+        Retorna os N carros mais bem avaliados (média bayesiana).
+        Query params: 'n' (padrão 3, máx. RANKING_MAX_N) e 'min_criticas'.
+        Servido do ranking em cache (reviews/leaderboard.py), sem tocar em Critica.
         """
         try:
             n = int(request.query_params.get('n', 3))
+            min_criticas = request.query_params.get('min_criticas')
+            min_criticas = int(min_criticas) if min_criticas is not None else None
         except ValueError:
-            return Response({"error": "Parâmetro 'n' deve ser um inteiro."}, status=400)
+            return Response({"error": "Parâmetros 'n' e 'min_criticas' devem ser inteiros."}, status=400)
 
-        top_cars = (
-            Carro.objects
-            .annotate(media_avaliacao=Avg('criticas__avaliacao'))
-            .filter(criticas__isnull=False)
-            .order_by('-media_avaliacao')[:n]
-        )
+        pontuacoes = dict(ranking.top(n, min_criticas))
+        carros = {c.pk: c for c in self.get_queryset().filter(pk__in=pontuacoes)}
+        top_cars = []
+        for carro_id, pontuacao in pontuacoes.items():
+            if carro_id in carros:
+                carros[carro_id].pontuacao = round(pontuacao, 3)
+                top_cars.append(carros[carro_id])
         serializer = self.get_serializer(top_cars, many=True)
         return Response(serializer.data)
 
 
-class CriticaViewSet(viewsets.ModelViewSet):
+class CriticaViewSet(CacheAnonimoMixin, GetCondicionalMixin, SelecaoDeCamposMixin, viewsets.ModelViewSet):
     queryset = Critica.objects.select_related("carro", "usuario")
     serializer_class = CriticaSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    pagination_class = KeysetOuLimitOffsetPagination
+    throttle_scope = None       # like/unlike definem o seu (reviews/throttling.py)
+    filter_backends = [filters.OrderingFilter, CriticaSearchFilter]   # busca full-text
     ordering_fields = ["avaliacao", "criado_em", "carro__ano"]
     ordering = ["-criado_em"]
-    search_fields = ["carro__marca", "carro__modelo", "texto"]
+    search_fields = ["carro__marca", "carro__modelo", "texto"]      # fallback sem FTS
     parser_classes = [MultiPartParser]
 
+    # ?fields= / ?omit= / ?resumo=true (reviews/field_selection.py)
+    campos_resumo = [
+        "id", "usuario_nome", "carro_nome", "carro_marca",
+        "avaliacao", "texto", "total_likes", "liked_by_me",
+    ]
+    texto_resumo = ("texto", 140)
+    colunas_obrigatorias = ["atualizado_em", "carro__atualizado_em"]    # ETag do detalhe
+    colunas_por_campo = {
+        "usuario_nome": ["usuario__username"],
+        "carro_nome": ["carro__modelo"],
+        "carro_marca": ["carro__marca"],
+        "carro_ano": ["carro__ano"],
+        "carro_imagem": [],
+        "liked_by_me": [],
+    }
+    prefetch_por_campo = {"carro_imagem": ["carro__imagens"]}
+
     # NEW ➜ passa o request para o serializer
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -108,44 +227,180 @@ class CriticaViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         my_param = self.request.query_params.get('my', '').lower()
         user = self.request.user
-
-        print(f"[DEBUG] Query param: my={my_param}")
-        print(f"[DEBUG] User: {user} ({type(user)}) - authenticated? {user.is_authenticated}")
+        logger.debug(
+            "listagem de críticas: my=%s usuario=%s autenticado=%s",
+            my_param, user.pk, user.is_authenticated,
+        )
 
         if my_param == 'true':
             if user.is_authenticated:
                 qs = Critica.objects.filter(usuario=user).select_related("carro", "usuario")
-                print(f"[DEBUG] Returning {qs.count()} reviews for user {user}")
-                return qs
-            else:
-                print("[DEBUG] User is not authenticated.")
-                return Critica.objects.none()
+                return self._com_dados_de_listagem(qs)
+            return Critica.objects.none()
+
+        return self._com_dados_de_listagem(Critica.objects.select_related("carro", "usuario").all())
 
-        return Critica.objects.select_related("carro", "usuario").all()
+    # ETag: a crítica mostra marca/modelo/ano/imagem do carro
+    def carimbos_relacionados(self):
+        return {"carros": carimbo_mais_recente(Carro.objects.all())}
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def carimbos_do_objeto(self, obj):
+        return [obj.atualizado_em, obj.carro.atualizado_em]
+
+    def _com_dados_de_listagem(self, qs):
+        """
+        Imagens do carro via prefetch; total_likes é coluna e "curti?" é
+        resolvido em lote por get_serializer. A página sai com um número
+        constante de queries, independente do tamanho.
+        """
+        return qs.prefetch_related("carro__imagens")
+
+    def get_serializer(self, *args, **kwargs):
+        campos = self.campos_selecionados()
+        if kwargs.get("many") and args and (campos is None or "liked_by_me" in campos):
+            args = (list(args[0]), *args[1:])
+            kwargs.setdefault("context", self.get_serializer_context())
+            kwargs["context"]["ids_curtidos"] = likes.ids_curtidos(
+                self.request.user, [critica.pk for critica in args[0]]
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=['get'])
+    def curtidas(self, request):
+        """Dos ids em ?ids=1,2,3, quais o usuário logado curtiu."""
+        try:
+            ids = [int(i) for i in request.query_params.get('ids', '').split(',') if i]
+        except ValueError:
+            return Response({"error": "Parâmetro 'ids' deve ser uma lista de inteiros."}, status=400)
+        return Response(sorted(likes.ids_curtidos(request.user, ids[:200])))
+
+    # Importação/exportação em massa (reviews/bulk_io.py) – só admin
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def exportar(self, request):
+        formato = request.query_params.get('formato', 'jsonl')
+        if formato not in bulk_io.FORMATOS:
+            return Response({"error": "Parâmetro 'formato' deve ser jsonl ou csv."}, status=400)
+        response = StreamingHttpResponse(
+            bulk_io.exportar(Critica.objects.all(), formato),
+            content_type="text/csv" if formato == "csv" else "application/x-ndjson",
+        )
+        response["Content-Disposition"] = f'attachment; filename="criticas.{formato}"'
+        return response
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def importar(self, request):
+        arquivo = request.FILES.get('arquivo')
+        if arquivo is None:
+            return Response({"error": "Envie o arquivo no campo 'arquivo'."}, status=400)
+        formato = request.data.get('formato') or bulk_io.detectar_formato(arquivo.name)
+        if formato not in bulk_io.FORMATOS:
+            return Response({"error": "Parâmetro 'formato' deve ser jsonl ou csv."}, status=400)
+        texto = io.TextIOWrapper(arquivo.file, encoding="utf-8-sig", newline="")
+        try:
+            resumo = bulk_io.importar(texto, formato)
+        except UnicodeDecodeError:
+            # lotes anteriores ao erro já foram gravados
+            return Response({"error": "O arquivo deve estar em UTF-8."}, status=400)
+        return Response(resumo, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='likes')
     def like(self, request, pk=None):
-        review = self.get_object()
-        review.liked_users.add(request.user)
-        return Response({'total_likes': review.liked_users.count()}, status=status.HTTP_200_OK)
+        return self._alterar_like(likes.curtir, pk, curtida=True)
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='likes')
     def unlike(self, request, pk=None):
-        review = self.get_object()
-        review.liked_users.remove(request.user)
-        return Response({'total_likes': review.liked_users.count()}, status=status.HTTP_200_OK)
+        return self._alterar_like(likes.descurtir, pk, curtida=False)
+
+    def _alterar_like(self, operacao, pk, curtida):
+        try:
+            total = operacao(int(pk), self.request.user)
+        except (ValueError, Critica.DoesNotExist):
+            raise NotFound()
+        return Response({'total_likes': total, 'liked_by_me': curtida}, status=status.HTTP_200_OK)
+
+
+class FeedView(generics.ListAPIView):
+    """
+    Críticas de outros usuários sobre os carros que interessam ao usuário
+    logado (criticou, curtiu ou segue a marca), mais recentes primeiro.
+    Lidas da timeline pré-calculada (reviews/feed.py), paginada por cursor.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    serializer_class = CriticaSerializer
+
+    def get_queryset(self):
+        return feed.timeline(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        itens = self.paginate_queryset(self.get_queryset())
+        criticas = [item.critica for item in itens]
+        contexto = self.get_serializer_context()
+        contexto["ids_curtidos"] = likes.ids_curtidos(request.user, [c.pk for c in criticas])
+        serializer = self.get_serializer(criticas, many=True, context=contexto)
+        return self.get_paginated_response(serializer.data)
+
+
+class MarcaSeguidaViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
+                          mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Marcas seguidas pelo usuário logado (alimentam o feed)."""
+    serializer_class = MarcaSeguidaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return MarcaSeguida.objects.filter(usuario=self.request.user)
 
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+    throttle_scope = 'registro'         # reviews/throttling.py
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'login'            # cada tentativa custa um hash de senha
 
 class CarroImagemViewSet(viewsets.ModelViewSet):
+    """
+    Uploads respondem 202 com status "PE": o envio ao storage e as variantes
+    ficam para o worker (reviews/uploads.py). O cliente acompanha por GET.
+    """
     queryset = CarroImagem.objects.all()
     serializer_class = CarroImagemSerializer
-    parser_classes = [MultiPartParser]
\ No newline at end of file
+    parser_classes = [MultiPartParser]
+
+    def _aceito(self, response):
+        if response.data.get("status") == CarroImagem.PENDENTE:
+            response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+    def create(self, request, *args, **kwargs):
+        return self._aceito(super().create(request, *args, **kwargs))
+
+    def update(self, request, *args, **kwargs):
+        return self._aceito(super().update(request, *args, **kwargs))
+
+
+class InstrumentacaoView(APIView):
+    """
+    Agregado por view da instrumentação (reviews/instrumentation.py) deste
+    processo. DELETE zera os contadores.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "ativa": settings.INSTRUMENTACAO,
+            "views": estatisticas.resumo(),
+            "throttling": throttling.metricas.resumo(),
+        })
+
+    def delete(self, request):
+        estatisticas.limpar()
+        throttling.metricas.limpar()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 # Middleware
 # --------------------------------------------------
 MIDDLEWARE = [
+    "reviews.instrumentation.InstrumentacaoMiddleware",   # no-op sem INSTRUMENTACAO
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -86,14 +87,39 @@ TEMPLATES = [
 # --------------------------------------------------
 # Banco de dados
 # --------------------------------------------------
+# SERVIDOR=asgi (uvicorn, ver Procfile): as views rodam em threads do
+# asgiref, que não reaproveitam conexões persistentes; então ficam desligadas.
+SERVIDOR = os.getenv("SERVIDOR", "wsgi")
+
 DATABASES = {
     "default": dj_database_url.config(
         default=f"sqlite:///{BASE_DIR/'db.sqlite3'}",
-        conn_max_age=600,
+        conn_max_age=0 if SERVIDOR == "asgi" else 600,
         ssl_require=False,
     )
 }
 
+# --------------------------------------------------
+# Cache – LocMem por processo; com REDIS_URL, compartilhado entre workers
+# --------------------------------------------------
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "speedgarage",
+        }
+    }
+# Com LocMem a invalidação de um worker não chega aos outros: dados de chaves
+# versionadas (reviews/cache.py) valem no máximo isso
+CACHE_TTL_LOCAL = int(os.getenv("CACHE_TTL_LOCAL", "5"))
+
 # --------------------------------------------------
 # Internacionalização
 # --------------------------------------------------
@@ -132,7 +158,7 @@ STORAGES = {
 # --------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "reviews.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -143,13 +169,97 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_PAGINATION_CLASS": "reviews.pagination.DefaultLimitOffsetPagination",
     "PAGE_SIZE": 60,
+    # só limita views com throttle_scope em THROTTLE_BALDES
+    "DEFAULT_THROTTLE_CLASSES": (
+        "reviews.throttling.BaldeDeTokensThrottle",
+    ),
+    # IP de anônimos nos limites: proxies confiáveis à frente do app. 0 usa
+    # REMOTE_ADDR; N usa o N-ésimo endereço, da direita, do X-Forwarded-For
+    # (o que o cliente escreve no cabeçalho fica à esquerda e é ignorado)
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
  }
 
+# Limites por balde de tokens (reviews/throttling.py): `capacidade` é a
+# rajada permitida, `por_minuto` a reposição. Por usuário, ou por IP.
+THROTTLE_ATIVO = os.getenv("THROTTLE_ATIVO", "True") == "True"
+THROTTLE_BALDES = {
+    "login":    {"capacidade": 10, "por_minuto": 5},     # cada tentativa = 1 hash de senha
+    "registro": {"capacidade": 5,  "por_minuto": 1},
+    "likes":    {"capacidade": 30, "por_minuto": 60},
+}
+THROTTLE_REDIS_URL = os.getenv("REDIS_URL")
+THROTTLE_STORE = os.getenv("THROTTLE_STORE", "redis" if THROTTLE_REDIS_URL else "memoria")
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=4),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
 
+# Snapshot do usuário autenticado (reviews/authentication.py): evita o
+# SELECT em auth_user por requisição
+JWT_CACHE_USUARIO = os.getenv("JWT_CACHE_USUARIO", "True") == "True"
+JWT_CACHE_USUARIO_TTL = 300          # cache do Django (só se for compartilhado)
+JWT_CACHE_USUARIO_TTL_LOCAL = 5      # por processo: atraso máximo entre workers
+
+# Login por username OU e-mail numa única query (índice em LOWER(email))
+AUTHENTICATION_BACKENDS = ["reviews.authentication.EmailOuUsernameBackend"]
+
+# Hashers de senha: o primeiro é usado para novas senhas. Permite trocar por
+# um hasher rápido em testes/benchmarks, ex.:
+#   PASSWORD_HASHERS=django.contrib.auth.hashers.MD5PasswordHasher
+# (as senhas antigas continuam verificáveis se o hasher delas estiver na lista)
+if os.getenv("PASSWORD_HASHERS"):
+    PASSWORD_HASHERS = [h.strip() for h in os.getenv("PASSWORD_HASHERS").split(",") if h.strip()]
+
+# --------------------------------------------------
+# Upload de imagens em segundo plano – ver reviews/uploads.py
+# --------------------------------------------------
+UPLOAD_STAGING_ROOT = os.getenv("UPLOAD_STAGING_ROOT", str(BASE_DIR / "uploads_pendentes"))
+UPLOAD_ASSINCRONO = os.getenv("UPLOAD_ASSINCRONO", "True") == "True"   # False: no on_commit
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))                # threads por processo
+
+# --------------------------------------------------
+# Ranking (/api/cars/top/) – ver reviews/leaderboard.py
+# --------------------------------------------------
+RANKING_MIN_CRITICAS = int(os.getenv("RANKING_MIN_CRITICAS", "1"))
+RANKING_PESO_BAYESIANO = int(os.getenv("RANKING_PESO_BAYESIANO", "3"))
+RANKING_MAX_N = 50
+
+# --------------------------------------------------
+# Feed por usuário (/api/feed/) – ver reviews/feed.py
+# --------------------------------------------------
+FEED_BACKFILL = int(os.getenv("FEED_BACKFILL", "200"))   # críticas por carro ao surgir interesse
+
+# --------------------------------------------------
+# Likes em write-behind – ver reviews/likes.py
+# --------------------------------------------------
+LIKES_WRITE_BEHIND = os.getenv("LIKES_WRITE_BEHIND", "False") == "True"
+LIKES_FLUSH_INTERVALO = float(os.getenv("LIKES_FLUSH_INTERVALO", "1.0"))   # segundos
+LIKES_FLUSH_LOTE = 5000                  # eventos por transação do flusher
+LIKES_FLUSH_THREAD = os.getenv("LIKES_FLUSH_THREAD", "True") == "True"    # False: só o comando
+
+# --------------------------------------------------
+# Cache de respostas anônimas (/api/reviews/) – ver reviews/response_cache.py
+# --------------------------------------------------
+CACHE_ANONIMO_MAX_AGE = int(os.getenv("CACHE_ANONIMO_MAX_AGE", "30"))   # Cache-Control
+
+# --------------------------------------------------
+# Instrumentação – Server-Timing, log por requisição e /api/instrumentacao/
+# --------------------------------------------------
+INSTRUMENTACAO = os.getenv("INSTRUMENTACAO", "False") == "True"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "reviews": {
+            "handlers": ["console"],
+            "level": os.getenv("REVIEWS_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
 # --------------------------------------------------
 # CORS
 # --------------------------------------------------